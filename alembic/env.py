@@ -92,6 +92,8 @@ from app.database.models.product_card import ProductCard
 # позже добавишь:
 from app.database.models.product_files import ProductFile
 from app.database.models.order import Order
+from app.database.models.product_card_images import ProductCardImage
+from app.database.models.product_card_image_variants import ProductCardImageVariant
 
 
 #
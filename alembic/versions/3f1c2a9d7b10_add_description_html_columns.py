@@ -0,0 +1,132 @@
+"""add description_html columns
+
+Revision ID: 3f1c2a9d7b10
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+First revision tracked in the repository. Databases created before that are stamped
+with revisions this tree does not know, and `alembic upgrade head` fails there with
+"Can't locate revision". Run once on such a database, before the first upgrade:
+
+    alembic stamp --purge base
+    alembic upgrade head
+
+stamp --purge only rewrites alembic_version (the schema is not touched); the upgrade
+then applies this chain on top of the existing tables.
+
+The backfill below uses a frozen copy of the Markdown rendering from app.core.utils
+as of this revision, so later changes to the app do not change what this migration does.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import bleach
+import markdown
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7b10'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ("product_card", "product_card_images", "product_files")
+
+ALLOWED_TAGS = set(bleach.sanitizer.ALLOWED_TAGS) | {
+    "p", "br", "hr", "pre", "code", "img",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+    "ul", "ol", "li", "strong", "em", "blockquote",
+    "table", "thead", "tbody", "tr", "th", "td"
+}
+ALLOWED_ATTRIBUTES = dict(bleach.sanitizer.ALLOWED_ATTRIBUTES)
+ALLOWED_ATTRIBUTES.update({
+    "img": ["src", "alt", "title", "width", "height", "loading"],
+    "a": ["href", "title", "target", "rel"],
+})
+ALLOWED_PROTOCOLS = set(bleach.sanitizer.ALLOWED_PROTOCOLS) | {"data"}
+DOWNLOAD_LINK_PLACEHOLDER = "https://example.com>"
+
+
+def _preprocess_markdown(md_text: str) -> str:
+    """Пустая строка перед списками и перед строкой с ':' перед списком."""
+    lines = md_text.split("\n")
+    result = []
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if (
+                stripped.endswith(":")
+                and i + 1 < len(lines)
+                and lines[i + 1].strip().startswith(("- ", "* ", "1. "))
+        ):
+            if result and result[-1].strip() != "":
+                result.append("")
+            result.append(line)
+            continue
+        if (
+                stripped.startswith(("- ", "* ", "1. "))
+                and result
+                and result[-1].strip() != ""
+        ):
+            result.append("")
+        result.append(line)
+    return "\n".join(result)
+
+
+def _md_to_safe_html(md_text: str) -> str:
+    if not md_text:
+        return ""
+    try:
+        html = markdown.markdown(_preprocess_markdown(md_text), extensions=["extra", "nl2br", "tables"])
+        return bleach.clean(
+            html,
+            tags=ALLOWED_TAGS,
+            attributes=ALLOWED_ATTRIBUTES,
+            protocols=list(ALLOWED_PROTOCOLS),
+            strip=True,
+        )
+    except Exception:
+        return bleach.clean(md_text, strip=True)
+
+
+def _file_description_to_html(description, file_id: int) -> str:
+    if not description:
+        return ""
+    return _md_to_safe_html(description.replace(DOWNLOAD_LINK_PLACEHOLDER, f"/api/v1/download/{file_id}"))
+
+
+def _backfill(table_name: str, render) -> None:
+    """Рендерит description_html для уже существующих строк (только online-режим)."""
+    if op.get_context().as_sql:
+        return
+    table = sa.table(
+        table_name,
+        sa.column("id", sa.Integer),
+        sa.column("description", sa.Text),
+        sa.column("description_html", sa.Text),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(table.c.id, table.c.description)).all()
+    for row_id, description in rows:
+        bind.execute(
+            table.update()
+            .where(table.c.id == row_id)
+            .values(description_html=render(description, row_id))
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in TABLES:
+        op.add_column(table_name, sa.Column("description_html", sa.Text(), nullable=True))
+
+    _backfill("product_card", lambda description, _: _md_to_safe_html(description or ""))
+    _backfill("product_card_images", lambda description, _: _md_to_safe_html(description or ""))
+    _backfill("product_files", _file_description_to_html)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in TABLES:
+        op.drop_column(table_name, "description_html")
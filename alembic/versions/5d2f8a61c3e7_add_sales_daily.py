@@ -0,0 +1,49 @@
+"""add sales_daily summary table
+
+Revision ID: 5d2f8a61c3e7
+Revises: e41b7c0d9a25
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8a61c3e7'
+down_revision: Union[str, Sequence[str], None] = 'e41b7c0d9a25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled on the first GET /api/v1/analytics/sales (no watermark yet -> all orders)
+    op.create_table(
+        "sales_daily",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("product_code", sa.String(), nullable=False),
+        sa.Column("lang", sa.String(length=2), nullable=False),
+        sa.Column("currency", postgresql.ENUM(name="currency", create_type=False), nullable=False),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("day", "product_code", "lang", "currency"),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_updated_at", "orders", ["updated_at"], postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_orders_updated_at", table_name="orders", postgresql_concurrently=True, if_exists=True)
+    op.drop_table("sales_daily")
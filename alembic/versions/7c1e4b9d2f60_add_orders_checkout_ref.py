@@ -0,0 +1,37 @@
+"""add orders.checkout_ref
+
+Revision ID: 7c1e4b9d2f60
+Revises: 9a3c5e7f1b42
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4b9d2f60'
+down_revision: Union[str, Sequence[str], None] = '9a3c5e7f1b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # nullable, no default: adding the column does not rewrite the table
+    op.add_column("orders", sa.Column("checkout_ref", sa.String(length=64), nullable=True))
+    # CONCURRENTLY: the orders table stays writable while the index is built
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ux_orders_checkout_ref", "orders", ["checkout_ref"],
+            unique=True, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ux_orders_checkout_ref", table_name="orders", postgresql_concurrently=True, if_exists=True)
+    op.drop_column("orders", "checkout_ref")
@@ -0,0 +1,49 @@
+"""add product_card_image_variants
+
+Revision ID: 8b4e6d21c5f3
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e6d21c5f3'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a9d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "product_card_image_variants",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("image_id", sa.Integer(), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column("format", sa.String(length=8), nullable=False),
+        sa.Column("url", sa.Text(), nullable=False),
+        sa.Column("bytes", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["image_id"], ["product_card_images.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("image_id", "width", "format"),
+    )
+    op.create_index(
+        op.f("ix_product_card_image_variants_image_id"),
+        "product_card_image_variants",
+        ["image_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_product_card_image_variants_image_id"), table_name="product_card_image_variants")
+    op.drop_table("product_card_image_variants")
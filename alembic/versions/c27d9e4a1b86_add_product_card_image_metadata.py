@@ -0,0 +1,37 @@
+"""add product_card_images metadata
+
+Revision ID: c27d9e4a1b86
+Revises: 8b4e6d21c5f3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c27d9e4a1b86'
+down_revision: Union[str, Sequence[str], None] = '8b4e6d21c5f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows are filled by `python -m app.cli.image_variants` (needs the image files)
+    op.add_column("product_card_images", sa.Column("width", sa.Integer(), nullable=True))
+    op.add_column("product_card_images", sa.Column("height", sa.Integer(), nullable=True))
+    op.add_column("product_card_images", sa.Column("bytes", sa.Integer(), nullable=True))
+    op.add_column("product_card_images", sa.Column("dominant_color", sa.String(length=7), nullable=True))
+    op.add_column("product_card_images", sa.Column("placeholder", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("product_card_images", "placeholder")
+    op.drop_column("product_card_images", "dominant_color")
+    op.drop_column("product_card_images", "bytes")
+    op.drop_column("product_card_images", "height")
+    op.drop_column("product_card_images", "width")
@@ -0,0 +1,38 @@
+"""add orders indexes for keyset pagination
+
+Revision ID: e41b7c0d9a25
+Revises: c27d9e4a1b86
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b7c0d9a25'
+down_revision: Union[str, Sequence[str], None] = 'c27d9e4a1b86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ("ix_orders_created_at_id", ["created_at", "id"]),
+    ("ix_orders_state_created_at_id", ["state", "created_at", "id"]),
+    ("ix_orders_product_code_created_at_id", ["product_code", "created_at", "id"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY: the orders table stays writable while the indexes are built
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, "orders", columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.drop_index(name, table_name="orders", postgresql_concurrently=True, if_exists=True)
@@ -8,6 +8,8 @@ from .v1.product_card_image import router as image_product_router
 from .v1.product_files import router as product_files_router
 from .v1.download import router as download_router
 from .v1.admin import router as admin_router
+from .v1.webhooks import router as webhooks_router
+from .v1.analytics import router as analytics_router
 
 
 api_router = APIRouter()
@@ -19,3 +21,5 @@ api_router.include_router(image_product_router, prefix="/v1", tags=["Product Ima
 api_router.include_router(product_files_router, prefix="/v1", tags=["Product Files"])
 api_router.include_router(download_router, prefix="/v1", tags=["Download"])
 api_router.include_router(admin_router, prefix="/v1", tags=["Admin"])
+api_router.include_router(webhooks_router, prefix="/v1", tags=["Webhooks"])
+api_router.include_router(analytics_router, prefix="/v1", tags=["Analytics"])
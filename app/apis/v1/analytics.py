@@ -0,0 +1,64 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.apis.deps import get_session, get_current_admin
+from app.core.config import settings, Currency, Languages
+from app.database.crud.sales_analytics import get_sales_report, refresh_sales_daily
+from app.schemas import SalesReport
+
+router = APIRouter(prefix="/analytics")
+
+
+@router.get("/sales", response_model=SalesReport)
+async def sales_report_api(
+        date_from: Optional[date] = Query(None, description="UTC-день, по умолчанию — 30 дней назад"),
+        date_to: Optional[date] = Query(None, description="UTC-день включительно, по умолчанию — сегодня"),
+        product_code: Optional[str] = Query(None),
+        lang: Optional[Languages] = Query(None),
+        currency: Optional[Currency] = Query(None),
+        refresh: bool = Query(True, description="Досчитать заказы, изменённые после watermark"),
+        session: AsyncSession = Depends(get_session),
+        admin=Depends(get_current_admin)
+):
+    """
+    Оплаченные заказы и выручка по дням, продуктам, языкам и валютам.
+    Данные из sales_daily; перед чтением она досчитывается по заказам новее watermark
+    (обычно единицы строк), полный пересчёт истории не выполняется.
+    """
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=30)
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from is after date_to")
+    if (date_to - date_from).days > settings.ANALYTICS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range is limited to {settings.ANALYTICS_MAX_DAYS} days",
+        )
+
+    if refresh:
+        await refresh_sales_daily(session)
+    return await get_sales_report(
+        session,
+        date_from=date_from,
+        date_to=date_to,
+        product_code=product_code,
+        lang=lang.value if lang else None,
+        currency=currency,
+    )
+
+
+@router.post("/sales/rebuild")
+async def rebuild_sales_api(
+        session: AsyncSession = Depends(get_session),
+        admin=Depends(get_current_admin)
+):
+    """
+    Полный пересчёт sales_daily из orders — после ручных правок заказов задним числом.
+    """
+    buckets = await refresh_sales_daily(session, full=True)
+    if buckets is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Refresh already in progress")
+    return {"buckets": buckets}
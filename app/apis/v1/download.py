@@ -1,36 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+import time
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
-import os
 
 from app.apis.deps import get_session
-from app.database.crud.product_files import get_product_file_by_id
-from app.core.config import Languages
+from app.core.config import settings
+from app.core.download_links import verify_download_link, InvalidDownloadLink, ExpiredDownloadLink
+from app.core.file_index import DOWNLOAD_ROOT, IndexedFile, product_file_index
+from app.database.crud.product_files import get_indexed_file
 
 router = APIRouter(prefix="/download")
 
 
+class IndexedFileResponse(FileResponse):
+    """
+    FileResponse по записи индекса (stat из индекса, без повторного stat).
+    Если файл не удалось открыть или отдать (удалён или заменён на диске в обход API),
+    запись удаляется из индекса: следующий запрос перечитает её со свежим stat.
+    """
+
+    def __init__(self, file: IndexedFile, **kwargs):
+        super().__init__(file.path, filename=file.path.name, stat_result=file.stat, **kwargs)
+        self.file_id = file.file_id
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        except Exception:
+            product_file_index.remove(self.file_id)
+            raise
+
+
+def file_download_response(
+    file: IndexedFile,
+    cache_control: str = "private",
+    media_type: str = "application/pdf"
+) -> Response:
+    """
+    Ответ со скачиванием файла из индекса.
+    - за nginx (USE_X_ACCEL_REDIRECT): пустой ответ с X-Accel-Redirect, байты отдаёт nginx
+      (Cache-Control и Content-Disposition nginx берёт из этого ответа);
+    - без nginx: FileResponse (поддерживает Range / If-Range, отдаёт файл частями).
+    """
+    if settings.USE_X_ACCEL_REDIRECT:
+        relative_path = file.path.relative_to(DOWNLOAD_ROOT).as_posix()
+        return Response(
+            headers={
+                "X-Accel-Redirect": quote(settings.X_ACCEL_REDIRECT_PREFIX + relative_path),
+                "Content-Disposition": f"attachment; filename*=utf-8''{quote(file.path.name)}",
+                "Cache-Control": cache_control,
+            },
+            media_type=media_type,
+        )
+
+    return IndexedFileResponse(
+        file,
+        media_type=media_type,
+        headers={"ETag": file.etag, "Cache-Control": cache_control},
+    )
+
+
 @router.get("/{id}")
 async def download_file(
     id: int,
+    order: Optional[str] = Query(None, max_length=64),
+    expires: Optional[int] = Query(None),
+    signature: Optional[str] = Query(None, max_length=64),
     session: AsyncSession = Depends(get_session)
 ):
-    # 1. Получаем продукт
-    file = await get_product_file_by_id(session, id)
+    # 0. Подпись ссылки (HMAC по id, order, expires) — только CPU, без БД
+    try:
+        verify_download_link(id, order, expires, signature)
+    except ExpiredDownloadLink:
+        raise HTTPException(status_code=410, detail="Download link expired")
+    except InvalidDownloadLink:
+        raise HTTPException(status_code=403, detail="Invalid download link")
+
+    # 1. Файл из индекса в памяти, сверенный с БД по версии (stat — только при перечитывании записи)
+    file = await get_indexed_file(session, id)
     if not file:
         raise HTTPException(status_code=404, detail="File for this language not found")
 
-    # 3. Формируем путь
-    # file.file_link хранит относительный путь, например: "files/paris_ru.pdf"
-    static_root = "app/web"
-    full_path = os.path.join(static_root, file.file_link.lstrip("/"))
-
-    if not os.path.exists(full_path):
+    # 2. Файла нет на диске (запись перепроверяется при каждом запросе, пока он не появится)
+    if file.path is None:
         raise HTTPException(status_code=404, detail="File not found on server")
 
-    # 4. Отдаём файл безопасно
-    return FileResponse(
-        full_path,
-        filename=os.path.basename(full_path),
-        media_type="application/pdf"
-    )
+    # 3. Отдаём файл: через nginx (X-Accel-Redirect) или сами, с поддержкой Range.
+    #    Платный файл: только кэш браузера покупателя, не общие кэши (CDN, прокси)
+    max_age = max(0, expires - int(time.time()))
+    return file_download_response(file, cache_control=f"private, max-age={max_age}")
@@ -1,16 +1,27 @@
-from typing import List, Optional
+from datetime import date, datetime, time, timedelta, timezone
+from typing import AsyncIterator, Callable, Dict, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Path
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 import httpx
-import json
 import logging
+import secrets
 
 from app.core.config import settings
+from app.core.payment_client import payment_client, PaymentProviderUnavailable
+from app.core.idempotency import (
+    idempotency_store, request_fingerprint, IdempotencyKeyConflict, IdempotentRequestAborted
+)
+from app.core.order_export import EXPORT_MEDIA_TYPES, encode_export
+from app.core.utils import build_thank_you_link
 from app.apis.deps import get_session, get_current_admin
-from app.schemas import OrderCreate, OrderSave, OrderRead
+from app.database.db import async_session_maker
+from app.schemas import OrderCreate, OrderSave, OrderRead, OrderPage
 from app.database.crud.product import get_product_by_ids
-from app.database.crud.order import create_order, get_order_by_id, list_orders, list_orders_by_status
+from app.database.crud.order import (
+    ORDER_EXPORT_COLUMNS, create_order, get_order_by_id, list_orders_page, stream_orders
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/order")
@@ -22,49 +33,82 @@ router = APIRouter(prefix="/order")
 )
 async def create_order_api(
         order_in: OrderCreate,
-        session: AsyncSession = Depends(get_session),
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=128),
 ):
+    """
+    Создаёт заказ (см. place_order).
+    Сессия БД не берётся из Depends(get_session): place_order открывает две короткие
+    сессии и не держит соединение пула во время запроса к провайдеру.
+    С заголовком Idempotency-Key повтор запроса (двойной клик, ретрай клиента) получает
+    первый ответ — тот же checkout_url, без второго заказа у провайдера и в БД;
+    одновременные повторы ждут результат первого запроса; если первый запрос прерван —
+    503 с Retry-After, повтор с тем же ключом выполнится заново.
+    """
+    if not idempotency_key:
+        return await place_order(order_in)
+    try:
+        return await idempotency_store.run(
+            idempotency_key,
+            request_fingerprint(order_in.model_dump(mode="json")),
+            lambda: place_order(order_in),
+        )
+    except IdempotencyKeyConflict as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    except IdempotentRequestAborted as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc), headers={"Retry-After": "1"}
+        )
+
+
+async def place_order(
+        order_in: OrderCreate,
+        session_maker: Callable[[], AsyncSession] = async_session_maker,
+) -> Dict[str, str]:
     """
     Создаёт заказ: 1) проверяет продукт, 2) вызывает провайдера платежей, 3) сохраняет заказ в БД.
-    Возвращает OrderSave (token/checkout_url помечены exclude=True в схеме, но checkout_url
-    возвращается эпhemerally в поле checkout_url_response).
+    Чтение продукта и запись заказа — две короткие транзакции; между ними, на время
+    запроса к провайдеру, соединение возвращено в пул.
+    Возвращает checkout_url провайдера (token/checkout_url помечены exclude=True в OrderSave
+    и в БД не сохраняются).
     """
-    # 1) Проверяем продукт
-    product = await get_product_by_ids(session, product_code=order_in.product_code)
+    # 1) Проверяем продукт (короткое чтение; сессия закрывается до вызова провайдера)
+    async with session_maker() as session:
+        product = await get_product_by_ids(session, product_code=order_in.product_code)
     if product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
     # 2) Формируем запрос к провайдеру
-    try:
-        url = settings.REVOLUT_URL + "/api/orders"
-    except AttributeError as e:
-        print(settings)
+    checkout_ref = secrets.token_urlsafe(24)
     payload = {
         "amount": product.price,
         "currency": product.currency,
         "settlement_currency": order_in.settlement_currency,
         "customer": {"email": order_in.customers_email},
         "metadata": {"product_code": order_in.product_code, "product_lang": order_in.lang},
-        "redirect_url": f'{settings.MY_URL}/thank-you/{order_in.product_code}/{order_in.lang.value}',
-    }
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        # Используем ключ из Settings, если он не задан — логируем и возвращаем 500
-        "Authorization": f"Bearer {settings.SECRET_API_KEY}" if getattr(settings, "SECRET_API_KEY", None) else "",
-        'Revolut-Api-Version': settings.Revolut_Api_Version,
+        # id заказа провайдер выдаёт только в ответе, поэтому в redirect_url — свой случайный checkout_ref;
+        # страница "спасибо" находит по нему заказ и подписывает ссылку, только если он оплачен
+        "redirect_url": settings.MY_URL + build_thank_you_link(
+            order_in.product_code, order_in.lang.value, checkout_ref
+        ),
     }
-    if not headers["Authorization"]:
+    # Ключ берётся из Settings; если он не задан — логируем и возвращаем 500
+    if not getattr(settings, "SECRET_API_KEY", None):
         logger.error("Payment provider API key is not configured (Settings.SECRET_API_KEY missing)")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Payment provider not configured")
 
-    # 3) Вызов провайдера
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            resp = await client.post(url, headers=headers, json=payload)
-        except httpx.HTTPError as exc:
-            logger.exception("HTTP error while calling payment provider")
-            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Payment provider unreachable") from exc
+    # 3) Вызов провайдера через общий клиент (keep-alive пул, HTTP/2, раздельные таймауты)
+    try:
+        resp = await payment_client.create_order(payload)
+    except PaymentProviderUnavailable as exc:
+        # быстрый отказ: не держим корутину и сессию БД, пока провайдер деградирует
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Payment provider temporarily unavailable",
+            headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+        ) from exc
+    except httpx.HTTPError as exc:
+        logger.exception("HTTP error while calling payment provider")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Payment provider unreachable") from exc
 
     # 4) Обработка ответа провайдера
     if resp.status_code != status.HTTP_201_CREATED:
@@ -79,13 +123,15 @@ async def create_order_api(
     #    Предполагаем, что create_order CRUD умеет принять dict/Pydantic с нужными полями.
     order = OrderSave(
         **order_in.model_dump(exclude={"settlement_currency"}),
-        **provider_data
+        **provider_data,
+        checkout_ref=checkout_ref,
     )
 
     # 6) Сохраняем заказ в БД
     # try:
     # create_order — твоя CRUD функция; она должна вернуть OrderSave (или None/raise)
-    saved_order = await create_order(session, order)
+    async with session_maker() as session:
+        saved_order = await create_order(session, order)
     # except ValueError as exc:
     #     logger.exception("Failed to save order to DB")
     #     raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
@@ -100,6 +146,48 @@ async def create_order_api(
     return {"url": checkout_url}
 
 
+@router.get("/export")
+async def export_orders_api(
+        fmt: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+        state: Optional[str] = Query(None),
+        product_code: Optional[str] = Query(None),
+        date_from: Optional[date] = Query(None, description="created_at с этого UTC-дня"),
+        date_to: Optional[date] = Query(None, description="created_at по этот UTC-день включительно"),
+        admin=Depends(get_current_admin)
+):
+    """
+    Выгрузка заказов (бухгалтерия) потоком CSV / NDJSON.
+    Строки читаются серверным курсором и отдаются по мере чтения — память воркера
+    не зависит от объёма выгрузки.
+    Сессия открывается внутри генератора ответа: сессия из Depends(get_session)
+    закрывается до того, как тело ответа начнёт отправляться.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from is after date_to")
+    created_from = datetime.combine(date_from, time.min, tzinfo=timezone.utc) if date_from else None
+    created_to = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=timezone.utc) if date_to else None
+
+    async def body() -> AsyncIterator[bytes]:
+        async with async_session_maker() as session:
+            partitions = stream_orders(
+                session,
+                state=state,
+                product_code=product_code,
+                created_from=created_from,
+                created_to=created_to,
+                batch_size=settings.ORDER_EXPORT_BATCH_SIZE,
+            )
+            async for chunk in encode_export(fmt, ORDER_EXPORT_COLUMNS, partitions):
+                yield chunk
+
+    filename = f"orders-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/{order_id}", response_model=OrderRead)
 async def get_order_api(order_id: str = Path(..., description="Order id"),
                         session: AsyncSession = Depends(get_session)):
@@ -109,22 +197,33 @@ async def get_order_api(order_id: str = Path(..., description="Order id"),
     return order
 
 
-@router.get("/", response_model=List[OrderRead])
+@router.get("/", response_model=OrderPage)
 async def list_orders_api(
         limit: int = Query(100, ge=1, le=1000),
-        offset: int = Query(0, ge=0),
+        cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+        state: Optional[str] = Query(None),
+        product_code: Optional[str] = Query(None),
         session: AsyncSession = Depends(get_session),
         admin=Depends(get_current_admin)
 ):
-    return await list_orders(session, limit=limit, offset=offset)
+    """
+    Заказы, новые сверху. Следующая страница — запрос с cursor=next_cursor.
+    """
+    try:
+        return await list_orders_page(session, limit=limit, cursor=cursor, state=state, product_code=product_code)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
 
 
-@router.get("/by-status/{status}", response_model=List[OrderRead])
+@router.get("/by-status/{state}", response_model=OrderPage)
 async def list_orders_by_status_api(
-        status: str,
+        state: str,
         limit: int = Query(100, ge=1, le=1000),
-        offset: int = Query(0, ge=0),
+        cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
         session: AsyncSession = Depends(get_session),
         admin=Depends(get_current_admin)
 ):
-    return await list_orders_by_status(session, status=status, limit=limit, offset=offset)
+    try:
+        return await list_orders_page(session, limit=limit, cursor=cursor, state=state)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
@@ -1,8 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict
+from typing import Dict, Optional
 from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import BaseModel
 from app.core.config import settings
+from app.core.payment_client import payment_client
+from app.core.order_events import order_event_queue
+from app.core.order_reconciler import order_reconciler
+from app.core.guide_emails import guide_email_sender
+from app.core.job_queue import job_worker
+from app.database.crud.jobs import job_stats, requeue_dead_jobs
 from app.apis.deps import get_session, get_current_admin
 
 router = APIRouter(prefix="/service")
@@ -23,6 +30,59 @@ async def health_check_db(admin=Depends(get_current_admin)) -> Dict[str, str]:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/metrics/payment")
+async def payment_client_metrics(admin=Depends(get_current_admin)) -> Dict:
+    """
+    Latency percentiles, in-flight requests and connection pool usage of the payment provider client.
+    """
+    return payment_client.snapshot()
+
+
+@router.get("/metrics/order-events")
+async def order_events_metrics(admin=Depends(get_current_admin)) -> Dict:
+    """
+    Webhook event queue: queued events, orders changed, duplicates dropped.
+    """
+    return order_event_queue.stats()
+
+
+@router.get("/metrics/order-reconciler")
+async def order_reconciler_metrics(admin=Depends(get_current_admin)) -> Dict:
+    """
+    Last reconcile run of this process: orders checked and changed.
+    """
+    return order_reconciler.stats()
+
+
+@router.get("/metrics/guide-emails")
+async def guide_emails_metrics(admin=Depends(get_current_admin)) -> Dict:
+    """
+    Guide emails sent by this process: sent / retried / failed, SMTP connections, body cache.
+    Queue depth is in /metrics/jobs (kind guide_email).
+    """
+    return guide_email_sender.stats()
+
+
+@router.get("/metrics/jobs")
+async def jobs_metrics(session: AsyncSession = Depends(get_session), admin=Depends(get_current_admin)) -> Dict:
+    """
+    Durable job queue: jobs per kind and status, age of the oldest due job, this process's worker.
+    """
+    return {"jobs": await job_stats(session), "worker": job_worker.stats()}
+
+
+@router.post("/jobs/requeue-dead")
+async def jobs_requeue_dead(
+    kind: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    admin=Depends(get_current_admin),
+) -> Dict[str, int]:
+    """
+    Puts dead jobs (optionally of one kind) back into the queue with a fresh attempt budget.
+    """
+    return {"requeued": await requeue_dead_jobs(session, kind)}
+
+
 class PublicURL(BaseModel):
     public_url: str
 
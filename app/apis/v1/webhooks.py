@@ -0,0 +1,57 @@
+import asyncio
+import json
+import logging
+
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from typing import Dict, Optional
+
+from app.core.order_events import (
+    ORDER_EVENT_STATES,
+    InvalidWebhookSignature,
+    OrderEvent,
+    order_event_queue,
+    verify_revolut_signature,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/webhooks")
+
+
+@router.post("/revolut", status_code=status.HTTP_200_OK)
+async def revolut_webhook(
+    request: Request,
+    revolut_signature: Optional[str] = Header(None, alias="Revolut-Signature"),
+    revolut_request_timestamp: Optional[str] = Header(None, alias="Revolut-Request-Timestamp"),
+) -> Dict[str, str]:
+    """
+    Приём событий заказов Revolut.
+    Только проверка подписи и постановка в очередь — состояние заказов пишет
+    фоновый потребитель пакетами (app.core.order_events), поэтому ответ быстрый
+    даже во время волны повторов от провайдера.
+    """
+    body = await request.body()
+    try:
+        verify_revolut_signature(body, revolut_request_timestamp, revolut_signature)
+    except InvalidWebhookSignature as exc:
+        logger.warning("Rejected webhook: %s", exc)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature")
+
+    try:
+        payload = json.loads(body)
+        event_name = payload["event"]
+        order_id = payload["order_id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed event")
+
+    state = ORDER_EVENT_STATES.get(event_name)
+    if state is None:
+        # события платежей и прочие — состояние заказа не меняют
+        return {"status": "ignored"}
+
+    try:
+        accepted = order_event_queue.put(OrderEvent(order_id=str(order_id), event=event_name, state=state))
+    except asyncio.QueueFull:
+        # провайдер повторит доставку позже
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Event queue is full")
+
+    return {"status": "accepted" if accepted else "duplicate"}
@@ -0,0 +1,44 @@
+"""
+Back-fill of responsive image variants and image metadata for existing ProductCardImage rows.
+
+    python -m app.cli.image_variants [--force]
+
+Without --force only images that have no variants or no metadata yet are processed.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import select, exists, or_
+
+from app.database.db import async_session_maker
+from app.database.models import ProductCardImage, ProductCardImageVariant
+from app.database.crud.product_card_image_variants import generate_image_variants
+
+
+async def backfill_image_variants(force: bool = False) -> int:
+    async with async_session_maker() as session:
+        query = select(ProductCardImage.id, ProductCardImage.url).order_by(ProductCardImage.id)
+        if not force:
+            query = query.where(or_(
+                ~exists().where(ProductCardImageVariant.image_id == ProductCardImage.id),
+                ProductCardImage.width.is_(None),
+            ))
+        images = (await session.execute(query)).all()
+
+        for image_id, url in images:
+            variants = await generate_image_variants(session, image_id, url)
+            print(f"image {image_id} ({url}): {len(variants)} variants")
+    return len(images)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate resized WebP/JPEG variants for existing images")
+    parser.add_argument("--force", action="store_true", help="regenerate variants for every image")
+    args = parser.parse_args()
+
+    processed = asyncio.run(backfill_image_variants(force=args.force))
+    print(f"Processed {processed} images")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Static pre-render of the catalog.
+
+Renders every product page (/products/{lang}/{product_code}) to
+<out>/products/{lang}/{product_code}.html with the same template and helpers
+as product_page, so nginx can serve catalog reads without uvicorn or Postgres.
+
+Incremental: <out>/manifest.json stores the content version of every page
+(latest updated_at of product, card and images plus the image count, built by one
+SQL expression for both the listing and the page query, so it does not depend on
+the session TimeZone) and the template version; only changed pages are re-rendered,
+pages of deleted products/cards are removed.
+
+    python -m app.cli.prerender [--out prerendered] [--force]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+
+from app.core.static_manifest import static_manifest
+from app.database.db import async_session_maker
+from app.database.crud.product_with_cards import get_product_with_card_by_code, list_product_page_versions
+from app.web.routes.product import render_product_page
+from app.web.templating import TEMPLATE_VERSION
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def page_path(out_dir: Path, product_code: str, lang: str) -> Path:
+    return out_dir / "products" / lang / f"{product_code}.html"
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    """Пишем во временный файл и переименовываем: nginx никогда не отдаст недописанную страницу."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def load_manifest(out_dir: Path) -> dict:
+    try:
+        return json.loads((out_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+async def prerender_catalog(out_dir: Path, force: bool = False) -> dict:
+    """
+    Рендерит изменившиеся страницы и возвращает статистику {"rendered", "removed", "unchanged"}.
+    """
+    manifest = load_manifest(out_dir)
+    previous_pages: dict = manifest.get("pages", {})
+    if manifest.get("template_version") != TEMPLATE_VERSION:
+        force = True
+
+    stats = {"rendered": 0, "removed": 0, "unchanged": 0}
+    pages: dict = {}
+
+    async with async_session_maker() as session:
+        versions = await list_product_page_versions(session)
+
+        for (product_code, lang), version in sorted(versions.items()):
+            key = f"{lang}/{product_code}"
+            path = page_path(out_dir, product_code, lang)
+            if not force and previous_pages.get(key) == version and path.exists():
+                pages[key] = version
+                stats["unchanged"] += 1
+                continue
+
+            product_data = await get_product_with_card_by_code(session, product_code, lang)
+            if product_data is None:
+                # удалено между двумя запросами
+                continue
+            _write_atomic(path, render_product_page(product_data, lang))
+            # версия берётся из загруженных данных, а не из первого запроса
+            pages[key] = product_data.content_version()
+            stats["rendered"] += 1
+
+    for key in previous_pages.keys() - pages.keys():
+        lang, product_code = key.split("/", 1)
+        page_path(out_dir, product_code, lang).unlink(missing_ok=True)
+        stats["removed"] += 1
+
+    _write_atomic(
+        out_dir / MANIFEST_NAME,
+        json.dumps({"template_version": TEMPLATE_VERSION, "pages": pages}, indent=2, sort_keys=True),
+    )
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pre-render product pages to static HTML for nginx")
+    parser.add_argument("--out", default="prerendered", help="output directory served by nginx")
+    parser.add_argument("--force", action="store_true", help="re-render every page")
+    args = parser.parse_args()
+
+    # hashed asset URLs in the pages need the full manifest
+    static_manifest.build()
+    stats = asyncio.run(prerender_catalog(Path(args.out), force=args.force))
+    print(f"Pre-render complete: {stats['rendered']} rendered, {stats['unchanged']} unchanged, "
+          f"{stats['removed']} removed")
+
+
+if __name__ == "__main__":
+    main()
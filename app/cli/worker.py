@@ -0,0 +1,59 @@
+"""
+Standalone worker for the durable job queue (table jobs).
+
+    python -m app.cli.worker [--concurrency N] [--kind KIND ...]
+
+Runs alongside the web app or instead of the in-process worker (JOBS_RUN_IN_PROCESS=false).
+Any number of worker processes can run at once: jobs are claimed with FOR UPDATE SKIP LOCKED,
+so each job goes to exactly one of them. Stops on SIGINT / SIGTERM; jobs interrupted
+mid-batch are picked up again once their lease (JOBS_LEASE_SECONDS) expires.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+# job handlers register themselves on import
+import app.core.guide_emails  # noqa: F401
+from app.core.config import settings
+from app.core.guide_emails import guide_email_sender
+from app.core.job_queue import JOB_HANDLERS, JobWorker
+
+
+async def run_worker(concurrency: int, kinds: list[str] | None = None) -> None:
+    handlers = {kind: handler for kind, handler in JOB_HANDLERS.items() if not kinds or kind in kinds}
+    if not handlers:
+        raise SystemExit(f"No job handlers for {kinds}; registered: {sorted(JOB_HANDLERS)}")
+
+    worker = JobWorker(
+        concurrency=concurrency,
+        poll_interval=settings.JOBS_POLL_INTERVAL_SECONDS,
+        handlers=handlers,
+    )
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker.start()
+    print(f"Job worker started: {concurrency} loops, kinds {sorted(handlers)}")
+    try:
+        await stop.wait()
+    finally:
+        await worker.stop()
+        await guide_email_sender.close()
+    print(f"Job worker stopped: {worker.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process jobs from the durable job queue")
+    parser.add_argument("--concurrency", type=int, default=settings.JOBS_CONCURRENCY, help="worker loops in this process")
+    parser.add_argument("--kind", action="append", dest="kinds", help="only process jobs of this kind (repeatable)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run_worker(args.concurrency, args.kinds))
+
+
+if __name__ == "__main__":
+    main()
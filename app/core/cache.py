@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from app.core.prerender_refresh import prerender_refresher
+
+
+class RenderedPageCache:
+    """
+    Кэш отрендеренных страниц продукта (HTML вместе с валидаторами ETag / Last-Modified).
+
+    Ключ — (product_code, lang, content_version), где content_version строится
+    из последнего updated_at продукта, карточки и изображений.
+    Для каждой пары (product_code, lang) хранится только последняя отрендеренная версия.
+    Кэш свой у каждого процесса, а CRUD-модули каталога сбрасывают его только в процессе,
+    выполнившем запись, — поэтому перед отдачей страницы маршрут сверяет версию
+    с БД (get_product_page_version) и рендерит заново, если она сменилась.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._versions: dict[Tuple[str, str], str] = {}
+        self._pages: "OrderedDict[Tuple[str, str, str], Any]" = OrderedDict()
+
+    def get(self, product_code: str, lang: str) -> Optional[Tuple[str, Any]]:
+        """
+        Возвращает (version, page) для актуальной версии страницы или None.
+        """
+        with self._lock:
+            version = self._versions.get((product_code, lang))
+            if version is None:
+                return None
+            key = (product_code, lang, version)
+            page = self._pages.get(key)
+            if page is None:
+                return None
+            self._pages.move_to_end(key)
+            return version, page
+
+    def put(self, product_code: str, lang: str, version: str, page: Any) -> None:
+        with self._lock:
+            old_version = self._versions.get((product_code, lang))
+            if old_version is not None and old_version != version:
+                self._pages.pop((product_code, lang, old_version), None)
+            self._versions[(product_code, lang)] = version
+            self._pages[(product_code, lang, version)] = page
+            self._pages.move_to_end((product_code, lang, version))
+            while len(self._pages) > self.maxsize:
+                (code, page_lang, _), _ = self._pages.popitem(last=False)
+                self._versions.pop((code, page_lang), None)
+
+    def clear(self) -> None:
+        """
+        Сбрасывает все страницы. Каталог меняется редко, поэтому при любой записи
+        в products / product_card / product_card_images проще сбросить всё целиком.
+        """
+        with self._lock:
+            self._versions.clear()
+            self._pages.clear()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+
+product_page_cache = RenderedPageCache()
+
+
+def invalidate_catalog_pages() -> None:
+    """
+    Каталог изменился: сбрасывает кэш страниц этого процесса
+    и запускает обновление pre-render страниц, которые отдаёт nginx.
+    """
+    product_page_cache.clear()
+    prerender_refresher.schedule()
@@ -0,0 +1,111 @@
+import time
+from collections import deque
+from typing import Any, Dict
+
+
+class CircuitOpenError(Exception):
+    """Вызов отклонён без обращения к провайдеру: breaker открыт."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Circuit is open, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker для внешнего сервиса.
+
+    closed    — вызовы проходят; открывается после failure_threshold ошибок подряд
+                или при доле таймаутов >= timeout_rate среди последних window вызовов;
+    open      — вызовы сразу отклоняются (CircuitOpenError) в течение open_seconds;
+    half_open — пропускается один пробный вызов: успех закрывает breaker, ошибка открывает снова.
+
+    before_call возвращает поколение (номер периода closed/open), результат передаётся обратно
+    в record_success / record_failure / release. Поколение меняется при каждом открытии и закрытии,
+    поэтому запоздавший результат вызова, пропущенного до текущего периода, состояние не меняет:
+    успех долгого вызова, начатого ещё до открытия, не закрывает breaker вместо пробного вызова.
+    Используется из одного event loop, блокировки не нужны.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, window: int, timeout_rate: float, open_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.timeout_rate = timeout_rate
+        self.open_seconds = open_seconds
+        self._window: "deque[bool]" = deque(maxlen=window)  # True — вызов завершился таймаутом
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._generation = 0
+        self.opened_count = 0
+        self.rejected_count = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            return self.HALF_OPEN
+        return self._state
+
+    def before_call(self) -> int:
+        """Пропускает вызов (возвращает поколение) или отклоняет его (CircuitOpenError)."""
+        state = self.state
+        if state == self.CLOSED:
+            return self._generation
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return self._generation
+        self.rejected_count += 1
+        raise CircuitOpenError(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)))
+
+    def record_success(self, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._window.append(False)
+        self._consecutive_failures = 0
+        if self._state != self.CLOSED:
+            self._state = self.CLOSED
+            self._probe_in_flight = False
+            self._window.clear()
+            self._generation += 1
+
+    def record_failure(self, generation: int, timeout: bool = False) -> None:
+        if generation != self._generation:
+            return
+        self._window.append(timeout)
+        self._consecutive_failures += 1
+        if self._state == self.HALF_OPEN:
+            self._open()
+            return
+        timeouts = sum(self._window)
+        window_full = len(self._window) == self._window.maxlen
+        if self._consecutive_failures >= self.failure_threshold or (
+            window_full and timeouts / len(self._window) >= self.timeout_rate
+        ):
+            self._open()
+
+    def release(self, generation: int) -> None:
+        """Вызов прерван без результата (отмена): пробный слот half_open освобождается."""
+        if generation == self._generation:
+            self._probe_in_flight = False
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._generation += 1
+        self.opened_count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        window = list(self._window)
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "timeout_rate": round(sum(window) / len(window), 3) if window else 0.0,
+            "opened_count": self.opened_count,
+            "rejected_count": self.rejected_count,
+        }
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from pydantic import Field, computed_field
+from pydantic import Field, computed_field, model_validator
 from passlib.context import CryptContext
 from typing import ClassVar
 from enum import Enum
@@ -19,6 +19,10 @@ class Languages(str, Enum):
     pl = "pl"
 
 
+# Ключ по умолчанию лежит в публичном репозитории — секретом не является
+DEV_SECRET_KEY = 'wispcwtoypfwknhop'
+
+
 class Settings(BaseSettings):
     TITLE: ClassVar[str] = "SnovaTour API"
     DESCRIPTION: ClassVar[str] = "Simple web app for selling tour guides"
@@ -36,11 +40,108 @@ class Settings(BaseSettings):
     DB_PORT: int = Field(..., env="DB_PORT")
     DB_NAME: str = Field(..., env="DB_NAME")
     REVOLUT_URL: str = Field(..., env="REVOLUT_URL")
-    SECRET_KEY: str = Field(env="JWT_SECRET_KEY", default='wispcwtoypfwknhop')
+    SECRET_KEY: str = Field(env="JWT_SECRET_KEY", default=DEV_SECRET_KEY)
     SECRET_API_KEY: str = Field(..., env="SECRET_API_KEY")
     #SECRET_API_KEY: str = Field(..., validation_alias="PAYMENT_KEY")
     MY_URL: str = Field(default="localhost:8001", env="MY_URL")
 
+    # On-demand image resize (/img/{width}/{path})
+    IMAGE_CACHE_DIR: str = Field(default="cache/img", env="IMAGE_CACHE_DIR")
+    IMAGE_CACHE_MAX_BYTES: int = Field(default=512 * 1024 * 1024, env="IMAGE_CACHE_MAX_BYTES")
+    IMAGE_RESIZE_WORKERS: int = Field(default=2, env="IMAGE_RESIZE_WORKERS")
+    # Загрузки больше порогов попадают в лог как предупреждение
+    IMAGE_OVERSIZED_BYTES: int = Field(default=1024 * 1024, env="IMAGE_OVERSIZED_BYTES")
+    IMAGE_OVERSIZED_WIDTH: int = Field(default=3000, env="IMAGE_OVERSIZED_WIDTH")
+
+    # Статические страницы каталога для nginx (app.cli.prerender); пусто — не обновлять после записи
+    PRERENDER_DIR: str = Field(default="", env="PRERENDER_DIR")
+
+    # Скачивание файлов: передачу байтов отдаём nginx (internal location, см. nginx/nginx.conf)
+    USE_X_ACCEL_REDIRECT: bool = Field(default=False, env="USE_X_ACCEL_REDIRECT")
+    X_ACCEL_REDIRECT_PREFIX: str = Field(default="/_protected/", env="X_ACCEL_REDIRECT_PREFIX")
+    # Подписанные ссылки на скачивание (HMAC): ключ задаётся явно, без запасного значения
+    DOWNLOAD_LINK_SECRET: str = Field(..., env="DOWNLOAD_LINK_SECRET")
+    DOWNLOAD_LINK_TTL_SECONDS: int = Field(default=24 * 3600, env="DOWNLOAD_LINK_TTL_SECONDS")
+    # Срок действия округляется вверх до шага: ссылка (и ETag страницы "спасибо") стабильна в пределах шага
+    DOWNLOAD_LINK_EXPIRY_STEP_SECONDS: int = Field(default=3600, env="DOWNLOAD_LINK_EXPIRY_STEP_SECONDS")
+
+    # Общий HTTP-клиент платёжного провайдера (app.core.payment_client)
+    PAYMENT_HTTP2: bool = Field(default=True, env="PAYMENT_HTTP2")
+    PAYMENT_MAX_CONNECTIONS: int = Field(default=20, env="PAYMENT_MAX_CONNECTIONS")
+    PAYMENT_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=10, env="PAYMENT_MAX_KEEPALIVE_CONNECTIONS")
+    PAYMENT_KEEPALIVE_EXPIRY: float = Field(default=60.0, env="PAYMENT_KEEPALIVE_EXPIRY")
+    PAYMENT_CONNECT_TIMEOUT: float = Field(default=3.0, env="PAYMENT_CONNECT_TIMEOUT")
+    PAYMENT_READ_TIMEOUT: float = Field(default=15.0, env="PAYMENT_READ_TIMEOUT")
+    PAYMENT_WRITE_TIMEOUT: float = Field(default=5.0, env="PAYMENT_WRITE_TIMEOUT")
+    PAYMENT_POOL_TIMEOUT: float = Field(default=2.0, env="PAYMENT_POOL_TIMEOUT")
+    # Защита от деградации провайдера: лимит запросов в полёте, ретраи, circuit breaker
+    PAYMENT_MAX_IN_FLIGHT: int = Field(default=20, env="PAYMENT_MAX_IN_FLIGHT")
+    PAYMENT_IN_FLIGHT_WAIT_SECONDS: float = Field(default=1.0, env="PAYMENT_IN_FLIGHT_WAIT_SECONDS")
+    PAYMENT_MAX_RETRIES: int = Field(default=2, env="PAYMENT_MAX_RETRIES")
+    PAYMENT_RETRY_BACKOFF_SECONDS: float = Field(default=0.2, env="PAYMENT_RETRY_BACKOFF_SECONDS")
+    PAYMENT_BREAKER_FAILURES: int = Field(default=5, env="PAYMENT_BREAKER_FAILURES")
+    PAYMENT_BREAKER_WINDOW: int = Field(default=20, env="PAYMENT_BREAKER_WINDOW")
+    PAYMENT_BREAKER_TIMEOUT_RATE: float = Field(default=0.5, env="PAYMENT_BREAKER_TIMEOUT_RATE")
+    PAYMENT_BREAKER_OPEN_SECONDS: float = Field(default=30.0, env="PAYMENT_BREAKER_OPEN_SECONDS")
+
+    # Webhook провайдера: секрет подписи (Revolut "wsk_..."), допуск по времени, пакетная запись
+    REVOLUT_WEBHOOK_SECRET: str = Field(default="", env="REVOLUT_WEBHOOK_SECRET")
+    WEBHOOK_TIMESTAMP_TOLERANCE_SECONDS: int = Field(default=300, env="WEBHOOK_TIMESTAMP_TOLERANCE_SECONDS")
+    WEBHOOK_QUEUE_MAXSIZE: int = Field(default=10000, env="WEBHOOK_QUEUE_MAXSIZE")
+    WEBHOOK_BATCH_SIZE: int = Field(default=200, env="WEBHOOK_BATCH_SIZE")
+    WEBHOOK_BATCH_WAIT_SECONDS: float = Field(default=0.5, env="WEBHOOK_BATCH_WAIT_SECONDS")
+
+    # Сверка статусов незавершённых заказов с провайдером (потерянные webhook)
+    RECONCILE_ENABLED: bool = Field(default=True, env="RECONCILE_ENABLED")
+    RECONCILE_INTERVAL_SECONDS: int = Field(default=300, env="RECONCILE_INTERVAL_SECONDS")
+    RECONCILE_STALE_AFTER_SECONDS: int = Field(default=900, env="RECONCILE_STALE_AFTER_SECONDS")
+    # брошенные корзины: заказы старше этого не сверяются
+    RECONCILE_MAX_AGE_HOURS: int = Field(default=72, env="RECONCILE_MAX_AGE_HOURS")
+    RECONCILE_PAGE_SIZE: int = Field(default=200, env="RECONCILE_PAGE_SIZE")
+    RECONCILE_MAX_PAGES_PER_RUN: int = Field(default=10, env="RECONCILE_MAX_PAGES_PER_RUN")
+    RECONCILE_CONCURRENCY: int = Field(default=5, env="RECONCILE_CONCURRENCY")
+
+    # Idempotency-Key для POST /api/v1/order (таблица idempotency_keys): сколько хранится
+    # первый ответ и через сколько освобождается ключ запроса, чей процесс упал
+    IDEMPOTENCY_TTL_SECONDS: int = Field(default=600, env="IDEMPOTENCY_TTL_SECONDS")
+    IDEMPOTENCY_LOCK_SECONDS: int = Field(default=60, env="IDEMPOTENCY_LOCK_SECONDS")
+
+    # Очередь фоновых задач в Postgres (таблица jobs); воркер в процессе приложения
+    # и/или отдельно: python -m app.cli.worker
+    JOBS_RUN_IN_PROCESS: bool = Field(default=True, env="JOBS_RUN_IN_PROCESS")
+    JOBS_CONCURRENCY: int = Field(default=4, env="JOBS_CONCURRENCY")
+    JOBS_POLL_INTERVAL_SECONDS: float = Field(default=1.0, env="JOBS_POLL_INTERVAL_SECONDS")
+    JOBS_LEASE_SECONDS: int = Field(default=300, env="JOBS_LEASE_SECONDS")
+    JOBS_MAX_ATTEMPTS: int = Field(default=5, env="JOBS_MAX_ATTEMPTS")
+    JOBS_RETRY_BACKOFF_SECONDS: float = Field(default=10.0, env="JOBS_RETRY_BACKOFF_SECONDS")
+
+    # Письма с путеводителем после оплаты: включаются явно, вместе с SMTP_HOST
+    # (локально — python -m devtools.smtp_sink и EMAIL_ENABLED=true SMTP_HOST=localhost)
+    EMAIL_ENABLED: bool = Field(default=False, env="EMAIL_ENABLED")
+    EMAIL_FROM: str = Field(default="SnovaTour <guides@localhost>", env="EMAIL_FROM")
+    EMAIL_BATCH_SIZE: int = Field(default=50, env="EMAIL_BATCH_SIZE")
+    EMAIL_MAX_ATTEMPTS: int = Field(default=6, env="EMAIL_MAX_ATTEMPTS")
+    EMAIL_RETRY_BACKOFF_SECONDS: float = Field(default=30.0, env="EMAIL_RETRY_BACKOFF_SECONDS")
+    EMAIL_BODY_CACHE_SIZE: int = Field(default=256, env="EMAIL_BODY_CACHE_SIZE")
+    SMTP_HOST: str = Field(default="", env="SMTP_HOST")
+    SMTP_PORT: int = Field(default=1025, env="SMTP_PORT")
+    SMTP_USERNAME: str = Field(default="", env="SMTP_USERNAME")
+    SMTP_PASSWORD: str = Field(default="", env="SMTP_PASSWORD")
+    SMTP_STARTTLS: bool = Field(default=False, env="SMTP_STARTTLS")
+    SMTP_USE_SSL: bool = Field(default=False, env="SMTP_USE_SSL")
+    # пул SMTP-соединений процесса, общий для всех циклов JobWorker
+    SMTP_CONNECTIONS: int = Field(default=2, env="SMTP_CONNECTIONS")
+    SMTP_TIMEOUT_SECONDS: float = Field(default=10.0, env="SMTP_TIMEOUT_SECONDS")
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = Field(default=100, env="SMTP_MAX_MESSAGES_PER_CONNECTION")
+
+    # Выгрузка заказов: строк за одно чтение серверного курсора (и в одном куске ответа)
+    ORDER_EXPORT_BATCH_SIZE: int = Field(default=1000, env="ORDER_EXPORT_BATCH_SIZE")
+
+    # Аналитика продаж: orders.updated_at = now() начала транзакции, поэтому поздно закоммиченные
+    # заказы могут оказаться "до" watermark — окно перекрытия пересчитывается повторно
+    ANALYTICS_WATERMARK_OVERLAP_SECONDS: int = Field(default=300, env="ANALYTICS_WATERMARK_OVERLAP_SECONDS")
+    ANALYTICS_MAX_DAYS: int = Field(default=366, env="ANALYTICS_MAX_DAYS")
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self._crypt_context = CryptContext(
@@ -48,6 +149,20 @@ class Settings(BaseSettings):
             deprecated=self.bcrypt_deprecated,
         )
 
+    @model_validator(mode="after")
+    def check_download_link_secret(self):
+        # с известным ключом любой может подписать ссылку на платный файл
+        if not self.DOWNLOAD_LINK_SECRET.strip() or self.DOWNLOAD_LINK_SECRET == DEV_SECRET_KEY:
+            raise ValueError("DOWNLOAD_LINK_SECRET must be set to a private value")
+        return self
+
+    @model_validator(mode="after")
+    def check_email_settings(self):
+        # иначе оплаченные заказы копят задачи писем, которые уходят в никуда
+        if self.EMAIL_ENABLED and not self.SMTP_HOST:
+            raise ValueError("EMAIL_ENABLED requires SMTP_HOST")
+        return self
+
     @computed_field
     @property
     def DATABASE_URL(self) -> str:
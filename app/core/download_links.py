@@ -0,0 +1,75 @@
+import base64
+import hashlib
+import hmac
+import time
+from typing import NamedTuple, Optional
+from urllib.parse import urlencode
+
+from app.core.config import settings
+from app.core.utils import build_download_link
+
+
+class InvalidDownloadLink(ValueError):
+    """Подпись ссылки не совпадает (ссылка подделана или без подписи)."""
+
+
+class ExpiredDownloadLink(InvalidDownloadLink):
+    """Подпись верна, но срок действия ссылки истёк."""
+
+
+class SignedDownloadLink(NamedTuple):
+    url: str
+    expires: int
+
+
+def _secret() -> bytes:
+    return settings.DOWNLOAD_LINK_SECRET.encode("utf-8")
+
+
+def _signature(file_id: int, order_id: str, expires: int) -> str:
+    message = f"{file_id}:{order_id}:{expires}".encode("utf-8")
+    digest = hmac.new(_secret(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def link_expiry(now: Optional[float] = None) -> int:
+    """
+    Момент истечения ссылки: now + TTL, округлённый вверх до DOWNLOAD_LINK_EXPIRY_STEP_SECONDS.
+    """
+    now = time.time() if now is None else now
+    step = max(1, settings.DOWNLOAD_LINK_EXPIRY_STEP_SECONDS)
+    deadline = int(now) + settings.DOWNLOAD_LINK_TTL_SECONDS
+    return -(-deadline // step) * step
+
+
+def sign_download_link(file_id: int, order_id: str, now: Optional[float] = None) -> SignedDownloadLink:
+    """
+    Ссылка на скачивание с HMAC-подписью (file_id, order_id, expires):
+    /api/v1/download/{file_id}?order=...&expires=...&signature=...
+    Подписывать только для оплаченного заказа (см. страницу "спасибо", письмо с путеводителем).
+    """
+    if not order_id:
+        raise ValueError("Download link must be signed for an order")
+    expires = link_expiry(now)
+    query = {"order": order_id, "expires": expires, "signature": _signature(file_id, order_id, expires)}
+    return SignedDownloadLink(url=f"{build_download_link(file_id)}?{urlencode(query)}", expires=expires)
+
+
+def verify_download_link(
+    file_id: int,
+    order_id: Optional[str],
+    expires: Optional[int],
+    signature: Optional[str],
+    now: Optional[float] = None,
+) -> None:
+    """
+    Проверка подписи без обращения к БД.
+    InvalidDownloadLink — нет заказа или подписи, подпись не совпадает; ExpiredDownloadLink — срок истёк.
+    """
+    if not order_id or expires is None or not signature:
+        raise InvalidDownloadLink("Download link is not signed")
+    expected = _signature(file_id, order_id, expires)
+    if not hmac.compare_digest(expected, signature):
+        raise InvalidDownloadLink("Download link signature mismatch")
+    if (time.time() if now is None else now) >= expires:
+        raise ExpiredDownloadLink("Download link expired")
@@ -0,0 +1,148 @@
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from app.core.utils import make_etag
+
+# ProductFile.file_link хранит путь относительно app/web, например: "static/files/paris_ru.pdf"
+DOWNLOAD_ROOT = Path("app/web").resolve()
+
+
+def resolve_file_link(file_link: str) -> Optional[Path]:
+    """
+    Абсолютный путь файла внутри DOWNLOAD_ROOT; None при выходе за его пределы (../).
+    """
+    full_path = (DOWNLOAD_ROOT / file_link.lstrip("/")).resolve()
+    if not full_path.is_relative_to(DOWNLOAD_ROOT):
+        return None
+    return full_path
+
+
+class IndexedFile(NamedTuple):
+    file_id: int
+    product_id: int
+    product_code: str
+    lang: str
+    file_link: str
+    description: Optional[str]
+    description_html: Optional[str]
+    updated_at: datetime
+    product_updated_at: datetime
+    # None — файла нет на диске (или file_link выходит за DOWNLOAD_ROOT)
+    path: Optional[Path]
+    stat: Optional[os.stat_result]
+    etag: Optional[str]
+
+    @property
+    def size(self) -> Optional[int]:
+        return self.stat.st_size if self.stat is not None else None
+
+    @property
+    def mtime(self) -> Optional[float]:
+        return self.stat.st_mtime if self.stat is not None else None
+
+
+def _stat_file(file_id: int, file_link: str) -> Tuple[Optional[Path], Optional[os.stat_result], Optional[str]]:
+    """(path, stat, etag) файла; (None, None, None) — файла нет или file_link выходит за DOWNLOAD_ROOT."""
+    path = resolve_file_link(file_link)
+    if path is None:
+        return None, None, None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None, None, None
+    return path, stat, make_etag(file_id, stat.st_size, stat.st_mtime_ns)
+
+
+def build_indexed_file(
+    file_id: int,
+    product_id: int,
+    product_code: str,
+    lang: str,
+    file_link: str,
+    description: Optional[str],
+    description_html: Optional[str],
+    updated_at: datetime,
+    product_updated_at: datetime,
+) -> IndexedFile:
+    """
+    Запись индекса: путь разрешается и stat выполняется только при загрузке / перечитывании
+    записи в CRUD (промах, сменившаяся версия в БД, ошибка отдачи файла).
+    """
+    path, stat, etag = _stat_file(file_id, file_link)
+    return IndexedFile(
+        file_id=file_id,
+        product_id=product_id,
+        product_code=product_code,
+        lang=lang,
+        file_link=file_link,
+        description=description,
+        description_html=description_html,
+        updated_at=updated_at,
+        product_updated_at=product_updated_at,
+        path=path,
+        stat=stat,
+        etag=etag,
+    )
+
+
+class ProductFileIndex:
+    """
+    Индекс файлов продуктов в памяти процесса: по id файла и по (product_code, lang).
+
+    Загружается при старте (load_product_file_index) и обновляется CRUD-модулями
+    product_files / product при каждой записи. Индекс свой у каждого процесса, поэтому
+    чтение сверяет запись с БД по версии (updated_at файла и продукта, get_indexed_file)
+    и перечитывает её, если версия сменилась; stat при скачивании не выполняется.
+    Файл, заменённый на диске, нужно сохранить и через API файлов (новый updated_at);
+    файл, который не удалось отдать, удаляется из индекса (IndexedFileResponse),
+    отсутствовавший файл перепроверяется при каждом запросе и начинает отдаваться,
+    как только появится.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, IndexedFile] = {}
+        self._by_product: Dict[Tuple[str, str], int] = {}
+        self.loaded = False
+
+    def replace_all(self, entries: Iterable[IndexedFile]) -> None:
+        with self._lock:
+            self._by_id = {entry.file_id: entry for entry in entries}
+            self._by_product = {(entry.product_code, entry.lang): entry.file_id for entry in self._by_id.values()}
+            self.loaded = True
+
+    def put(self, entry: IndexedFile) -> None:
+        with self._lock:
+            self._remove(entry.file_id)
+            self._by_id[entry.file_id] = entry
+            self._by_product[(entry.product_code, entry.lang)] = entry.file_id
+
+    def _remove(self, file_id: int) -> None:
+        entry = self._by_id.pop(file_id, None)
+        if entry is not None and self._by_product.get((entry.product_code, entry.lang)) == file_id:
+            del self._by_product[(entry.product_code, entry.lang)]
+
+    def remove(self, file_id: int) -> None:
+        with self._lock:
+            self._remove(file_id)
+
+    def remove_product(self, product_id: int) -> None:
+        with self._lock:
+            for file_id in [e.file_id for e in self._by_id.values() if e.product_id == product_id]:
+                self._remove(file_id)
+
+    def get(self, file_id: int) -> Optional[IndexedFile]:
+        return self._by_id.get(file_id)
+
+    def get_by_product(self, product_code: str, lang: str) -> Optional[IndexedFile]:
+        file_id = self._by_product.get((product_code, lang))
+        return self._by_id.get(file_id) if file_id is not None else None
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+product_file_index = ProductFileIndex()
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from email.message import EmailMessage
+from email.utils import make_msgid
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings, Languages
+from app.core.download_links import sign_download_link
+from app.core.job_queue import PermanentJobError, job_handler
+from app.core.mailer import DeliveryError, SmtpMailer
+from app.core.utils import build_download_link, build_thank_you_link, DOWNLOAD_LINK_PLACEHOLDER
+from app.database.db import async_session_maker
+from app.database.crud.jobs import JOB_GUIDE_EMAIL
+from app.database.crud.product_files import get_indexed_file_by_product
+from app.schemas import JobRead
+from app.web.templating import templates
+
+logger = logging.getLogger(__name__)
+
+# Плейсхолдер ссылки в закэшированном теле письма: ссылка подписывается для каждого заказа
+LINK_TOKEN = "__GUIDE_DOWNLOAD_LINK__"
+
+
+class GuideEmail(NamedTuple):
+    order_id: str
+    email: str
+    product_code: str
+    lang: str
+    # None — заказ создан до checkout_ref (или задача поставлена раньше): в письме подписанная ссылка
+    checkout_ref: Optional[str] = None
+
+
+class RenderedGuideEmail(NamedTuple):
+    subject: str
+    text: str
+    html: str
+
+
+class GuideEmailRenderer:
+    """
+    Тело письма рендерится один раз на (product_code, lang) и версию файла продукта
+    (file_id, updated_at) — шаблон, Markdown описания и т.п. не пересчитываются на каждое письмо.
+    В кэше тело хранится с плейсхолдером ссылки; для письма подставляется ссылка на страницу
+    "спасибо" заказа (по checkout_ref): письмо читают и через неделю, а страница при каждом
+    открытии выдаёт свежую подписанную ссылку на файл. Для заказа без checkout_ref —
+    подписанная ссылка на скачивание с ограниченным сроком.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[Tuple, RenderedGuideEmail]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _render(file, lang: str, order_page: bool) -> RenderedGuideEmail:
+        template = templates.env.get_template("email/guide.html")
+        plain_link = build_download_link(file.file_id)
+        description = (file.description or "").replace(DOWNLOAD_LINK_PLACEHOLDER, LINK_TOKEN)
+        description_html = (file.description_html or "").replace(f'href="{plain_link}"', f'href="{LINK_TOKEN}"')
+        module = template.make_module({
+            "lang": lang,
+            "link": LINK_TOKEN,
+            "order_page": order_page,
+            "description": description,
+            "description_html": description_html,
+        })
+        return RenderedGuideEmail(
+            subject=str(module.subject()).strip(),
+            text=str(module.text()).strip(),
+            html=str(module.html()).strip(),
+        )
+
+    async def message(self, job: GuideEmail) -> Optional[EmailMessage]:
+        """Готовое письмо для заказа или None — для продукта и языка нет файла."""
+        async with async_session_maker() as session:
+            file = await get_indexed_file_by_product(session, job.product_code, Languages(job.lang))
+        if file is None:
+            return None
+
+        order_page = job.checkout_ref is not None
+        key = (job.product_code, job.lang, file.file_id, file.updated_at, order_page)
+        rendered = self._cache.get(key)
+        if rendered is None:
+            self.misses += 1
+            rendered = self._render(file, job.lang, order_page)
+            self._cache[key] = rendered
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+
+        if order_page:
+            link = settings.MY_URL + build_thank_you_link(job.product_code, job.lang, job.checkout_ref)
+        else:
+            link = settings.MY_URL + sign_download_link(file.file_id, job.order_id).url
+        message = EmailMessage()
+        message["Subject"] = rendered.subject
+        message["From"] = settings.EMAIL_FROM
+        message["To"] = job.email
+        message["Message-ID"] = make_msgid(domain="snovatour")
+        message.set_content(rendered.text.replace(LINK_TOKEN, link))
+        message.add_alternative(rendered.html.replace(LINK_TOKEN, link), subtype="html")
+        return message
+
+
+class GuideEmailSender:
+    """
+    Отправка путеводителей покупателям — обработчик задач guide_email из таблицы jobs.
+
+    - задача ставится в той же транзакции, где заказ переходит в оплаченное состояние
+      (apply_order_states), поэтому письмо не теряется при перезапуске и не дублируется;
+    - пачка до EMAIL_BATCH_SIZE задач уходит по одному SMTP-соединению (SmtpMailer);
+      соединения берутся из пула на SMTP_CONNECTIONS штук и переиспользуются между пачками;
+    - временная ошибка по адресату (4xx, обрыв) — повтор задачи с экспоненциальной задержкой
+      (JobWorker), постоянная (5xx) или нет файла продукта — задача сразу уходит в dead.
+    """
+
+    def __init__(self, connections: int):
+        self.connections = connections
+        self.renderer = GuideEmailRenderer(maxsize=settings.EMAIL_BODY_CACHE_SIZE)
+        self._mailers: List[SmtpMailer] = []
+        self._idle: Optional["asyncio.Queue[SmtpMailer]"] = None
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def _pool(self) -> "asyncio.Queue[SmtpMailer]":
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for number in range(self.connections):
+                mailer = SmtpMailer(name=f"smtp-{number}")
+                self._mailers.append(mailer)
+                self._idle.put_nowait(mailer)
+        return self._idle
+
+    def _failed(self, job: GuideEmail, error: Exception) -> Exception:
+        if isinstance(error, DeliveryError) and error.temporary:
+            self.retried += 1
+            logger.warning("Guide email for order %s will be retried: %s", job.order_id, error)
+            return error
+        self.failed += 1
+        logger.error("Guide email for order %s is not sent: %s", job.order_id, error)
+        return PermanentJobError(str(error))
+
+    async def send(self, jobs: List[JobRead]) -> List[Optional[Exception]]:
+        results: List[Optional[Exception]] = [None] * len(jobs)
+        pending, messages = [], []
+        for index, job in enumerate(jobs):
+            email = GuideEmail(**job.payload)
+            try:
+                message = await self.renderer.message(email)
+            except Exception as exc:
+                logger.exception("Failed to render guide email for order %s", email.order_id)
+                results[index] = exc
+                continue
+            if message is None:
+                results[index] = self._failed(
+                    email, PermanentJobError(f"no file for {email.product_code}/{email.lang}")
+                )
+                continue
+            pending.append((index, email))
+            messages.append(message)
+        if not messages:
+            return results
+
+        pool = self._pool()
+        mailer = await pool.get()
+        try:
+            errors = await mailer.send_batch(messages)
+        finally:
+            pool.put_nowait(mailer)
+        for (index, email), error in zip(pending, errors):
+            if error is None:
+                self.sent += 1
+            else:
+                results[index] = self._failed(email, error)
+        return results
+
+    async def close(self) -> None:
+        await asyncio.gather(*(mailer.close() for mailer in self._mailers))
+        self._mailers, self._idle = [], None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "smtp_connections_opened": sum(mailer.connections_opened for mailer in self._mailers),
+            "body_cache_hits": self.renderer.hits,
+            "body_cache_misses": self.renderer.misses,
+        }
+
+
+guide_email_sender = GuideEmailSender(connections=settings.SMTP_CONNECTIONS)
+
+
+if settings.EMAIL_ENABLED:
+    @job_handler(
+        JOB_GUIDE_EMAIL,
+        batch_size=settings.EMAIL_BATCH_SIZE,
+        backoff_seconds=settings.EMAIL_RETRY_BACKOFF_SECONDS,
+    )
+    async def send_guide_emails(jobs: List[JobRead]) -> List[Optional[Exception]]:
+        return await guide_email_sender.send(jobs)
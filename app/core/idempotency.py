@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.database.db import async_session_maker
+from app.database.crud.idempotency import (
+    claim_idempotency_key,
+    delete_expired_idempotency_keys,
+    get_idempotency_key,
+    release_idempotency_key,
+    store_idempotent_response,
+)
+
+# как часто процесс удаляет истёкшие ключи из таблицы
+PURGE_INTERVAL_SECONDS = 600
+
+
+class IdempotencyKeyConflict(ValueError):
+    """Ключ уже использован для запроса с другим телом."""
+
+
+class IdempotentRequestAborted(RuntimeError):
+    """Первый запрос с этим ключом был прерван (отмена, отключение клиента) — повтор выполнится заново."""
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Отпечаток тела запроса: повтор с тем же ключом должен быть тем же запросом."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Хранилище Idempotency-Key в Postgres (таблица idempotency_keys) — общее для всех
+    воркеров и реплик приложения.
+
+    - первый запрос занимает ключ (INSERT ... ON CONFLICT DO NOTHING), выполняется,
+      его JSON-ответ хранится ttl секунд и отдаётся повторам;
+    - пока первый запрос в полёте, одновременные запросы с тем же ключом (в любом процессе)
+      опрашивают запись и ждут его ответ, а не выполняют свой;
+    - ошибка не запоминается: запись удаляется, повтор с тем же ключом выполнится заново;
+    - прерванный первый запрос (отмена, ошибка) — ожидающие получают IdempotentRequestAborted;
+      если процесс упал посреди запроса, ключ освобождается через lock_seconds
+      (должно быть больше таймаута запроса к провайдеру);
+    - тот же ключ с другим телом — IdempotencyKeyConflict.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        lock_seconds: int,
+        poll_interval: float = 0.1,
+        session_maker: Callable[[], AsyncSession] = async_session_maker,
+    ):
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.poll_interval = poll_interval
+        self.session_maker = session_maker
+        self._next_purge = 0.0
+
+    async def _purge(self) -> None:
+        now = time.monotonic()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + PURGE_INTERVAL_SECONDS
+        async with self.session_maker() as session:
+            await delete_expired_idempotency_keys(session)
+
+    async def _release(self, key: str) -> None:
+        async with self.session_maker() as session:
+            await release_idempotency_key(session, key)
+
+    async def run(self, key: str, fingerprint: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        await self._purge()
+        async with self.session_maker() as session:
+            record = await claim_idempotency_key(session, key, fingerprint, self.lock_seconds)
+            while record is not None:
+                if record.fingerprint != fingerprint:
+                    raise IdempotencyKeyConflict("Idempotency-Key was used with a different request")
+                if record.response is not None:
+                    return record.response
+                await asyncio.sleep(self.poll_interval)
+                record = await get_idempotency_key(session, key)
+                if record is None:
+                    raise IdempotentRequestAborted("The original request with this Idempotency-Key was aborted")
+
+        try:
+            result = await call()
+        except BaseException:
+            # shield: повторная отмена не должна оставить ключ занятым до истечения lock_seconds
+            await asyncio.shield(self._release(key))
+            raise
+        async with self.session_maker() as session:
+            await store_idempotent_response(session, key, result, self.ttl)
+        return result
+
+
+idempotency_store = IdempotencyStore(
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS, lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS
+)
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.images import STATIC_ROOT, resize_image_file
+
+logger = logging.getLogger(__name__)
+
+
+class ResizedImageCache:
+    """
+    Дисковый кэш изображений, уменьшенных по запросу (/img/{width}/{path}).
+
+    - ресайз выполняется в пуле потоков, event loop не блокируется;
+    - одновременные первые запросы одного варианта ждут один и тот же ресайз (single-flight);
+    - общий размер файлов ограничен max_bytes, вытесняются давно не запрошенные (LRU);
+    - get() закрепляет файл за запросом до release(): закреплённые файлы не вытесняются,
+      пока FileResponse их отдаёт;
+    - stat/exists выполняются в потоке, не в event loop.
+    """
+
+    def __init__(self, root: str, max_bytes: int, workers: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._entries: "OrderedDict[Path, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Path, asyncio.Future] = {}
+        self._pins: Dict[Path, int] = {}
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="img-resize")
+        return self._executor
+
+    def load(self) -> None:
+        """
+        Восстанавливает LRU по файлам на диске (порядок — по времени изменения).
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.root.rglob("*"):
+            if path.is_file() and not path.name.endswith(".tmp"):
+                stat = path.stat()
+                files.append((stat.st_mtime, path, stat.st_size))
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            for _, path, size in sorted(files):
+                self._entries[path] = size
+                self._total_bytes += size
+        self._evict()
+
+    def cache_path(self, source_path: Path, width: int, fmt: str, version: str) -> Path:
+        """
+        Путь варианта в кэше. Версия исходника (source_version) входит в имя:
+        заменённый файл даёт новый вариант.
+        """
+        extension = "jpg" if fmt == "jpeg" else fmt
+        try:
+            relative = source_path.with_suffix("").relative_to(STATIC_ROOT).as_posix()
+        except ValueError:
+            relative = source_path.with_suffix("").as_posix().lstrip("/")
+        return self.root / str(width) / f"{relative}.{version}.{extension}"
+
+    def _acquire(self, path: Path) -> bool:
+        """Файл есть в кэше — отмечает обращение (LRU) и закрепляет его."""
+        with self._lock:
+            if path not in self._entries:
+                return False
+            self._entries.move_to_end(path)
+            self._pins[path] = self._pins.get(path, 0) + 1
+            return True
+
+    def release(self, path: Path) -> None:
+        """Ответ отдан — файл снова можно вытеснять."""
+        with self._lock:
+            count = self._pins.get(path, 0) - 1
+            if count > 0:
+                self._pins[path] = count
+            else:
+                self._pins.pop(path, None)
+        self._evict()
+
+    def _register(self, path: Path, size: int) -> None:
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(path, 0)
+            self._entries[path] = size
+            self._pins[path] = self._pins.get(path, 0) + 1
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            victims = []
+            for path in list(self._entries):
+                if self._total_bytes <= self.max_bytes or len(self._entries) <= 1:
+                    break
+                if path in self._pins:
+                    continue
+                self._total_bytes -= self._entries.pop(path)
+                victims.append(path)
+        for path in victims:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    async def get(self, source_path: Path, width: int, fmt: str, version: str) -> Path:
+        """
+        Возвращает путь к уменьшенному изображению, создавая его при первом запросе.
+        Файл закреплён за вызывающим: после отдачи нужно вызвать release(path).
+        """
+        target = self.cache_path(source_path, width, fmt, version)
+        if self._acquire(target):
+            if await asyncio.to_thread(target.exists):
+                return target
+            self.release(target)
+
+        future = self._inflight.get(target)
+        if future is not None:
+            await asyncio.shield(future)
+            # файл мог быть вытеснен между ресайзом и этим местом — проверяем заново
+            return await self.get(source_path, width, fmt, version)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[target] = future
+        try:
+            size = await loop.run_in_executor(self.executor, resize_image_file, source_path, target, width, fmt)
+            self._register(target, size)
+            future.set_result(target)
+        except BaseException as exc:
+            future.set_exception(exc)
+            # исключение уже передано ожидающим; подавляем "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(target, None)
+        return target
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+resized_image_cache = ResizedImageCache(
+    root=settings.IMAGE_CACHE_DIR,
+    max_bytes=settings.IMAGE_CACHE_MAX_BYTES,
+    workers=settings.IMAGE_RESIZE_WORKERS,
+)
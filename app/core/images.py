@@ -0,0 +1,221 @@
+import base64
+import hashlib
+import io
+import logging
+import os
+import re
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageFilter, ImageOps
+
+logger = logging.getLogger(__name__)
+
+STATIC_ROOT = Path("app/web/static")
+
+# Ширины производных изображений: колонка галереи ~450px на десктопе, 100vw на мобильных (до 3x DPR)
+VARIANT_WIDTHS = (480, 960, 1440)
+VARIANT_FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 6},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+VARIANT_SIZES = "(max-width: 720px) 100vw, 450px"
+
+# Превью для фона до загрузки изображения: ~16px по ширине, в base64 — пара сотен байт
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_FORMAT = {"format": "WEBP", "quality": 40}
+
+
+def static_relative_path(url: str) -> Optional[str]:
+    """
+    ProductCardImage.url -> путь относительно app/web/static ("img/azores1.jpg").
+    Внешние URL (http/https) не обрабатываются — возвращает None.
+    Тот же разбор, что и в build_image_url: "img/x.jpg", "/static/img/x.jpg" или просто "x.jpg".
+    """
+    if not url or url.startswith(("http://", "https://")):
+        return None
+    path = url.lstrip("/")
+    if path.startswith("static/"):
+        path = path[len("static/"):]
+    elif "/" not in path:
+        path = f"img/{path}"
+    normalized = PurePosixPath(path)
+    if ".." in normalized.parts:
+        return None
+    return normalized.as_posix()
+
+
+def source_version(stat: os.stat_result) -> str:
+    """
+    Версия исходного файла для URL /img/{width}/{path}?v=...: меняется при замене файла
+    (mtime и размер), поэтому ответ по такому URL можно кэшировать как immutable.
+    """
+    return hashlib.sha256(f"{stat.st_mtime_ns}:{stat.st_size}".encode("ascii")).hexdigest()[:12]
+
+
+def resized_image_url(relative_path: str, width: int) -> str:
+    """
+    URL уменьшенного изображения с версией исходника: "img/x.jpg" -> "/img/480/x.jpg?v=<версия>".
+    Читает stat файла — из event loop вызывать через asyncio.to_thread.
+    Для отсутствующего файла — URL без версии (короткое кэширование).
+    """
+    path = PurePosixPath(relative_path.lstrip("/"))
+    if path.parts and path.parts[0] == "img":
+        path = PurePosixPath(*path.parts[1:])
+    url = f"/img/{width}/{path.as_posix()}"
+    try:
+        return f"{url}?v={source_version((STATIC_ROOT / 'img' / path).stat())}"
+    except OSError:
+        return url
+
+
+# src уменьшенного изображения в description_html: /img/{width}/{path}, с версией ?v= или без
+RESIZED_IMAGE_SRC_RE = re.compile(r'src="/img/(\d+)/([^"?#]+)(?:\?v=[0-9a-f]*)?"')
+
+
+def version_resized_image_urls(html: str) -> str:
+    """
+    Проставляет версию исходника (resized_image_url) во все src="/img/{width}/..." фрагмента HTML,
+    чтобы ответы по ним кэшировались как immutable. Читает stat — вызывать через asyncio.to_thread.
+    Версия фиксируется при записи описания; после замены файла старый ?v= не совпадает
+    и ответ кэшируется коротко до следующего сохранения описания.
+    """
+    return RESIZED_IMAGE_SRC_RE.sub(
+        lambda match: f'src="{resized_image_url(f"img/{match.group(2)}", int(match.group(1)))}"',
+        html,
+    )
+
+
+def variant_relative_path(relative_path: str, width: int, fmt: str) -> str:
+    """img/azores1.jpg -> img/azores1.w480.webp (рядом с оригиналом)."""
+    source = PurePosixPath(relative_path)
+    extension = "jpg" if fmt == "jpeg" else fmt
+    return source.with_name(f"{source.stem}.w{width}.{extension}").as_posix()
+
+
+def open_image(path: Path) -> Image.Image:
+    """
+    Открывает изображение с учётом EXIF-ориентации (снимки с камеры часто повернуты).
+    Возвращает загруженную в память копию: исходный файл закрывается сразу.
+    """
+    with Image.open(path) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.load()
+    return image
+
+
+def resize_to_width(image: Image.Image, width: int) -> Image.Image:
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def save_variant(image: Image.Image, path: Path, fmt: str) -> None:
+    """Сохраняет через временный файл, чтобы не отдать недописанный вариант."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    image.save(tmp_path, **VARIANT_FORMATS[fmt])
+    os.replace(tmp_path, path)
+
+
+def remove_variant_files(urls: List[str]) -> int:
+    """
+    Удаляет файлы вариантов (пути относительно app/web/static), которых больше нет в БД.
+    Оригиналы не трогает: путь должен выглядеть как вариант (variant_relative_path).
+    Возвращает число удалённых файлов.
+    """
+    removed = 0
+    for url in urls:
+        relative_path = static_relative_path(url)
+        if relative_path is None or ".w" not in PurePosixPath(relative_path).stem:
+            continue
+        try:
+            (STATIC_ROOT / relative_path).unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def image_metadata(image: Image.Image, source_path: Path) -> Dict:
+    """
+    Собственные характеристики изображения: размеры (после EXIF-поворота), вес файла,
+    доминирующий цвет (#rrggbb) и крошечное размытое превью в виде data URI.
+    """
+    sample = image.copy()
+    sample.thumbnail((64, 64))
+    palette_image = sample.convert("RGB").quantize(colors=5, method=Image.Quantize.MEDIANCUT)
+    _, dominant_index = max(palette_image.getcolors())
+    palette = palette_image.getpalette()
+    red, green, blue = palette[dominant_index * 3:dominant_index * 3 + 3]
+
+    preview = resize_to_width(image, PLACEHOLDER_WIDTH).filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    preview.save(buffer, **PLACEHOLDER_FORMAT)
+
+    return {
+        "width": image.width,
+        "height": image.height,
+        "bytes": source_path.stat().st_size,
+        "dominant_color": f"#{red:02x}{green:02x}{blue:02x}",
+        "placeholder": "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii"),
+    }
+
+
+def process_image(url: str) -> Tuple[Optional[Dict], List[Dict]]:
+    """
+    Обрабатывает изображение из app/web/static за одно открытие файла:
+    - метаданные (image_metadata) для ProductCardImage;
+    - уменьшенные WebP/JPEG варианты для product_card_image_variants.
+    Блокирующая функция (Pillow) — вызывать через asyncio.to_thread.
+    Оригинал не увеличивается: ширины больше исходной пропускаются.
+    Для внешних URL и отсутствующих файлов возвращает (None, []).
+    """
+    relative_path = static_relative_path(url)
+    if relative_path is None:
+        return None, []
+    source_path = STATIC_ROOT / relative_path
+    if not source_path.is_file():
+        logger.warning("Image %s not found, variants are not generated", source_path)
+        return None, []
+
+    variants = []
+    with open_image(source_path) as image:
+        metadata = image_metadata(image, source_path)
+        for width in VARIANT_WIDTHS:
+            if width >= image.width:
+                continue
+            resized = resize_to_width(image, width)
+            for fmt in VARIANT_FORMATS:
+                variant_path = variant_relative_path(relative_path, width, fmt)
+                full_path = STATIC_ROOT / variant_path
+                save_variant(resized, full_path, fmt)
+                variants.append({
+                    "width": resized.width,
+                    "height": resized.height,
+                    "format": fmt,
+                    "url": variant_path,
+                    "bytes": full_path.stat().st_size,
+                })
+    return metadata, variants
+
+
+def resize_image_file(source_path: Path, target_path: Path, width: int, fmt: str) -> int:
+    """
+    Уменьшает одно изображение до width (без увеличения) и сохраняет в target_path.
+    Блокирующая функция — для пула потоков. Возвращает размер файла в байтах.
+    """
+    with open_image(source_path) as image:
+        resized = resize_to_width(image, width) if width < image.width else image
+        save_variant(resized, target_path, fmt)
+    return target_path.stat().st_size
+
+
+def build_srcset(variants: List[Dict], fmt: str, url_builder) -> str:
+    """srcset для одного формата: "url 480w, url 960w"."""
+    return ", ".join(
+        f"{url_builder(variant['url'])} {variant['width']}w"
+        for variant in sorted(variants, key=lambda v: v["width"])
+        if variant["format"] == fmt
+    )
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.database.db import async_session_maker
+from app.database.crud.jobs import JobFailure, claim_jobs, complete_jobs, extend_job_leases, fail_jobs
+from app.schemas import JobRead
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentJobError(Exception):
+    """Повтор не поможет (нет данных, адрес отвергнут) — задача сразу уходит в dead."""
+
+
+# Обработчик получает пачку задач и возвращает результат по каждой: None — выполнена,
+# исключение — попытка неудачна (PermanentJobError — без повторов)
+JobHandlerFunc = Callable[[List[JobRead]], Awaitable[List[Optional[Exception]]]]
+
+
+class JobHandler(NamedTuple):
+    kind: str
+    func: JobHandlerFunc
+    batch_size: int
+    backoff_seconds: float
+
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str, batch_size: int = 1, backoff_seconds: Optional[float] = None):
+    """
+    Регистрирует обработчик вида задач kind:
+
+        @job_handler(JOB_GUIDE_EMAIL, batch_size=50)
+        async def send_guides(jobs: List[JobRead]) -> List[Optional[Exception]]: ...
+
+    Модуль с обработчиком должен быть импортирован до старта воркера.
+    """
+    def register(func: JobHandlerFunc) -> JobHandlerFunc:
+        JOB_HANDLERS[kind] = JobHandler(
+            kind=kind,
+            func=func,
+            batch_size=batch_size,
+            backoff_seconds=settings.JOBS_RETRY_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds,
+        )
+        return func
+    return register
+
+
+def retry_delay(handler: JobHandler, attempts: int) -> float:
+    """Экспоненциальная задержка с джиттером: backoff * 2^(attempts-1) * [0.5, 1.5)."""
+    return handler.backoff_seconds * 2 ** (attempts - 1) * random.uniform(0.5, 1.5)
+
+
+class JobWorker:
+    """
+    Воркер очереди задач из таблицы jobs.
+
+    - JOBS_CONCURRENCY циклов в процессе; каждый по очереди забирает пачку задач
+      каждого зарегистрированного вида (claim_jobs: FOR UPDATE SKIP LOCKED) и передаёт её обработчику;
+    - пока обработчик работает (включая ожидание ресурсов, например SMTP-соединения из пула),
+      аренда пачки продлевается каждые JOBS_LEASE_SECONDS / 3 — долгая пачка не уходит
+      другому воркеру посреди выполнения;
+    - выполненные задачи удаляются, неудачные возвращаются в очередь с задержкой
+      или уходят в dead (fail_jobs) — по одному запросу на пачку;
+    - задачи не найдены — пауза JOBS_POLL_INTERVAL_SECONDS (с джиттером).
+    Процессов-воркеров может быть сколько угодно (приложение и python -m app.cli.worker):
+    захват через SKIP LOCKED не ставит их в очередь друг за другом.
+    """
+
+    def __init__(self, concurrency: int, poll_interval: float, handlers: Dict[str, JobHandler] = JOB_HANDLERS):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.handlers = handlers
+        self._tasks: List[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+        self.dead = 0
+
+    @staticmethod
+    async def _heartbeat(jobs: List[JobRead], worker_id: str) -> None:
+        """Продлевает аренду пачки, пока задача не отменена."""
+        job_ids = [job.id for job in jobs]
+        while job_ids:
+            await asyncio.sleep(settings.JOBS_LEASE_SECONDS / 3)
+            try:
+                async with async_session_maker() as session:
+                    extended = await extend_job_leases(session, job_ids, worker_id, settings.JOBS_LEASE_SECONDS)
+            except Exception:
+                logger.exception("Failed to extend the lease of %s jobs", len(job_ids))
+                continue
+            if len(extended) < len(job_ids):
+                logger.warning("Worker %s lost the lease of %s jobs", worker_id, len(job_ids) - len(extended))
+            job_ids = extended
+
+    async def _run_batch(self, handler: JobHandler, jobs: List[JobRead], worker_id: str) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(jobs, worker_id))
+        try:
+            results = await handler.func(jobs)
+        except Exception as exc:
+            logger.exception("Job handler %s failed for a batch of %s", handler.kind, len(jobs))
+            results = [exc] * len(jobs)
+        finally:
+            heartbeat.cancel()
+
+        done = [job.id for job, error in zip(jobs, results) if error is None]
+        failures = {
+            job.id: JobFailure(
+                error=f"{type(error).__name__}: {error}",
+                retry_delay=retry_delay(handler, job.attempts),
+                permanent=isinstance(error, PermanentJobError),
+            )
+            for job, error in zip(jobs, results)
+            if error is not None
+        }
+        async with async_session_maker() as session:
+            await complete_jobs(session, done, worker_id)
+            dead = await fail_jobs(session, failures, worker_id)
+        self.completed += len(done)
+        self.failed += len(failures)
+        self.dead += dead
+        if dead:
+            logger.error("%s %s jobs moved to dead", dead, handler.kind)
+
+    async def run_once(self, worker_id: str) -> int:
+        """Один проход по всем видам задач. Возвращает число обработанных задач."""
+        processed = 0
+        for handler in list(self.handlers.values()):
+            async with async_session_maker() as session:
+                jobs = await claim_jobs(
+                    session,
+                    kind=handler.kind,
+                    worker_id=worker_id,
+                    limit=handler.batch_size,
+                    lease_seconds=settings.JOBS_LEASE_SECONDS,
+                )
+            if jobs:
+                await self._run_batch(handler, jobs, worker_id)
+                processed += len(jobs)
+        return processed
+
+    async def _loop(self, number: int) -> None:
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{number}"
+        while True:
+            try:
+                processed = await self.run_once(worker_id)
+            except Exception:
+                logger.exception("Job worker %s iteration failed", worker_id)
+                processed = 0
+            if not processed:
+                await asyncio.sleep(self.poll_interval * random.uniform(0.5, 1.5))
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._loop(number), name=f"job-worker-{number}")
+            for number in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Останавливает циклы. Задачи, прерванные посреди выполнения, остаются running
+        и будут забраны снова после окончания аренды (JOBS_LEASE_SECONDS).
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict:
+        return {
+            "loops": len(self._tasks),
+            "kinds": sorted(self.handlers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "dead": self.dead,
+        }
+
+
+job_worker = JobWorker(
+    concurrency=settings.JOBS_CONCURRENCY,
+    poll_interval=settings.JOBS_POLL_INTERVAL_SECONDS,
+)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import smtplib
+import ssl
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from typing import List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryError(Exception):
+    """Письмо не отправлено. temporary=True — стоит повторить позже (4xx, обрыв соединения)."""
+
+    def __init__(self, message: str, temporary: bool):
+        super().__init__(message)
+        self.temporary = temporary
+
+
+def _smtp_error(code: int, message) -> DeliveryError:
+    if isinstance(message, bytes):
+        message = message.decode("utf-8", "replace")
+    return DeliveryError(f"{code} {message}", temporary=400 <= code < 500)
+
+
+class SmtpMailer:
+    """
+    Одно SMTP-соединение, переиспользуемое между письмами и пакетами.
+
+    smtplib блокирующий, поэтому всё общение с сервером идёт в собственном потоке
+    (ThreadPoolExecutor на один поток) — event loop не блокируется, а соединение
+    никогда не используется из двух потоков одновременно.
+    - соединение открывается при первой отправке и держится открытым;
+    - после SMTP_MAX_MESSAGES_PER_CONNECTION писем открывается заново (лимиты серверов);
+    - сервер закрыл простаивающее соединение — одно переподключение и повтор письма.
+    Результат отправки пакета — по письму: None или DeliveryError.
+    """
+
+    def __init__(self, name: str = "smtp"):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._sent_on_connection = 0
+        self.connections_opened = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        if settings.SMTP_USE_SSL:
+            smtp = smtplib.SMTP_SSL(
+                settings.SMTP_HOST, settings.SMTP_PORT,
+                timeout=settings.SMTP_TIMEOUT_SECONDS, context=ssl.create_default_context(),
+            )
+        else:
+            smtp = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+            if settings.SMTP_STARTTLS:
+                smtp.starttls(context=ssl.create_default_context())
+        if settings.SMTP_USERNAME:
+            try:
+                smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+            except smtplib.SMTPException:
+                smtp.close()
+                raise
+        self.connections_opened += 1
+        self._sent_on_connection = 0
+        return smtp
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is not None and self._sent_on_connection >= settings.SMTP_MAX_MESSAGES_PER_CONNECTION:
+            self._disconnect()
+        if self._smtp is None:
+            self._smtp = self._connect()
+        return self._smtp
+
+    def _disconnect(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+    def _send_one(self, message: EmailMessage) -> Optional[DeliveryError]:
+        for attempt in range(2):
+            try:
+                smtp = self._connection()
+            except (smtplib.SMTPException, OSError) as exc:
+                # сервер недоступен или не принял логин — письмо ни при чём, повторим позже
+                self._smtp = None
+                return DeliveryError(f"SMTP connection failed: {exc}", temporary=True)
+            try:
+                refused = smtp.send_message(message)
+                self._sent_on_connection += 1
+            except smtplib.SMTPServerDisconnected as exc:
+                # простаивающее соединение закрыто сервером — переподключаемся один раз
+                self._smtp = None
+                if attempt:
+                    return DeliveryError(str(exc), temporary=True)
+                continue
+            except smtplib.SMTPRecipientsRefused as exc:
+                code, response = next(iter(exc.recipients.values()))
+                return _smtp_error(code, response)
+            except smtplib.SMTPResponseException as exc:
+                # после отказа в MAIL/DATA соединение пригодно, но транзакцию нужно сбросить
+                try:
+                    smtp.rset()
+                except (smtplib.SMTPException, OSError):
+                    self._disconnect()
+                return _smtp_error(exc.smtp_code, exc.smtp_error)
+            except (smtplib.SMTPException, OSError) as exc:
+                self._disconnect()
+                return DeliveryError(str(exc), temporary=True)
+            if refused:
+                code, response = next(iter(refused.values()))
+                return _smtp_error(code, response)
+            return None
+        return DeliveryError("SMTP connection lost", temporary=True)
+
+    def _send_batch(self, messages: List[EmailMessage]) -> List[Optional[DeliveryError]]:
+        return [self._send_one(message) for message in messages]
+
+    async def send_batch(self, messages: List[EmailMessage]) -> List[Optional[DeliveryError]]:
+        """Отправляет пакет по одному соединению; результат — по каждому письму."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._send_batch, messages)
+
+    async def close(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._disconnect)
+        self._executor.shutdown(wait=False)
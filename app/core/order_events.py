@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.database.db import async_session_maker
+from app.database.crud.order import apply_order_states, ORDER_STATE_RANK
+
+logger = logging.getLogger(__name__)
+
+# События заказа Revolut -> состояние заказа в нашей БД
+ORDER_EVENT_STATES = {
+    "ORDER_AUTHORISED": "authorised",
+    "ORDER_COMPLETED": "completed",
+    "ORDER_CANCELLED": "cancelled",
+    "ORDER_FAILED": "failed",
+}
+
+
+class InvalidWebhookSignature(ValueError):
+    """Подпись webhook отсутствует, не совпадает или timestamp вне допустимого окна."""
+
+
+def verify_revolut_signature(
+    body: bytes,
+    timestamp: Optional[str],
+    signature_header: Optional[str],
+    now: Optional[float] = None,
+) -> None:
+    """
+    Проверка подписи Revolut: HMAC-SHA256(secret, "v1.{timestamp}.{raw body}").
+    Заголовок Revolut-Signature может содержать несколько подписей через запятую (ротация секрета).
+    """
+    secret = settings.REVOLUT_WEBHOOK_SECRET
+    if not secret:
+        raise InvalidWebhookSignature("Webhook secret is not configured")
+    if not timestamp or not signature_header:
+        raise InvalidWebhookSignature("Missing signature headers")
+    try:
+        timestamp_ms = int(timestamp)
+    except ValueError as exc:
+        raise InvalidWebhookSignature("Invalid timestamp") from exc
+
+    now = time.time() if now is None else now
+    if abs(now - timestamp_ms / 1000) > settings.WEBHOOK_TIMESTAMP_TOLERANCE_SECONDS:
+        raise InvalidWebhookSignature("Timestamp outside tolerance")
+
+    payload = b"v1." + timestamp.encode("ascii") + b"." + body
+    expected = "v1=" + hmac.new(secret.encode("utf-8"), payload, hashlib.sha256).hexdigest()
+    if not any(hmac.compare_digest(expected, candidate.strip()) for candidate in signature_header.split(",")):
+        raise InvalidWebhookSignature("Signature mismatch")
+
+
+class OrderEvent(NamedTuple):
+    order_id: str
+    event: str
+    state: str
+
+    @property
+    def key(self) -> str:
+        # Revolut не передаёт id события: повтор — то же событие того же заказа
+        return f"{self.order_id}:{self.event}"
+
+
+class OrderEventQueue:
+    """
+    Очередь событий заказов в памяти процесса.
+
+    Endpoint только проверяет подпись и кладёт событие в очередь (быстрый 200),
+    фоновый потребитель собирает пакет (WEBHOOK_BATCH_SIZE или WEBHOOK_BATCH_WAIT_SECONDS)
+    и применяет его одним UPDATE ... FROM (VALUES ...) — apply_order_states.
+    Повторы провайдера отсекаются ограниченным LRU ключей событий ещё до очереди.
+    Потерянные события (рестарт процесса) догоняет сверка статусов с провайдером.
+    """
+
+    def __init__(self, maxsize: int, batch_size: int, batch_wait: float, seen_maxsize: int = 50000):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue: "asyncio.Queue[OrderEvent]" = asyncio.Queue(maxsize=maxsize)
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._seen_maxsize = seen_maxsize
+        self._task: Optional[asyncio.Task] = None
+        self.applied = 0
+        self.duplicates = 0
+
+    def _remember(self, key: str) -> bool:
+        """True — ключ новый (и запомнен), False — дубликат."""
+        if key in self._seen:
+            self._seen.move_to_end(key)
+            return False
+        self._seen[key] = None
+        while len(self._seen) > self._seen_maxsize:
+            self._seen.popitem(last=False)
+        return True
+
+    def _forget(self, keys: List[str]) -> None:
+        for key in keys:
+            self._seen.pop(key, None)
+
+    def put(self, event: OrderEvent) -> bool:
+        """
+        Ставит событие в очередь. False — дубликат (уже принят).
+        asyncio.QueueFull — очередь переполнена (endpoint отвечает 503, провайдер повторит).
+        """
+        if not self._remember(event.key):
+            self.duplicates += 1
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._forget([event.key])
+            raise
+        return True
+
+    async def _next_batch(self) -> List[OrderEvent]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    @staticmethod
+    def _collapse(batch: List[OrderEvent]) -> Dict[str, str]:
+        states: Dict[str, str] = {}
+        for event in batch:
+            current = states.get(event.order_id)
+            if current is None or ORDER_STATE_RANK.get(event.state, 0) >= ORDER_STATE_RANK.get(current, 0):
+                states[event.order_id] = event.state
+        return states
+
+    async def _apply(self, batch: List[OrderEvent]) -> None:
+        states = self._collapse(batch)
+        try:
+            async with async_session_maker() as session:
+                changed = await apply_order_states(session, states)
+        except Exception:
+            # событие можно будет принять повторно (ретрай провайдера или сверка)
+            self._forget([event.key for event in batch])
+            logger.exception("Failed to apply %s order events", len(batch))
+            return
+        self.applied += len(changed)
+        logger.info("Applied order events: %s received, %s orders changed", len(batch), len(changed))
+
+    async def _consume(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._apply(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._consume(), name="order-events")
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """Дожидается обработки принятых событий (не дольше drain_timeout) и останавливает потребителя."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s order events were not applied before shutdown", self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self._queue.qsize(), "applied": self.applied, "duplicates": self.duplicates}
+
+
+order_event_queue = OrderEventQueue(
+    maxsize=settings.WEBHOOK_QUEUE_MAXSIZE,
+    batch_size=settings.WEBHOOK_BATCH_SIZE,
+    batch_wait=settings.WEBHOOK_BATCH_WAIT_SECONDS,
+)
@@ -0,0 +1,51 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Iterable, Sequence
+
+# format -> media type
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def export_value(value: Any) -> Any:
+    """Значение колонки для выгрузки: даты — ISO 8601, enum (Currency) — его значение."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+async def encode_export(
+    fmt: str,
+    columns: Sequence[str],
+    partitions: AsyncIterator[Iterable[Sequence[Any]]]
+) -> AsyncIterator[bytes]:
+    """
+    Пачки строк (stream_orders) -> куски CSV (с заголовком) или NDJSON.
+    Один кусок на пачку: буфер переиспользуется, поэтому память не растёт с размером выгрузки.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(columns)
+
+    async for rows in partitions:
+        for row in rows:
+            values = [export_value(value) for value in row]
+            if writer is not None:
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False, separators=(",", ":")))
+                buffer.write("\n")
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
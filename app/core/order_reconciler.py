@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.order_events import ORDER_STATE_RANK
+from app.core.payment_client import payment_client, PaymentProviderUnavailable
+from app.database.db import async_session_maker
+from app.database.crud.metadata import SystemMetaCRUD
+from app.database.crud.order import TERMINAL_ORDER_STATES, apply_order_states, list_orders_by_status
+from app.schemas import OrderRead
+
+logger = logging.getLogger(__name__)
+
+# Ключ pg_advisory_xact_lock: процессы забирают страницы сверки по очереди
+RECONCILE_LOCK_KEY = 0x5E70_0001
+# Курсор обхода по ключу в system_metadata — общий для всех процессов
+RECONCILE_CURSOR_KEY = "order_reconciler_cursor:{state}"
+# Все нефинальные состояния (в т.ч. authorised: потерянный ORDER_COMPLETED после ORDER_AUTHORISED)
+RECONCILE_STATES = tuple(state for state in ORDER_STATE_RANK if state not in TERMINAL_ORDER_STATES)
+PROVIDER_ORDER_STATES = {"pending", "processing", "authorised", "completed", "cancelled", "failed"}
+
+
+async def fetch_provider_state(order_id: str) -> Optional[str]:
+    """
+    Текущее состояние заказа у провайдера или None (провайдер недоступен, ошибка, неизвестное состояние).
+    """
+    try:
+        response = await payment_client.get_order(order_id)
+    except (httpx.HTTPError, PaymentProviderUnavailable):
+        logger.warning("Provider request failed for order %s", order_id)
+        return None
+    if response.status_code != 200:
+        logger.warning("Provider returned %s for order %s", response.status_code, order_id)
+        return None
+    state = str(response.json().get("state", "")).lower()
+    return state if state in PROVIDER_ORDER_STATES else None
+
+
+class OrderReconciler:
+    """
+    Периодическая сверка "зависших" заказов (нефинальное состояние дольше RECONCILE_STALE_AFTER_SECONDS)
+    с провайдером — на случай потерянных webhook.
+
+    - заказы читаются страницами по ключу (list_orders_by_status с after_id); курсор хранится
+      в system_metadata, за прогон — не больше RECONCILE_MAX_PAGES_PER_RUN страниц;
+    - страница "забирается" в короткой транзакции под pg_advisory_xact_lock: курсор читается и сразу
+      сдвигается, поэтому несколько процессов сверяют разные страницы, а блокировка и соединение
+      не удерживаются во время запросов к провайдеру;
+    - заказы старше RECONCILE_MAX_AGE_HOURS (брошенные оплаты) не сверяются;
+    - запросы к провайдеру ограничены семафором (RECONCILE_CONCURRENCY);
+    - изменения страницы применяются одним запросом (apply_order_states).
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[datetime] = None
+        self.last_result: Dict[str, int] = {}
+
+    async def _fetch_state(self, semaphore: asyncio.Semaphore, order_id: str) -> Optional[str]:
+        async with semaphore:
+            return await fetch_provider_state(order_id)
+
+    async def _claim_page(self, state: str, stale_before: datetime, created_after: datetime) -> List[OrderRead]:
+        """Следующая страница заказов в состоянии state; курсор сдвигается в той же транзакции."""
+        async with async_session_maker() as session:
+            await session.execute(select(func.pg_advisory_xact_lock(RECONCILE_LOCK_KEY)))
+            cursor_key = RECONCILE_CURSOR_KEY.format(state=state)
+            orders = await list_orders_by_status(
+                session,
+                status=state,
+                limit=settings.RECONCILE_PAGE_SIZE,
+                updated_before=stale_before,
+                created_after=created_after,
+                # "" — обход по ключу с начала
+                after_id=await SystemMetaCRUD.get_value(session, cursor_key) or "",
+            )
+            # конец выборки — следующая страница начнётся сначала
+            next_cursor = orders[-1].id if len(orders) == settings.RECONCILE_PAGE_SIZE else ""
+            await SystemMetaCRUD.set_value(session, cursor_key, next_cursor)
+            await session.commit()
+        return orders
+
+    async def _reconcile_page(self, orders: List[OrderRead]) -> int:
+        """Сверяет страницу заказов с провайдером. Возвращает число изменённых заказов."""
+        semaphore = asyncio.Semaphore(settings.RECONCILE_CONCURRENCY)
+        provider_states = await asyncio.gather(
+            *(self._fetch_state(semaphore, order.id) for order in orders)
+        )
+        changes = {
+            order.id: provider_state
+            for order, provider_state in zip(orders, provider_states)
+            if provider_state is not None and provider_state != order.state
+        }
+        if not changes:
+            return 0
+        async with async_session_maker() as session:
+            changed = await apply_order_states(session, changes)
+        return len(changed)
+
+    async def run_once(self) -> None:
+        """Один прогон сверки."""
+        now = datetime.now(timezone.utc)
+        stale_before = now - timedelta(seconds=settings.RECONCILE_STALE_AFTER_SECONDS)
+        created_after = now - timedelta(hours=settings.RECONCILE_MAX_AGE_HOURS)
+        self.last_result = {"checked": 0, "changed": 0}
+        for state in RECONCILE_STATES:
+            for _ in range(settings.RECONCILE_MAX_PAGES_PER_RUN):
+                orders = await self._claim_page(state, stale_before, created_after)
+                if orders:
+                    self.last_result["checked"] += len(orders)
+                    self.last_result["changed"] += await self._reconcile_page(orders)
+                if len(orders) < settings.RECONCILE_PAGE_SIZE:
+                    break
+        self.last_run = datetime.now(timezone.utc)
+        logger.info("Reconcile run: %s", self.last_result)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.RECONCILE_INTERVAL_SECONDS)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Order reconcile run failed")
+
+    def start(self) -> None:
+        if settings.RECONCILE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="order-reconciler")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_result": self.last_result,
+        }
+
+
+order_reconciler = OrderReconciler()
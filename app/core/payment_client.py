@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(sorted_values: list, q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class PaymentProviderUnavailable(Exception):
+    """Провайдер недоступен без попытки запроса: breaker открыт или исчерпан лимит запросов в полёте."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Запрос гарантированно не дошёл до провайдера — безопасно повторять даже POST
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+class PaymentClientMetrics:
+    """
+    Метрики вызовов провайдера: задержка (скользящее окно последних вызовов),
+    число запросов/ошибок и одновременных запросов в полёте.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.latencies: "deque[float]" = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def started(self) -> float:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return time.perf_counter()
+
+    def finished(self, started_at: float, failed: bool) -> None:
+        self.in_flight -= 1
+        self.latencies.append(time.perf_counter() - started_at)
+        if failed:
+            self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        values = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "latency_ms": {
+                name: round(value * 1000, 1) if value is not None else None
+                for name, value in (
+                    ("p50", _percentile(values, 0.50)),
+                    ("p95", _percentile(values, 0.95)),
+                    ("p99", _percentile(values, 0.99)),
+                    ("max", values[-1] if values else None),
+                )
+            },
+        }
+
+
+class PaymentClient:
+    """
+    Один httpx.AsyncClient на всё время жизни приложения для вызовов Revolut:
+    keep-alive соединения (без TCP+TLS рукопожатия на каждый заказ), HTTP/2,
+    ограниченный пул и раздельные таймауты connect / read / write / pool.
+    Создаётся и закрывается в lifespan приложения (main.py).
+
+    Деградация провайдера не должна занимать все корутины и соединения БД:
+    - не больше PAYMENT_MAX_IN_FLIGHT запросов одновременно (ожидание слота — PAYMENT_IN_FLIGHT_WAIT_SECONDS);
+    - circuit breaker: после серии ошибок / высокой доли таймаутов запросы отклоняются сразу;
+    - ограниченные ретраи с jitter: ошибки соединения (запрос не отправлен) — для любых методов,
+      таймауты чтения и 429/5xx — только для идемпотентных (GET).
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.http2 = False
+        self.metrics = PaymentClientMetrics()
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.PAYMENT_BREAKER_FAILURES,
+            window=settings.PAYMENT_BREAKER_WINDOW,
+            timeout_rate=settings.PAYMENT_BREAKER_TIMEOUT_RATE,
+            open_seconds=settings.PAYMENT_BREAKER_OPEN_SECONDS,
+        )
+        self._in_flight = asyncio.Semaphore(settings.PAYMENT_MAX_IN_FLIGHT)
+        self.retries = 0
+
+    def _http2_available(self) -> bool:
+        if not settings.PAYMENT_HTTP2:
+            return False
+        try:
+            import h2  # noqa: F401  (httpx[http2])
+        except ImportError:
+            logger.warning("h2 is not installed, payment client falls back to HTTP/1.1")
+            return False
+        return True
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        self.http2 = self._http2_available()
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=settings.PAYMENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PAYMENT_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.PAYMENT_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.PAYMENT_CONNECT_TIMEOUT,
+                read=settings.PAYMENT_READ_TIMEOUT,
+                write=settings.PAYMENT_WRITE_TIMEOUT,
+                pool=settings.PAYMENT_POOL_TIMEOUT,
+            ),
+            headers={
+                "Accept": "application/json",
+                "Revolut-Api-Version": settings.Revolut_Api_Version,
+            },
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("Payment client is not started (see app lifespan)")
+        return self._client
+
+    def _auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {settings.SECRET_API_KEY}"}
+
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Одна попытка: breaker + метрики."""
+        try:
+            generation = self.breaker.before_call()
+        except CircuitOpenError as exc:
+            raise PaymentProviderUnavailable("Payment provider circuit is open", exc.retry_after) from exc
+
+        started_at = self.metrics.started()
+        failed = True
+        recorded = False
+        try:
+            response = await self.client.request(method, settings.REVOLUT_URL + path, **kwargs)
+            failed = response.status_code >= 500
+            if failed:
+                self.breaker.record_failure(generation)
+            else:
+                self.breaker.record_success(generation)
+            recorded = True
+            return response
+        except httpx.HTTPError as exc:
+            self.breaker.record_failure(generation, timeout=isinstance(exc, httpx.TimeoutException))
+            recorded = True
+            raise
+        finally:
+            if not recorded:
+                self.breaker.release(generation)
+            self.metrics.finished(started_at, failed)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        # full jitter: равномерно в [0, base * 2^attempt]
+        return random.uniform(0, settings.PAYMENT_RETRY_BACKOFF_SECONDS * (2 ** attempt))
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Запрос к REVOLUT_URL + path.
+        PaymentProviderUnavailable — breaker открыт или нет свободного слота;
+        ошибки httpx после исчерпания ретраев пробрасываются вызывающему коду.
+        """
+        kwargs["headers"] = {**self._auth_headers(), **kwargs.pop("headers", {})}
+        idempotent = method.upper() in ("GET", "HEAD")
+
+        try:
+            await asyncio.wait_for(self._in_flight.acquire(), settings.PAYMENT_IN_FLIGHT_WAIT_SECONDS)
+        except asyncio.TimeoutError as exc:
+            raise PaymentProviderUnavailable("Too many in-flight payment provider calls") from exc
+        try:
+            for attempt in range(settings.PAYMENT_MAX_RETRIES + 1):
+                last_attempt = attempt == settings.PAYMENT_MAX_RETRIES
+                try:
+                    response = await self._send(method, path, **kwargs)
+                except NOT_SENT_ERRORS:
+                    if last_attempt:
+                        raise
+                except httpx.TimeoutException:
+                    if not idempotent or last_attempt:
+                        raise
+                else:
+                    if not (idempotent and response.status_code in RETRYABLE_STATUS_CODES) or last_attempt:
+                        return response
+                self.retries += 1
+                await asyncio.sleep(self._backoff(attempt))
+        finally:
+            self._in_flight.release()
+
+    async def create_order(self, payload: Dict[str, Any]) -> httpx.Response:
+        return await self.request("POST", "/api/orders", json=payload)
+
+    async def get_order(self, order_id: str) -> httpx.Response:
+        return await self.request("GET", f"/api/orders/{order_id}")
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Заполненность пула: открытые / занятые соединения против лимита.
+        """
+        stats: Dict[str, Any] = {
+            "max_connections": settings.PAYMENT_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.PAYMENT_MAX_KEEPALIVE_CONNECTIONS,
+            "http2": self.http2,
+        }
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is not None:
+            stats["open_connections"] = len(connections)
+            stats["idle_connections"] = sum(1 for connection in connections if connection.is_idle())
+        stats["saturation"] = round(self.metrics.in_flight / settings.PAYMENT_MAX_CONNECTIONS, 3)
+        return stats
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.metrics.snapshot(),
+            "retries": self.retries,
+            "breaker": self.breaker.snapshot(),
+            "pool": self.pool_stats(),
+        }
+
+
+payment_client = PaymentClient()
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PrerenderRefresher:
+    """
+    Обновление статических страниц каталога (python -m app.cli.prerender) после записи в каталог.
+
+    nginx отдаёт /products/ из PRERENDER_DIR и до бэкенда не доходит, поэтому после
+    правки продукта, карточки или изображения страницы нужно перерендерить сразу,
+    а не при следующем старте контейнера.
+    - schedule() вызывается из CRUD-модулей каталога после коммита и возвращается сразу;
+    - прогон инкрементальный (prerender_catalog): рендерятся только страницы со сменившейся
+      версией контента, страницы удалённых продуктов удаляются;
+    - записи во время прогона не теряются: после него выполняется ещё один;
+    - пустой PRERENDER_DIR (локальный запуск без nginx) — ничего не делает.
+    """
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self.runs = 0
+        self.last_stats: Dict[str, int] = {}
+
+    async def _run(self) -> None:
+        # app.cli.prerender импортирует маршруты и CRUD — импорт здесь, чтобы не было цикла
+        from app.cli.prerender import prerender_catalog
+
+        while self._dirty:
+            self._dirty = False
+            try:
+                self.last_stats = await prerender_catalog(Path(self.out_dir))
+                self.runs += 1
+            except Exception:
+                logger.exception("Pre-render refresh of %s failed", self.out_dir)
+
+    def schedule(self) -> None:
+        if not self.out_dir:
+            return
+        self._dirty = True
+        if self._task is None or self._task.done():
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._run(), name="prerender-refresh")
+            except RuntimeError:
+                # вне event loop (скрипты): страницы обновит следующий запуск app.cli.prerender
+                self._task = None
+
+    async def wait(self) -> None:
+        """Дожидается текущего прогона (остановка приложения)."""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+prerender_refresher = PrerenderRefresher(out_dir=settings.PRERENDER_DIR)
@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Dict, Optional, Set, Tuple
+
+from app.core.images import STATIC_ROOT
+
+logger = logging.getLogger(__name__)
+
+STATIC_URL_PREFIX = "/static/"
+# name.<hash>.ext — см. StaticManifest._add
+HASHED_NAME_RE = re.compile(r"^(?P<stem>.+)\.[0-9a-f]{8,64}(?P<suffix>\.[^.]+)$")
+
+# Ассеты, на которые ссылаются шаблоны; files/ (продаваемые PDF) сюда не входят
+FINGERPRINTED_SUFFIXES = {
+    ".css", ".js", ".svg", ".ico", ".woff", ".woff2",
+    ".jpg", ".jpeg", ".png", ".webp", ".gif", ".avif",
+}
+
+
+class StaticManifest:
+    """
+    Манифест статики: путь файла -> путь с хэшем содержимого.
+
+        css/product.css -> css/product.3f2a9c1e0b7d.css
+
+    Хэшированные пути отдаются с Cache-Control: immutable (см. app.web.static_files),
+    поэтому повторный визит не делает запросов за неизменившимися ассетами.
+    - build() читает и хэширует все ассеты — вызывается при старте приложения в потоке
+      (lifespan) и в app.cli.prerender, не при импорте;
+    - файлы, появившиеся позже (варианты изображений) или изменившиеся на диске (по mtime),
+      хэшируются в фоновом потоке; до этого url() отдаёт обычный /static/<path>,
+      поэтому рендер страницы никогда не читает файлы целиком в event loop;
+    - хэшированный путь, которого нет в манифесте этого процесса (прошлый деплой, соседний
+      процесс до пересчёта), отдаётся по исходному пути — см. app.web.static_files.
+    """
+
+    def __init__(self, root: Path, hash_length: int = 12):
+        self.root = root
+        self.hash_length = hash_length
+        self._lock = threading.Lock()
+        # исходный путь -> (mtime_ns, хэшированный путь)
+        self._entries: Dict[str, Tuple[int, str]] = {}
+        # хэшированный путь -> исходный путь
+        self._reverse: Dict[str, str] = {}
+        self._pending: Set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def build(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._reverse.clear()
+        for path in sorted(self.root.rglob("*")):
+            if path.is_file() and path.suffix.lower() in FINGERPRINTED_SUFFIXES:
+                self._add(path.relative_to(self.root).as_posix(), path)
+
+    def _add(self, relative_path: str, path: Path) -> str:
+        mtime_ns = path.stat().st_mtime_ns
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()[: self.hash_length]
+        source = PurePosixPath(relative_path)
+        hashed = source.with_name(f"{source.stem}.{digest}{source.suffix}").as_posix()
+        with self._lock:
+            previous = self._entries.get(relative_path)
+            if previous is not None:
+                self._reverse.pop(previous[1], None)
+            self._entries[relative_path] = (mtime_ns, hashed)
+            self._reverse[hashed] = relative_path
+        return hashed
+
+    def _schedule(self, relative_path: str, path: Path) -> None:
+        with self._lock:
+            if relative_path in self._pending:
+                return
+            self._pending.add(relative_path)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="static-hash")
+        self._executor.submit(self._add_pending, relative_path, path)
+
+    def _add_pending(self, relative_path: str, path: Path) -> None:
+        try:
+            self._add(relative_path, path)
+        except OSError:
+            logger.warning("Static file %s disappeared before hashing", relative_path)
+        finally:
+            with self._lock:
+                self._pending.discard(relative_path)
+
+    def hashed_path(self, relative_path: str) -> Optional[str]:
+        """
+        Путь с хэшем для файла из static или None (нет файла / не ассет / выход за root /
+        файл ещё не хэширован — тогда хэширование запускается в фоне).
+        """
+        relative_path = relative_path.lstrip("/")
+        source = PurePosixPath(relative_path)
+        if ".." in source.parts or source.suffix.lower() not in FINGERPRINTED_SUFFIXES:
+            return None
+        path = self.root / relative_path
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except OSError:
+            return None
+        entry = self._entries.get(relative_path)
+        if entry is not None and entry[0] == mtime_ns:
+            return entry[1]
+        self._schedule(relative_path, path)
+        return None
+
+    def add(self, relative_path: str) -> Optional[str]:
+        """Хэширует файл сразу (для вызова из потока, например после генерации вариантов)."""
+        relative_path = relative_path.lstrip("/")
+        if PurePosixPath(relative_path).suffix.lower() not in FINGERPRINTED_SUFFIXES:
+            return None
+        try:
+            return self._add(relative_path, self.root / relative_path)
+        except OSError:
+            return None
+
+    def source_path(self, hashed_path: str) -> Optional[str]:
+        """Обратное отображение для раздачи: css/product.<hash>.css -> css/product.css."""
+        return self._reverse.get(hashed_path)
+
+    @staticmethod
+    def unhashed_path(hashed_path: str) -> Optional[str]:
+        """css/product.<любой hash>.css -> css/product.css (без проверки манифеста)."""
+        source = PurePosixPath(hashed_path)
+        match = HASHED_NAME_RE.match(source.name)
+        if match is None:
+            return None
+        return source.with_name(match["stem"] + match["suffix"]).as_posix()
+
+    def url(self, relative_path: str) -> str:
+        """
+        Публичный URL файла из static: с хэшем, если он известен, иначе обычный /static/<path>.
+        """
+        relative_path = relative_path.lstrip("/")
+        return STATIC_URL_PREFIX + (self.hashed_path(relative_path) or relative_path)
+
+    def assets_version(self) -> str:
+        """
+        Сводная версия ассетов по (путь, размер, mtime) — входит в версию шаблонов
+        (ETag страниц, pre-render). Только stat, без чтения файлов: дёшево считать при импорте.
+        """
+        digest = hashlib.sha256()
+        for path in sorted(self.root.rglob("*")):
+            if path.suffix.lower() in FINGERPRINTED_SUFFIXES and path.is_file():
+                stat = path.stat()
+                digest.update(f"{path.relative_to(self.root).as_posix()}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+
+static_manifest = StaticManifest(STATIC_ROOT)
@@ -1,11 +1,20 @@
 import bleach
 import markdown
-from typing import Any, Dict
-from fastapi import Request
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+from fastapi import Request, Response
 import asyncio
 import yaml
 import aiofiles
 
+from app.core.images import version_resized_image_urls
+from app.core.static_manifest import static_manifest, STATIC_URL_PREFIX
+
 ALLOWED_TAGS = set(bleach.sanitizer.ALLOWED_TAGS) | {
     "p", "br", "hr", "pre", "code", "img",
     "h1", "h2", "h3", "h4", "h5", "h6",
@@ -62,38 +71,123 @@ def preprocess_markdown(md_text: str) -> str:
     return "\n".join(result)
 
 
+MARKDOWN_EXTENSIONS = [
+    "extra",  # списки, таблицы, и т.п.
+    "nl2br",  # ОДИНАРНЫЕ \n -> <br>
+    "tables",
+]
+
+
+class MarkdownRenderer:
+    """
+    Markdown -> HTML -> безопасный HTML с переиспользованием движков.
+
+    - markdown.Markdown и bleach Cleaner создаются один раз на поток
+      (оба объекта не потокобезопасны), Markdown сбрасывается через reset();
+    - результат кэшируется в ограниченном LRU по sha256 от исходного текста.
+    Результат байт-в-байт совпадает с markdown.markdown(...) + bleach.clean(...).
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _engines(self) -> Tuple[markdown.Markdown, bleach.sanitizer.Cleaner]:
+        engines = getattr(self._local, "engines", None)
+        if engines is None:
+            engines = (
+                markdown.Markdown(extensions=MARKDOWN_EXTENSIONS),
+                bleach.sanitizer.Cleaner(
+                    tags=ALLOWED_TAGS,
+                    attributes=ALLOWED_ATTRIBUTES,
+                    protocols=list(ALLOWED_PROTOCOLS),
+                    strip=True,
+                ),
+            )
+            self._local.engines = engines
+        return engines
+
+    def _render(self, md_text: str) -> str:
+        try:
+            md_text = preprocess_markdown(md_text)
+            md, cleaner = self._engines()
+            try:
+                html = md.convert(md_text)
+            finally:
+                md.reset()
+            return cleaner.clean(html)
+        except Exception:
+            return bleach.clean(md_text, strip=True)
+
+    def render(self, md_text: str) -> str:
+        if not md_text:
+            return ""
+
+        key = hashlib.sha256(md_text.encode("utf-8")).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        clean = self._render(md_text)
+
+        with self._lock:
+            self._cache[key] = clean
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return clean
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+markdown_renderer = MarkdownRenderer()
+
+
 def md_to_safe_html(md_text: str) -> str:
     """
     Markdown -> HTML -> безопасный HTML.
     Переносы строк делает расширение nl2br.
     """
-    if not md_text:
-        return ""
+    return markdown_renderer.render(md_text)
 
-    try:
-        md_text = preprocess_markdown(md_text)
-
-        html = markdown.markdown(
-            md_text,
-            extensions=[
-                "extra",  # списки, таблицы, и т.п.
-                "nl2br",  # ОДИНАРНЫЕ \n -> <br>
-                "tables",
-            ],
-        )
-
-        clean = bleach.clean(
-            html,
-            tags=ALLOWED_TAGS,
-            attributes=ALLOWED_ATTRIBUTES,
-            protocols=list(ALLOWED_PROTOCOLS),
-            strip=True,
-        )
 
-        return clean
+async def description_to_html(md_text: str) -> str:
+    """
+    Описание карточки / изображения -> безопасный HTML для хранения в description_html:
+    URL /img/{width}/... получают версию исходника (?v=), см. images.version_resized_image_urls.
+    """
+    html = md_to_safe_html(md_text)
+    if 'src="/img/' not in html:
+        return html
+    return await asyncio.to_thread(version_resized_image_urls, html)
+
+
+# Плейсхолдер ссылки на скачивание в описании файла (ProductFile.description)
+DOWNLOAD_LINK_PLACEHOLDER = "https://example.com>"
+
+
+def build_download_link(file_id: int) -> str:
+    return f"/api/v1/download/{file_id}"
+
+
+def build_thank_you_link(product_code: str, lang: str, checkout_ref: str) -> str:
+    """Страница "спасибо" заказа: при каждом открытии выдаёт свежую подписанную ссылку на файл."""
+    return f"/thank-you/{product_code}/{lang}?{urlencode({'order': checkout_ref})}"
 
-    except Exception:
-        return bleach.clean(md_text, strip=True)
+
+def file_description_to_html(description: str | None, file_id: int) -> str:
+    """
+    Описание файла -> безопасный HTML с подставленной ссылкой на скачивание.
+    """
+    if not description:
+        return ""
+    return md_to_safe_html(description.replace(DOWNLOAD_LINK_PLACEHOLDER, build_download_link(file_id)))
 
 
 def ensure_dict(obj: Any) -> Dict:
@@ -115,39 +209,89 @@ def ensure_dict(obj: Any) -> Dict:
         return {}
 
 
-def build_image_url(request: Request, image_obj: Dict) -> str:
+def build_image_url(request: Optional[Request], image_obj: Dict) -> str:
     """
     Build a public URL for an image.
     Priority:
       1) if image_obj has 'url' and it looks absolute (starts with http/https) -> return as is
-      2) if image_obj has 'url' and starts with '/' -> return as is
-      3) if image_obj has 'path' or 'filename' -> use request.url_for('static', path='img/<filename>')
-      4) fallback: if image_obj has 'url' (relative) -> prefix with /static/
+      2) if image_obj has 'url' and starts with '/' -> return as is ('/static/...' gets fingerprinted)
+      3) if image_obj has 'path' or 'filename' -> static file under img/
+      4) fallback: if image_obj has 'url' (relative) -> file relative to the static root
       5) empty string if nothing found
+    Static files are resolved through the static manifest, so known assets get a
+    content-hashed /static/ URL that can be cached as immutable.
+    The request is not needed for that; it is kept for callers (static pre-render passes None).
     """
     url = image_obj.get("url") or image_obj.get("src") or ""
     if url:
         if url.startswith("http://") or url.startswith("https://"):
             return url
         if url.startswith("/"):
+            if url.startswith(STATIC_URL_PREFIX):
+                return static_manifest.url(url[len(STATIC_URL_PREFIX):])
             return url
         # relative path like "img/azores1.jpg" or "azores1.jpg"
-        if url.startswith("img/") or url.startswith("static/") or "/" in url:
+        if url.startswith("static/"):
+            return static_manifest.url(url[len("static/"):])
+        if url.startswith("img/") or "/" in url:
             # if it already contains img/ assume it's relative to static root
-            return "/static/" + url.lstrip("/")
+            return static_manifest.url(url)
         # otherwise treat as filename
-        return request.url_for("static", path=f"img/{url}")
+        return static_manifest.url(f"img/{url}")
     # try path/filename fields
     filename = image_obj.get("filename") or image_obj.get("path") or image_obj.get("file")
     if filename:
         # if filename already contains img/ prefix
         if filename.startswith("img/"):
-            return request.url_for("static", path=filename[len("img/"):]) if False else "/static/" + filename.lstrip(
-                "/")
-        return request.url_for("static", path=f"img/{filename}")
+            return static_manifest.url(filename)
+        return static_manifest.url(f"img/{filename}")
     return ""
 
 
+def make_etag(*parts: Any) -> str:
+    """
+    Strong ETag from arbitrary version parts (timestamps, ids, template version).
+    """
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def conditional_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """
+    Validators for a response. no-cache: browsers and nginx may store the page but must revalidate.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    RFC 9110 evaluation: If-None-Match wins over If-Modified-Since.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP-date has one-second resolution
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
 async def read_yaml_async(file_path: str):
     """Асинхронно читает YAML файл и возвращает два документа (meta, init_data)."""
     try:
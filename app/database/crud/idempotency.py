@@ -0,0 +1,77 @@
+from datetime import timedelta
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database.models import IdempotencyKey
+
+
+class IdempotencyRecord(NamedTuple):
+    fingerprint: str
+    # None — первый запрос ещё выполняется
+    response: Optional[Dict]
+
+
+async def claim_idempotency_key(
+    session: AsyncSession,
+    key: str,
+    fingerprint: str,
+    lock_seconds: int
+) -> Optional[IdempotencyRecord]:
+    """
+    Занимает ключ: INSERT ... ON CONFLICT DO NOTHING.
+    None — ключ занят этим вызовом (выполнять запрос ему), иначе — уже существующая запись.
+    Истёкшая запись (ответ устарел или процесс упал посреди запроса) сначала удаляется.
+    """
+    await session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.expires_at < func.now())
+    )
+    claimed = await session.scalar(
+        insert(IdempotencyKey)
+        .values(key=key, fingerprint=fingerprint, expires_at=func.now() + timedelta(seconds=lock_seconds))
+        .on_conflict_do_nothing(index_elements=["key"])
+        .returning(IdempotencyKey.key)
+    )
+    record = None
+    if claimed is None:
+        record = await get_idempotency_key(session, key)
+    await session.commit()
+    if claimed is None and record is None:
+        # запись удалили между INSERT и SELECT — занимаем заново
+        return await claim_idempotency_key(session, key, fingerprint, lock_seconds)
+    return record
+
+
+async def get_idempotency_key(session: AsyncSession, key: str) -> Optional[IdempotencyRecord]:
+    """Неистёкшая запись ключа или None."""
+    row = (await session.execute(
+        select(IdempotencyKey.fingerprint, IdempotencyKey.response)
+        .where(IdempotencyKey.key == key, IdempotencyKey.expires_at >= func.now())
+    )).first()
+    return IdempotencyRecord(row.fingerprint, row.response) if row else None
+
+
+async def store_idempotent_response(session: AsyncSession, key: str, response: Dict, ttl_seconds: int) -> None:
+    """Первый ответ сохранён: повторы получают его ttl_seconds (отсчёт — от готового ответа)."""
+    await session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key)
+        .values(response=response, expires_at=func.now() + timedelta(seconds=ttl_seconds))
+    )
+    await session.commit()
+
+
+async def release_idempotency_key(session: AsyncSession, key: str) -> None:
+    """Первый запрос не удался: ключ освобождается, повтор выполнится заново."""
+    await session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.response.is_(None))
+    )
+    await session.commit()
+
+
+async def delete_expired_idempotency_keys(session: AsyncSession) -> int:
+    result = await session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < func.now()))
+    await session.commit()
+    return result.rowcount
@@ -0,0 +1,254 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import Boolean, Float, Integer, Text, and_, case, column, delete, func, or_, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.database.models import Job
+from app.schemas import JobRead
+
+# Виды задач (Job.kind); обработчики регистрируются в app.core.job_queue
+JOB_GUIDE_EMAIL = "guide_email"
+
+
+class NewJob(NamedTuple):
+    kind: str
+    payload: Dict
+    dedup_key: Optional[str] = None
+    run_at: Optional[datetime] = None
+    max_attempts: Optional[int] = None
+
+
+class JobFailure(NamedTuple):
+    error: str
+    retry_delay: float
+    # True — без повторов, сразу в dead
+    permanent: bool = False
+
+
+async def enqueue_jobs(
+    session: AsyncSession,
+    jobs: Sequence[NewJob],
+    commit: bool = True
+) -> int:
+    """
+    Ставит задачи в очередь одним INSERT. Задача с уже существующим dedup_key пропускается.
+    commit=False — задачи попадают в транзакцию вызывающего кода и появятся
+    в очереди только вместе с его изменениями (или не появятся вовсе при откате).
+    Возвращает число реально созданных задач.
+    """
+    if not jobs:
+        return 0
+    now = datetime.now(timezone.utc)
+    query = (
+        insert(Job)
+        .values([
+            {
+                "kind": job.kind,
+                "payload": job.payload,
+                "dedup_key": job.dedup_key,
+                "status": "queued",
+                "attempts": 0,
+                "max_attempts": job.max_attempts or settings.JOBS_MAX_ATTEMPTS,
+                "run_at": job.run_at or now,
+            }
+            for job in jobs
+        ])
+        .on_conflict_do_nothing(index_elements=["dedup_key"])
+        .returning(Job.id)
+    )
+    result = await session.execute(query)
+    created = len(result.all())
+    if commit:
+        await session.commit()
+    return created
+
+
+async def enqueue_job(
+    session: AsyncSession,
+    kind: str,
+    payload: Dict,
+    dedup_key: Optional[str] = None,
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+    commit: bool = True
+) -> bool:
+    """Одна задача (см. enqueue_jobs). False — задача с таким dedup_key уже есть."""
+    return bool(await enqueue_jobs(session, [NewJob(kind, payload, dedup_key, run_at, max_attempts)], commit=commit))
+
+
+async def claim_jobs(
+    session: AsyncSession,
+    kind: str,
+    worker_id: str,
+    limit: int,
+    lease_seconds: int
+) -> List[JobRead]:
+    """
+    Забирает до limit готовых задач вида kind и берёт их в аренду на lease_seconds:
+    UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING.
+    - строки, уже выбранные другим воркером, пропускаются, а не ждут его коммита —
+      воркеры (и процессы) не блокируют друг друга;
+    - задача со status = "running" и истёкшей арендой (воркер упал) забирается снова;
+      если попытки уже исчерпаны — переводится в dead.
+    attempts увеличивается при захвате, поэтому падение посреди задачи тоже считается попыткой.
+    """
+    now = func.now()
+    expired = and_(Job.status == "running", Job.locked_until < now)
+
+    exhausted = (
+        select(Job.id)
+        .where(Job.kind == kind, expired, Job.attempts >= Job.max_attempts)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    await session.execute(
+        update(Job)
+        .where(Job.id.in_(exhausted))
+        .values(status="dead", locked_by=None, locked_until=None, last_error="lease expired", updated_at=now)
+    )
+
+    candidates = (
+        select(Job.id)
+        .where(
+            Job.kind == kind,
+            or_(and_(Job.status == "queued", Job.run_at <= now), expired),
+        )
+        .order_by(Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        update(Job)
+        .where(Job.id.in_(candidates))
+        .values(
+            status="running",
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=lease_seconds),
+            attempts=Job.attempts + 1,
+            updated_at=now,
+        )
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+    )
+    jobs = [JobRead.model_validate(dict(row._mapping)) for row in result]
+    await session.commit()
+    return jobs
+
+
+async def extend_job_leases(
+    session: AsyncSession,
+    job_ids: List[int],
+    worker_id: str,
+    lease_seconds: int
+) -> List[int]:
+    """
+    Продлевает аренду задач воркера до now() + lease_seconds.
+    Возвращает id задач, аренда которых ещё у этого воркера (остальные уже забрал другой).
+    """
+    if not job_ids:
+        return []
+    result = await session.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.locked_by == worker_id, Job.status == "running")
+        .values(locked_until=func.now() + timedelta(seconds=lease_seconds))
+        .returning(Job.id)
+    )
+    extended = [row.id for row in result]
+    await session.commit()
+    return extended
+
+
+async def complete_jobs(
+    session: AsyncSession,
+    job_ids: List[int],
+    worker_id: str
+) -> int:
+    """
+    Выполненные задачи удаляются (таблица и её индексы остаются маленькими).
+    Только пока аренда у этого воркера: если она истекла и задачу забрал другой, строку не трогаем.
+    """
+    if not job_ids:
+        return 0
+    result = await session.execute(
+        delete(Job).where(Job.id.in_(job_ids), Job.locked_by == worker_id, Job.status == "running")
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def fail_jobs(
+    session: AsyncSession,
+    failures: Dict[int, JobFailure],
+    worker_id: str
+) -> int:
+    """
+    Неудачные попытки одним UPDATE ... FROM (VALUES ...):
+    - permanent или attempts >= max_attempts — status = "dead" (остаётся в таблице для разбора);
+    - иначе обратно в queued с run_at = now() + retry_delay.
+    Возвращает число задач, отправленных в dead.
+    """
+    if not failures:
+        return 0
+    failed = values(
+        column("id", Integer),
+        column("error", Text),
+        column("retry_delay", Float),
+        column("permanent", Boolean),
+        name="failed",
+    ).data([(job_id, failure.error[:2000], failure.retry_delay, failure.permanent) for job_id, failure in failures.items()])
+
+    is_dead = or_(failed.c.permanent, Job.attempts >= Job.max_attempts)
+    result = await session.execute(
+        update(Job)
+        .where(Job.id == failed.c.id, Job.locked_by == worker_id, Job.status == "running")
+        .values(
+            status=case((is_dead, "dead"), else_="queued"),
+            run_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, failed.c.retry_delay),
+            locked_by=None,
+            locked_until=None,
+            last_error=failed.c.error,
+            updated_at=func.now(),
+        )
+        .returning(Job.status)
+    )
+    dead = sum(1 for row in result if row.status == "dead")
+    await session.commit()
+    return dead
+
+
+async def job_stats(session: AsyncSession) -> Dict[str, Dict[str, int]]:
+    """{kind: {status: count, ..., "oldest_queued_seconds": ...}} — для метрик."""
+    result = await session.execute(
+        select(
+            Job.kind,
+            Job.status,
+            func.count(),
+            func.extract("epoch", func.now() - func.min(Job.run_at)),
+        ).group_by(Job.kind, Job.status)
+    )
+    stats: Dict[str, Dict[str, int]] = {}
+    for kind, status, count, oldest in result:
+        stats.setdefault(kind, {})[status] = count
+        if status == "queued":
+            stats[kind]["oldest_queued_seconds"] = max(0, int(oldest or 0))
+    return stats
+
+
+async def requeue_dead_jobs(
+    session: AsyncSession,
+    kind: Optional[str] = None
+) -> int:
+    """Задачи из dead — снова в очередь с нулём попыток (после исправления причины)."""
+    query = (
+        update(Job)
+        .where(Job.status == "dead")
+        .values(status="queued", attempts=0, run_at=func.now(), last_error=None, updated_at=func.now())
+    )
+    if kind is not None:
+        query = query.where(Job.kind == kind)
+    result = await session.execute(query)
+    await session.commit()
+    return result.rowcount
@@ -1,12 +1,37 @@
-from typing import List, Optional, Dict, Any
+import base64
+import json
+from typing import AsyncIterator, List, Optional, Dict, Any, Sequence, Tuple
 from datetime import datetime, timezone
 
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import Row, String, case, column, func, tuple_, update, values
 from sqlalchemy.exc import IntegrityError
 
+from app.core.config import settings
+from app.database.crud.jobs import JOB_GUIDE_EMAIL, NewJob, enqueue_jobs
 from app.database.models import Order
-from app.schemas import OrderUpdate, OrderSave, OrderRead
+from app.schemas import OrderUpdate, OrderSave, OrderRead, OrderPage
+
+# Финальные состояния заказа: после них провайдер статус не меняет, откат не допускается
+TERMINAL_ORDER_STATES = ("completed", "cancelled", "failed")
+
+# Порядок состояний в жизненном цикле заказа: состояние меняется только вперёд
+ORDER_STATE_RANK = {"pending": 0, "processing": 1, "authorised": 2, **{state: 3 for state in TERMINAL_ORDER_STATES}}
+
+# Оплаченные состояния: при переходе в них покупателю отправляется путеводитель
+PAID_ORDER_STATES = ("completed",)
+
+# Колонки выгрузки заказов, в порядке CSV-заголовка
+ORDER_EXPORT_COLUMNS = (
+    "id", "created_at", "updated_at", "state", "type",
+    "product_code", "lang", "customers_email",
+    "amount", "currency", "outstanding_amount", "settlement_currency",
+    "capture_mode", "enforce_challenge", "authorisation_type",
+)
+
+# Порядок списков заказов: новые сверху, id — для однозначности при равном created_at
+ORDER_LIST_ORDERING = (Order.created_at.desc(), Order.id.desc())
 
 
 async def create_order(
@@ -42,24 +67,144 @@ async def get_order_by_id(
     return OrderRead.model_validate(order.model_dump())
 
 
+async def get_order_by_checkout_ref(
+    session: AsyncSession,
+    checkout_ref: str
+) -> Optional[OrderRead]:
+    """
+    Заказ по checkout_ref из redirect_url страницы "спасибо" (уникальный индекс).
+    """
+    query = select(Order).where(Order.checkout_ref == checkout_ref)
+    result = await session.execute(query)
+    order = result.scalar_one_or_none()
+    if order is None:
+        return None
+    return OrderRead.model_validate(order.model_dump())
+
+
 async def list_orders(
     session: AsyncSession,
     limit: int = 100,
     offset: int = 0
 ) -> List[OrderRead]:
-    query = select(Order).offset(offset).limit(limit)
+    query = select(Order).order_by(*ORDER_LIST_ORDERING).offset(offset).limit(limit)
     result = await session.execute(query)
     items = result.scalars().all()
     return [OrderRead.model_validate(item.model_dump()) for item in items]
 
 
+def encode_order_cursor(created_at: datetime, order_id: str) -> str:
+    """(created_at, id) последней строки страницы -> непрозрачный курсор (base64url от JSON)."""
+    raw = json.dumps([created_at.isoformat(), order_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_order_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Обратно к (created_at, id). Для испорченного курсора — ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, order_id = json.loads(raw)
+        created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Некорректный курсор") from exc
+    if not isinstance(order_id, str) or created_at.tzinfo is None:
+        raise ValueError("Некорректный курсор")
+    return created_at, order_id
+
+
+async def list_orders_page(
+    session: AsyncSession,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    state: Optional[str] = None,
+    product_code: Optional[str] = None
+) -> OrderPage:
+    """
+    Страница заказов, новые сверху (created_at DESC, id DESC), с фильтрами по state / product_code.
+    Пагинация по ключу: следующая страница — строки с (created_at, id) < курсора.
+    В отличие от offset стоимость страницы не зависит от её номера (индексы
+    ix_orders_*_created_at_id), а новые заказы не сдвигают уже просмотренные страницы.
+    next_cursor = None — это последняя страница. Испорченный курсор — ValueError.
+    """
+    query = select(Order)
+    if state is not None:
+        query = query.where(Order.state == state)
+    if product_code is not None:
+        query = query.where(Order.product_code == product_code)
+    if cursor:
+        created_at, order_id = decode_order_cursor(cursor)
+        query = query.where(tuple_(Order.created_at, Order.id) < tuple_(created_at, order_id))
+    # лишняя строка — признак того, что есть следующая страница
+    query = query.order_by(*ORDER_LIST_ORDERING).limit(limit + 1)
+    result = await session.execute(query)
+    items = result.scalars().all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_order_cursor(items[-1].created_at, items[-1].id)
+    return OrderPage(
+        items=[OrderRead.model_validate(item.model_dump()) for item in items],
+        next_cursor=next_cursor,
+    )
+
+
+async def stream_orders(
+    session: AsyncSession,
+    state: Optional[str] = None,
+    product_code: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    batch_size: int = 1000
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Заказы для выгрузки пачками по batch_size строк (колонки ORDER_EXPORT_COLUMNS),
+    в порядке created_at, id; created_to — не включительно.
+    Читает через серверный курсор (session.stream + yield_per): в памяти одна пачка,
+    без ORM-объектов и OrderRead, сколько бы заказов ни попало в выборку.
+    Курсор живёт в транзакции session — не закрывать её, пока итерация не закончена.
+    """
+    query = select(*(Order.__table__.c[name] for name in ORDER_EXPORT_COLUMNS))
+    if state is not None:
+        query = query.where(Order.state == state)
+    if product_code is not None:
+        query = query.where(Order.product_code == product_code)
+    if created_from is not None:
+        query = query.where(Order.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(Order.created_at < created_to)
+    query = query.order_by(Order.created_at, Order.id).execution_options(yield_per=batch_size)
+
+    result = await session.stream(query)
+    async for partition in result.partitions():
+        yield partition
+
+
 async def list_orders_by_status(
     session: AsyncSession,
     status: str,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    updated_before: Optional[datetime] = None,
+    after_id: Optional[str] = None,
+    created_after: Optional[datetime] = None
 ) -> List[OrderRead]:
-    query = select(Order).where(Order.state == status).offset(offset).limit(limit)
+    """
+    Заказы в состоянии status.
+    - updated_before — только заказы, не менявшиеся с этого момента;
+    - created_after — только заказы, созданные после этого момента;
+    - after_id — постраничный обход по ключу (id > after_id, сортировка по id) вместо offset:
+      стоимость страницы не растёт с номером, а изменённые между страницами строки не сдвигают выборку.
+    """
+    query = select(Order).where(Order.state == status)
+    if updated_before is not None:
+        query = query.where(Order.updated_at < updated_before)
+    if created_after is not None:
+        query = query.where(Order.created_at > created_after)
+    if after_id is not None:
+        query = query.where(Order.id > after_id).order_by(Order.id).limit(limit)
+    else:
+        query = query.order_by(*ORDER_LIST_ORDERING).offset(offset).limit(limit)
     result = await session.execute(query)
     items = result.scalars().all()
     return [OrderRead.model_validate(item.model_dump()) for item in items]
@@ -80,7 +225,7 @@ async def list_orders_by_product(
     else:
         return []
 
-    query = query.offset(offset).limit(limit)
+    query = query.order_by(*ORDER_LIST_ORDERING).offset(offset).limit(limit)
     result = await session.execute(query)
     items = result.scalars().all()
     return [OrderRead.model_validate(item.model_dump()) for item in items]
@@ -141,3 +286,73 @@ async def update_order(
         raise ValueError("Не удалось обновить заказ: возможен конфликт данных") from exc
 
     return OrderRead.model_validate(order.model_dump())
+
+
+def _state_rank(state_column):
+    """ORDER_STATE_RANK в SQL: CASE state WHEN 'pending' THEN 0 ... END."""
+    return case(ORDER_STATE_RANK, value=state_column, else_=0)
+
+
+async def apply_order_states(
+    session: AsyncSession,
+    states: Dict[str, str]
+) -> List[Tuple[str, str]]:
+    """
+    Пакетное обновление состояний заказов одним запросом:
+    UPDATE orders SET state = v.state FROM (VALUES (id, state), ...) AS v WHERE orders.id = v.id
+    - заказы в финальном состоянии (TERMINAL_ORDER_STATES) не меняются;
+    - состояние меняется только вперёд по ORDER_STATE_RANK: запоздавший webhook или ответ сверки
+      ("processing" после уже записанного "authorised") не откатывает заказ;
+    - строки, где состояние уже совпадает, не трогаются (updated_at не сдвигается);
+    - для заказов, перешедших в оплаченное состояние (PAID_ORDER_STATES), в той же транзакции
+      ставится задача отправки путеводителя (jobs): переход фиксируется только один раз,
+      а dedup_key защищает от повторной постановки.
+    Возвращает список (order_id, new_state) реально изменённых заказов.
+    """
+    if not states:
+        return []
+
+    new_states = values(
+        column("id", String),
+        column("state", String),
+        name="new_states",
+    ).data(list(states.items()))
+
+    query = (
+        update(Order)
+        .where(
+            Order.id == new_states.c.id,
+            Order.state.not_in(TERMINAL_ORDER_STATES),
+            _state_rank(Order.state) < _state_rank(new_states.c.state),
+        )
+        .values(state=new_states.c.state, updated_at=func.now())
+        .returning(
+            Order.id, Order.state, Order.customers_email, Order.product_code, Order.lang, Order.checkout_ref
+        )
+    )
+    result = await session.execute(query)
+    rows = result.all()
+    changed = [(row.id, row.state) for row in rows]
+    if settings.EMAIL_ENABLED:
+        await enqueue_jobs(
+            session,
+            [
+                NewJob(
+                    kind=JOB_GUIDE_EMAIL,
+                    payload={
+                        "order_id": row.id,
+                        "email": row.customers_email,
+                        "product_code": row.product_code,
+                        "lang": getattr(row.lang, "value", row.lang),
+                        "checkout_ref": row.checkout_ref,
+                    },
+                    dedup_key=f"{JOB_GUIDE_EMAIL}:{row.id}",
+                    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+                )
+                for row in rows
+                if row.state in PAID_ORDER_STATES
+            ],
+            commit=False,
+        )
+    await session.commit()
+    return changed
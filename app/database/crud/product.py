@@ -4,6 +4,9 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
+from app.core.cache import invalidate_catalog_pages
+from app.core.file_index import product_file_index
+from app.database.crud.product_files import refresh_product_file_index
 from app.database.models import Product
 from app.schemas import ProductCreate, ProductUpdate
 
@@ -21,6 +24,7 @@ async def create_product(
     try:
         await session.commit()
         await session.refresh(product)
+        invalidate_catalog_pages()
         return product
     except IntegrityError as exc:
         await session.rollback()
@@ -108,11 +112,15 @@ async def update_product(
         session.add(product)
         await session.commit()
         await session.refresh(product)
-        return product
+        invalidate_catalog_pages()
     except IntegrityError as exc:
         await session.rollback()
         raise ValueError("Не удалось обновить продукт: возможен конфликт уникальности") from exc
 
+    # product_code и updated_at входят в индекс файлов
+    await refresh_product_file_index(session, product.id)
+    return product
+
 
 async def delete_product(
     session: AsyncSession,
@@ -128,4 +136,6 @@ async def delete_product(
 
     await session.delete(product)
     await session.commit()
+    invalidate_catalog_pages()
+    product_file_index.remove_product(product_id)
     return True
@@ -4,6 +4,8 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
+from app.core.cache import invalidate_catalog_pages
+from app.core.utils import description_to_html
 from app.database.models import ProductCard
 from app.schemas import ProductCardCreate, ProductCardUpdate, ProductCardResponse
 
@@ -15,12 +17,17 @@ async def create_product_card(
     """
     Создаёт ProductCard и возвращает Pydantic-схему ProductCardResponse.
     Обрабатывает конфликт уникальности (product_id, lang).
+    description_html рендерится здесь, чтобы не делать это на каждый просмотр страницы.
     """
-    product_card = ProductCard(**product_card_in.model_dump())
+    product_card = ProductCard(
+        **product_card_in.model_dump(),
+        description_html=await description_to_html(product_card_in.description or ""),
+    )
     session.add(product_card)
     try:
         await session.commit()
         await session.refresh(product_card)
+        invalidate_catalog_pages()
     except IntegrityError as exc:
         await session.rollback()
         raise ValueError("Не удалось создать карточку: возможен конфликт уникальности (product_id, lang)") from exc
@@ -108,6 +115,9 @@ async def update_product_card(
     update_data.pop("id", None)
     update_data.pop("product_id", None)
 
+    if "description" in update_data:
+        update_data["description_html"] = await description_to_html(update_data["description"] or "")
+
     if update_data:
         for field, value in update_data.items():
             setattr(product_card, field, value)
@@ -116,6 +126,7 @@ async def update_product_card(
             session.add(product_card)
             await session.commit()
             await session.refresh(product_card)
+            invalidate_catalog_pages()
         except IntegrityError as exc:
             await session.rollback()
             raise ValueError("Не удалось обновить карточку: возможен конфликт уникальности") from exc
@@ -139,4 +150,5 @@ async def delete_product_card(
 
     await session.delete(product_card)
     await session.commit()
+    invalidate_catalog_pages()
     return True
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, select, update, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import invalidate_catalog_pages
+from app.core.config import settings
+from app.core.images import process_image, remove_variant_files
+from app.core.static_manifest import static_manifest
+from app.database.models import ProductCardImage, ProductCardImageVariant
+from app.schemas import ProductCardImageVariantResponse
+
+logger = logging.getLogger(__name__)
+
+
+async def list_image_variants(
+    session: AsyncSession,
+    image_id: int
+) -> List[ProductCardImageVariantResponse]:
+    """
+    Варианты изображения, отсортированные по формату и ширине.
+    """
+    result = await session.execute(
+        select(ProductCardImageVariant)
+        .where(ProductCardImageVariant.image_id == image_id)
+        .order_by(ProductCardImageVariant.format, ProductCardImageVariant.width)
+    )
+    return [ProductCardImageVariantResponse.model_validate(v, from_attributes=True) for v in result.scalars().all()]
+
+
+async def delete_image_variants(
+    session: AsyncSession,
+    image_id: int
+) -> List[str]:
+    """
+    Удаляет записи о вариантах изображения. Коммит — на стороне вызывающего кода.
+    Возвращает url удалённых вариантов: после коммита их файлы убирает remove_stale_variant_files.
+    """
+    result = await session.execute(
+        delete(ProductCardImageVariant)
+        .where(ProductCardImageVariant.image_id == image_id)
+        .returning(ProductCardImageVariant.url)
+    )
+    return list(result.scalars().all())
+
+
+async def remove_stale_variant_files(
+    session: AsyncSession,
+    urls: List[str]
+) -> int:
+    """
+    Удаляет с диска файлы вариантов, на которые больше не ссылается ни одна запись
+    (у изображений с одним и тем же исходным файлом файлы вариантов общие).
+    Вызывать после коммита: при откате файлы должны остаться.
+    """
+    if not urls:
+        return 0
+    result = await session.execute(
+        select(ProductCardImageVariant.url).where(ProductCardImageVariant.url.in_(urls))
+    )
+    stale = sorted(set(urls) - set(result.scalars().all()))
+    return await asyncio.to_thread(remove_variant_files, stale)
+
+
+async def replace_image_variants(
+    session: AsyncSession,
+    image_id: int,
+    variants: List[Dict],
+    metadata: Optional[Dict] = None
+) -> List[ProductCardImageVariantResponse]:
+    """
+    Заменяет набор вариантов изображения (и его метаданные, если переданы) одной транзакцией.
+    updated_at изображения сдвигается, чтобы сменилась версия контента страницы (ETag, pre-render).
+    Файлы прежних вариантов, которых нет в новом наборе, удаляются после коммита.
+    """
+    old_urls = await delete_image_variants(session, image_id)
+    rows = [ProductCardImageVariant(image_id=image_id, **variant) for variant in variants]
+    session.add_all(rows)
+    await session.execute(
+        update(ProductCardImage)
+        .where(ProductCardImage.id == image_id)
+        .values(updated_at=func.now(), **(metadata or {}))
+    )
+    await session.commit()
+    invalidate_catalog_pages()
+    await remove_stale_variant_files(session, old_urls)
+    return [ProductCardImageVariantResponse.model_validate(row, from_attributes=True) for row in rows]
+
+
+async def generate_image_variants(
+    session: AsyncSession,
+    image_id: int,
+    url: str
+) -> List[ProductCardImageVariantResponse]:
+    """
+    Обрабатывает файл в пуле потоков (Pillow блокирует): метаданные изображения
+    (размеры, вес, доминирующий цвет, превью) и WebP/JPEG варианты записываются в БД.
+    Ошибка обработки файла не должна ломать запись изображения — логируем и возвращаем [].
+    """
+    try:
+        metadata, variants = await asyncio.to_thread(process_image, url)
+        # хэшируем новые файлы сразу, чтобы страницы ссылались на них по immutable URL
+        await asyncio.to_thread(lambda: [static_manifest.add(variant["url"]) for variant in variants])
+    except (OSError, ValueError):
+        logger.exception("Failed to process image %s (%s)", image_id, url)
+        return []
+    if metadata is not None:
+        warn_if_oversized(image_id, url, metadata)
+    return await replace_image_variants(session, image_id, variants, metadata)
+
+
+def warn_if_oversized(image_id: int, url: str, metadata: Dict) -> None:
+    """
+    Предупреждение о слишком тяжёлых загрузках (пороги — IMAGE_OVERSIZED_*).
+    """
+    if metadata["bytes"] > settings.IMAGE_OVERSIZED_BYTES or metadata["width"] > settings.IMAGE_OVERSIZED_WIDTH:
+        logger.warning(
+            "Oversized image %s (%s): %sx%s, %s bytes",
+            image_id, url, metadata["width"], metadata["height"], metadata["bytes"],
+        )
@@ -4,7 +4,14 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
+from app.core.cache import invalidate_catalog_pages
+from app.core.utils import description_to_html
 from app.database.models import ProductCardImage
+from app.database.crud.product_card_image_variants import (
+    generate_image_variants,
+    delete_image_variants,
+    remove_stale_variant_files,
+)
 from app.schemas import ProductCardImageCreate, ProductCardImageUpdate, ProductCardImageResponse
 
 
@@ -15,18 +22,26 @@ async def create_product_card_image(
     """
     Создаёт запись ProductCardImage и возвращает ProductCardImageResponse.
     Откатывает транзакцию при IntegrityError.
+    description_html рендерится при записи, а не на каждый просмотр страницы.
+    После сохранения извлекаются метаданные и генерируются уменьшенные варианты (srcset).
     """
-    image = ProductCardImage(**image_in.model_dump())
+    image = ProductCardImage(
+        **image_in.model_dump(),
+        description_html=await description_to_html(image_in.description or ""),
+    )
     session.add(image)
     try:
         await session.commit()
         await session.refresh(image)
+        invalidate_catalog_pages()
     except IntegrityError as exc:
         await session.rollback()
         # Можно логировать exc.args
         raise ValueError("Не удалось создать изображение: возможен конфликт или неверные данные") from exc
 
-    return ProductCardImageResponse.model_validate(image.model_dump())
+    variants = await generate_image_variants(session, image.id, image.url)
+    await session.refresh(image)
+    return ProductCardImageResponse.model_validate({**image.model_dump(), "variants": variants})
 
 
 async def get_product_card_image_by_id(
@@ -72,6 +87,7 @@ async def update_product_card_image(
     Частичное обновление изображения:
     - применяются только поля из image_in (exclude_none=True);
     - id и product_card_id защищены от изменения;
+    - при смене url метаданные и варианты изображения генерируются заново;
     - возвращает обновлённую Pydantic‑схему или None, если запись не найдена.
     """
     query = select(ProductCardImage).where(ProductCardImage.id == image_id)
@@ -85,9 +101,14 @@ async def update_product_card_image(
     update_data.pop("id", None)
     update_data.pop("product_card_id", None)
 
+    if "description" in update_data:
+        update_data["description_html"] = await description_to_html(update_data["description"] or "")
+
     if not update_data:
         return ProductCardImageResponse.model_validate(image.model_dump())
 
+    url_changed = "url" in update_data and update_data["url"] != image.url
+
     for field, value in update_data.items():
         setattr(image, field, value)
 
@@ -95,10 +116,15 @@ async def update_product_card_image(
         session.add(image)
         await session.commit()
         await session.refresh(image)
+        invalidate_catalog_pages()
     except IntegrityError as exc:
         await session.rollback()
         raise ValueError("Не удалось обновить изображение: возможен конфликт данных") from exc
 
+    if url_changed:
+        variants = await generate_image_variants(session, image.id, image.url)
+        await session.refresh(image)
+        return ProductCardImageResponse.model_validate({**image.model_dump(), "variants": variants})
     return ProductCardImageResponse.model_validate(image.model_dump())
 
 
@@ -116,6 +142,9 @@ async def delete_product_card_image(
     if image is None:
         return False
 
+    variant_urls = await delete_image_variants(session, image.id)
     await session.delete(image)
     await session.commit()
+    invalidate_catalog_pages()
+    await remove_stale_variant_files(session, variant_urls)
     return True
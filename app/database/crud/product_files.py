@@ -1,8 +1,10 @@
+import asyncio
 from typing import Optional, List
 
 from sqlalchemy import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.database.models.product import Product
 from app.database.models.product_files import ProductFile
 from app.schemas.product_file import (
     ProductFileCreate,
@@ -10,6 +12,8 @@ from app.schemas.product_file import (
     ProductFileResponse,
 )
 from app.core.config import Languages
+from app.core.utils import file_description_to_html
+from app.core.file_index import IndexedFile, build_indexed_file, product_file_index
 
 
 # ---------------------------------------------------------
@@ -28,8 +32,12 @@ async def create_product_file(
     )
 
     session.add(product_file)
+    # id нужен для ссылки на скачивание внутри description_html
+    await session.flush()
+    product_file.description_html = file_description_to_html(product_file.description, product_file.id)
     await session.commit()
     await session.refresh(product_file)
+    await refresh_product_file_index(session, product_file.product_id)
 
     return ProductFileResponse.model_validate(product_file, from_attributes=True)
 
@@ -93,6 +101,7 @@ async def update_product_file(
     if not product_file:
         return None
 
+    old_product_id = product_file.product_id
     update_data = data.model_dump(exclude_unset=True)
 
     if "lang" in update_data:
@@ -105,9 +114,16 @@ async def update_product_file(
     for key, value in update_data.items():
         setattr(product_file, key, value)
 
+    if "description" in update_data:
+        product_file.description_html = file_description_to_html(product_file.description, product_file.id)
+
     session.add(product_file)
     await session.commit()
     await session.refresh(product_file)
+    product_file_index.remove(product_file.id)
+    await refresh_product_file_index(session, product_file.product_id)
+    if old_product_id != product_file.product_id:
+        await refresh_product_file_index(session, old_product_id)
 
     return ProductFileResponse.model_validate(product_file, from_attributes=True)
 
@@ -130,4 +146,102 @@ async def delete_product_file(
 
     await session.delete(product_file)
     await session.commit()
+    product_file_index.remove(file_id)
     return True
+
+
+# ---------------------------------------------------------
+# IN-MEMORY INDEX (download / thank-you)
+# ---------------------------------------------------------
+def _index_query():
+    return (
+        select(
+            ProductFile.id,
+            ProductFile.product_id,
+            Product.product_code,
+            ProductFile.lang,
+            ProductFile.file_link,
+            ProductFile.description,
+            ProductFile.description_html,
+            ProductFile.updated_at,
+            Product.updated_at.label("product_updated_at"),
+        )
+        .join(Product, Product.id == ProductFile.product_id)
+    )
+
+
+async def _index_entries(session: AsyncSession, query) -> List[IndexedFile]:
+    rows = (await session.execute(query)).all()
+    # resolve()/stat() — блокирующие вызовы, выполняем вне event loop
+    return await asyncio.to_thread(lambda: [build_indexed_file(*row) for row in rows])
+
+
+async def load_product_file_index(session: AsyncSession) -> int:
+    """
+    Полная загрузка индекса файлов (при старте приложения). Возвращает число записей.
+    """
+    entries = await _index_entries(session, _index_query())
+    product_file_index.replace_all(entries)
+    return len(entries)
+
+
+async def refresh_product_file_index(session: AsyncSession, product_id: int) -> None:
+    """
+    Перечитывает записи индекса одного продукта (после записи в product_files / products).
+    """
+    entries = await _index_entries(session, _index_query().where(ProductFile.product_id == product_id))
+    product_file_index.remove_product(product_id)
+    for entry in entries:
+        product_file_index.put(entry)
+
+
+def _version_query():
+    return (
+        select(ProductFile.id, ProductFile.updated_at, Product.updated_at.label("product_updated_at"))
+        .join(Product, Product.id == ProductFile.product_id)
+    )
+
+
+async def _current_index_entry(session: AsyncSession, entry: Optional[IndexedFile], *where) -> Optional[IndexedFile]:
+    """
+    Запись индекса, сверенная с БД по версии (updated_at файла и продукта): один лёгкий
+    запрос без stat, поэтому запись в product_files / products в другом процессе видна
+    на следующем запросе. При промахе, сменившейся версии или файле, которого не было
+    на диске, запись перечитывается (со stat) и кладётся в индекс.
+    """
+    if entry is not None and entry.path is not None:
+        row = (await session.execute(_version_query().where(*where))).one_or_none()
+        if row is not None and tuple(row) == (entry.file_id, entry.updated_at, entry.product_updated_at):
+            return entry
+    if entry is not None:
+        product_file_index.remove(entry.file_id)
+    entries = await _index_entries(session, _index_query().where(*where))
+    for fresh in entries:
+        product_file_index.put(fresh)
+    return entries[0] if entries else None
+
+
+async def get_indexed_file(
+    session: AsyncSession,
+    file_id: int
+) -> Optional[IndexedFile]:
+    """
+    Файл из индекса, сверенный с БД по версии; при промахе — запись читается из БД.
+    """
+    return await _current_index_entry(session, product_file_index.get(file_id), ProductFile.id == file_id)
+
+
+async def get_indexed_file_by_product(
+    session: AsyncSession,
+    product_code: str,
+    lang: Languages
+) -> Optional[IndexedFile]:
+    """
+    Файл продукта для языка из индекса, сверенный с БД по версии; при промахе — запись читается из БД.
+    """
+    return await _current_index_entry(
+        session,
+        product_file_index.get_by_product(product_code, lang.value),
+        Product.product_code == product_code,
+        ProductFile.lang == lang.value,
+    )
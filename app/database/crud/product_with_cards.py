@@ -1,10 +1,82 @@
-from typing import Optional, List, Dict
+from typing import Dict, Optional, Tuple
 
-from sqlmodel import select
+from sqlalchemy import select, func, text
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database.models import Product, ProductCard, ProductCardImage
-from app.schemas import ProductWithCardResponse, ProductCardImageResponse
+from app.database.models import Product, ProductCard, ProductCardImage, ProductCardImageVariant
+from app.schemas import ProductWithCardResponse
+
+
+def _variants_json_agg():
+    """
+    Коррелированный подзапрос: варианты изображения (srcset) в виде JSON-массива.
+    """
+    variant_json = func.json_build_object(
+        "width", ProductCardImageVariant.width,
+        "height", ProductCardImageVariant.height,
+        "format", ProductCardImageVariant.format,
+        "url", ProductCardImageVariant.url,
+    )
+    return (
+        select(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(variant_json, ProductCardImageVariant.width)),
+                text("'[]'::json"),
+            )
+        )
+        .where(ProductCardImageVariant.image_id == ProductCardImage.id)
+        .correlate(ProductCardImage)
+        .scalar_subquery()
+    )
+
+
+def _images_json_agg():
+    """
+    json_agg изображений карточки (вместе с вариантами), упорядоченных по position.
+    Для карточки без изображений возвращает пустой массив.
+    """
+    image_json = func.json_build_object(
+        "id", ProductCardImage.id,
+        "product_card_id", ProductCardImage.product_card_id,
+        "url", ProductCardImage.url,
+        "alt", ProductCardImage.alt,
+        "description", ProductCardImage.description,
+        "description_html", ProductCardImage.description_html,
+        "position", ProductCardImage.position,
+        "width", ProductCardImage.width,
+        "height", ProductCardImage.height,
+        "bytes", ProductCardImage.bytes,
+        "dominant_color", ProductCardImage.dominant_color,
+        "placeholder", ProductCardImage.placeholder,
+        "variants", _variants_json_agg(),
+        "created_at", ProductCardImage.created_at,
+        "updated_at", ProductCardImage.updated_at,
+    )
+    return func.coalesce(
+        func.json_agg(
+            aggregate_order_by(image_json, ProductCardImage.position, ProductCardImage.id)
+        ).filter(ProductCardImage.id.is_not(None)),
+        text("'[]'::json"),
+        type_=JSON,
+    )
+
+
+def _content_version():
+    """
+    Версия контента страницы продукта: последний updated_at продукта, карточки и изображений
+    (в секундах эпохи) плюс число изображений — удаление изображения не меняет updated_at остальных.
+    Строится в SQL одним выражением для всех запросов: строка не зависит ни от TimeZone
+    сессии, ни от того, как драйвер отдаёт timestamptz.
+    """
+    return func.concat(
+        func.extract(
+            "epoch",
+            func.greatest(Product.updated_at, ProductCard.updated_at, func.max(ProductCardImage.updated_at)),
+        ),
+        "-",
+        func.count(ProductCardImage.id),
+    )
 
 
 async def get_product_with_card_by_code(
@@ -15,56 +87,90 @@ async def get_product_with_card_by_code(
     """
     Возвращает объединённую запись product + card (по lang) и массив изображений.
     Если пара (product_code, lang) не найдена — возвращает None.
-    Выполняет три батч‑запроса: product, card, images.
+    Выполняет один запрос: products JOIN product_card LEFT JOIN product_card_images
+    с json_agg изображений, упорядоченных по position.
     """
-    # 1) product
-    q_prod = select(Product).where(Product.product_code == product_code)
-    result = await session.execute(q_prod)
-    product_obj = result.scalar_one_or_none()
-    if product_obj is None:
+    query = (
+        select(
+            # product
+            Product.id.label("product_id"),
+            Product.product_code,
+            Product.price,
+            Product.currency,
+            Product.updated_at.label("product_updated_at"),
+
+            # card
+            ProductCard.id.label("card_id"),
+            ProductCard.lang,
+            ProductCard.name,
+            ProductCard.description,
+            ProductCard.description_html,
+            ProductCard.updated_at.label("card_updated_at"),
+
+            # images
+            _images_json_agg().label("images"),
+
+            _content_version().label("page_version"),
+        )
+        .join(ProductCard, ProductCard.product_id == Product.id)
+        .outerjoin(ProductCardImage, ProductCardImage.product_card_id == ProductCard.id)
+        .where(
+            Product.product_code == product_code,
+            ProductCard.lang == lang,
+        )
+        .group_by(Product.id, ProductCard.id)
+    )
+    result = await session.execute(query)
+    row = result.mappings().one_or_none()
+    if row is None:
+        # продукта или карточки для данного языка нет — возвращаем None (по бизнес‑логике)
         return None
 
-    product_id = product_obj.id
+    return ProductWithCardResponse.model_validate(dict(row))
 
-    # 2) card по product_id и lang (lang обязателен)
-    q_card = select(ProductCard).where(
-        ProductCard.product_id == product_id,
-        ProductCard.lang == lang
+
+def _page_versions_query():
+    """
+    Версии контента страниц продукта (то же выражение, что в get_product_with_card_by_code).
+    """
+    return (
+        select(
+            Product.product_code,
+            ProductCard.lang,
+            _content_version().label("page_version"),
+        )
+        .join(ProductCard, ProductCard.product_id == Product.id)
+        .outerjoin(ProductCardImage, ProductCardImage.product_card_id == ProductCard.id)
+        .group_by(Product.id, ProductCard.id)
     )
-    result = await session.execute(q_card)
-    card_obj = result.scalar_one_or_none()
-    if card_obj is None:
-        # карточки для данного языка нет — возвращаем None (по бизнес‑логике)
+
+
+async def get_product_page_version(
+    session: AsyncSession,
+    product_code: str,
+    lang: str
+) -> Optional[str]:
+    """
+    Версия контента одной страницы продукта или None, если пары (product_code, lang) нет.
+    Один лёгкий агрегирующий запрос без загрузки описаний и изображений:
+    по нему проверяется, что закэшированный HTML ещё актуален.
+    """
+    query = _page_versions_query().where(
+        Product.product_code == product_code,
+        ProductCard.lang == lang,
+    )
+    row = (await session.execute(query)).one_or_none()
+    if row is None:
         return None
+    return row.page_version
+
 
-    # 3) изображения для найденной карточки (batch)
-    q_images = select(ProductCardImage).where(ProductCardImage.product_card_id == card_obj.id)
-    result = await session.execute(q_images)
-    images: List[ProductCardImage] = result.scalars().all()
-
-    # 4) подготовка payload для ProductWithCardResponse
-    images_schema = [ProductCardImageResponse.model_validate(img.model_dump()) for img in images]
-
-    payload = {
-        # product
-        "product_id": product_obj.id,
-        "product_code": product_obj.product_code,
-        "title": getattr(product_obj, "title", None),
-        "price": getattr(product_obj, "price", None),
-        "currency": getattr(product_obj, "currency", None),
-        "product_created_at": getattr(product_obj, "created_at", None),
-        "product_updated_at": getattr(product_obj, "updated_at", None),
-
-        # card
-        "card_id": card_obj.id,
-        "lang": card_obj.lang,
-        "name": card_obj.name,
-        "description": card_obj.description,
-        "card_created_at": getattr(card_obj, "created_at", None),
-        "card_updated_at": getattr(card_obj, "updated_at", None),
-
-        # images
-        "images": images_schema,
-    }
-
-    return ProductWithCardResponse.model_validate(payload)
+async def list_product_page_versions(
+    session: AsyncSession
+) -> Dict[Tuple[str, str], str]:
+    """
+    Версии контента всех страниц продукта: {(product_code, lang): content_version}.
+    Один агрегирующий запрос; версия совпадает с ProductWithCardResponse.content_version().
+    """
+    result = await session.execute(_page_versions_query())
+    return {(row.product_code, getattr(row.lang, "value", row.lang)): row.page_version for row in result}
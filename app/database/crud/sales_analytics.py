@@ -0,0 +1,183 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import Date, DateTime, String, cast, column, delete, func, insert, literal_column, select, table, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.database.crud.metadata import SystemMetaCRUD
+from app.database.models import Order, SalesDaily
+from app.schemas import SalesDailyRow, SalesTotal, SalesReport
+
+SALES_WATERMARK_KEY = "sales_daily_watermark"
+# pg_try_advisory_xact_lock: пересчёт sales_daily выполняет одна транзакция за раз
+SALES_REFRESH_LOCK_KEY = 0x5E70_0002
+SALES_ORDER_STATE = "completed"
+
+# Корзины, затронутые инкрементальным пересчётом: временная таблица транзакции (ON COMMIT DROP)
+_touched = table(
+    "sales_daily_touched",
+    column("day", Date),
+    column("product_code", String),
+    column("lang", String),
+    column("currency", SalesDaily.__table__.c.currency.type),
+    column("updated_at", DateTime(timezone=True)),
+)
+
+
+def _order_day():
+    """
+    UTC-день заказа: (created_at AT TIME ZONE 'UTC')::date.
+    'UTC' — литерал, а не параметр: выражение должно совпадать в SELECT и GROUP BY.
+    """
+    return cast(func.timezone(literal_column("'UTC'"), Order.created_at), Date)
+
+
+async def get_sales_watermark(session: AsyncSession) -> Optional[datetime]:
+    value = await SystemMetaCRUD.get_value(session, SALES_WATERMARK_KEY)
+    return datetime.fromisoformat(value) if value else None
+
+
+async def refresh_sales_daily(session: AsyncSession, full: bool = False) -> Optional[int]:
+    """
+    Инкрементальный пересчёт sales_daily.
+    - берёт заказы с updated_at > watermark - ANALYTICS_WATERMARK_OVERLAP_SECONDS;
+    - затронутые ими корзины (день, product_code, lang, currency) один раз записываются
+      во временную таблицу и пересчитываются целиком из orders: DELETE + INSERT ... SELECT
+      в одной транзакции, поэтому повторный пересчёт того же окна ничего не портит;
+    - watermark сдвигается на max(updated_at) обработанных заказов.
+    Стоимость пропорциональна числу изменённых заказов, а не всей истории.
+    full=True — таблица строится заново одним GROUP BY по всем заказам.
+    Возвращает число записанных строк сводки; None — пересчёт уже идёт в другой транзакции.
+    """
+    locked = await session.scalar(select(func.pg_try_advisory_xact_lock(SALES_REFRESH_LOCK_KEY)))
+    if not locked:
+        await session.rollback()
+        return None
+
+    try:
+        watermark = None if full else await get_sales_watermark(session)
+        if watermark is None:
+            new_watermark = await session.scalar(select(func.max(Order.updated_at)))
+            await session.execute(delete(SalesDaily))
+            aggregated = (
+                select(
+                    _order_day(),
+                    Order.product_code,
+                    Order.lang,
+                    Order.currency,
+                    func.count(),
+                    func.sum(Order.amount),
+                )
+                .where(Order.state == SALES_ORDER_STATE)
+                .group_by(_order_day(), Order.product_code, Order.lang, Order.currency)
+            )
+        else:
+            since = watermark - timedelta(seconds=settings.ANALYTICS_WATERMARK_OVERLAP_SECONDS)
+            # Набор корзин фиксируется до DELETE: при READ COMMITTED каждый оператор видит свой снимок
+            # orders, и CTE, вычисленный заново в INSERT, мог вернуть корзину, которую DELETE не удалил
+            await session.execute(text(
+                "CREATE TEMP TABLE sales_daily_touched ON COMMIT DROP AS "
+                "SELECT day, product_code, lang, currency, updated_at FROM sales_daily WITH NO DATA"
+            ))
+            await session.execute(
+                insert(_touched).from_select(
+                    ["day", "product_code", "lang", "currency", "updated_at"],
+                    select(_order_day(), Order.product_code, Order.lang, Order.currency, func.max(Order.updated_at))
+                    .where(Order.updated_at > since)
+                    .group_by(_order_day(), Order.product_code, Order.lang, Order.currency),
+                )
+            )
+            new_watermark = await session.scalar(select(func.max(_touched.c.updated_at)))
+            if new_watermark is None:
+                await session.rollback()
+                return 0
+
+            await session.execute(
+                delete(SalesDaily).where(
+                    SalesDaily.day == _touched.c.day,
+                    SalesDaily.product_code == _touched.c.product_code,
+                    SalesDaily.lang == _touched.c.lang,
+                    SalesDaily.currency == _touched.c.currency,
+                )
+            )
+            # Каждая корзина — отдельный агрегат по индексу (product_code, created_at, id):
+            # LATERAL не даёт планировщику заменить это на seq scan всех оплаченных заказов
+            # (границы дня ему неизвестны, и диапазон created_at он оценивает как широкий)
+            day_start = func.timezone("UTC", cast(_touched.c.day, DateTime))
+            bucket = (
+                select(func.count().label("orders"), func.sum(Order.amount).label("revenue"))
+                .where(
+                    Order.product_code == _touched.c.product_code,
+                    Order.created_at >= day_start,
+                    Order.created_at < day_start + timedelta(days=1),
+                    Order.lang == _touched.c.lang,
+                    Order.currency == _touched.c.currency,
+                    Order.state == SALES_ORDER_STATE,
+                )
+                .lateral("bucket")
+            )
+            aggregated = (
+                select(
+                    _touched.c.day,
+                    _touched.c.product_code,
+                    _touched.c.lang,
+                    _touched.c.currency,
+                    bucket.c.orders,
+                    bucket.c.revenue,
+                )
+                .select_from(_touched.join(bucket, literal_column("true")))
+                .where(bucket.c.orders > 0)
+            )
+
+        result = await session.execute(
+            insert(SalesDaily).from_select(
+                ["day", "product_code", "lang", "currency", "orders", "revenue"], aggregated
+            )
+        )
+        if new_watermark is not None:
+            await SystemMetaCRUD.set_value(session, SALES_WATERMARK_KEY, new_watermark.isoformat())
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    return result.rowcount
+
+
+async def get_sales_report(
+    session: AsyncSession,
+    date_from: date,
+    date_to: date,
+    product_code: Optional[str] = None,
+    lang: Optional[str] = None,
+    currency: Optional[str] = None
+) -> SalesReport:
+    """
+    Продажи из sales_daily за [date_from, date_to] (UTC-дни включительно):
+    строки по (день, продукт, язык, валюта) и итоги по валютам.
+    Читает только сводную таблицу — время ответа не зависит от объёма orders.
+    """
+    query = select(SalesDaily).where(SalesDaily.day >= date_from, SalesDaily.day <= date_to)
+    if product_code is not None:
+        query = query.where(SalesDaily.product_code == product_code)
+    if lang is not None:
+        query = query.where(SalesDaily.lang == lang)
+    if currency is not None:
+        query = query.where(SalesDaily.currency == currency)
+    query = query.order_by(SalesDaily.day, SalesDaily.product_code, SalesDaily.lang, SalesDaily.currency)
+    result = await session.execute(query)
+    rows = [SalesDailyRow.model_validate(item.model_dump()) for item in result.scalars().all()]
+
+    totals: Dict[str, SalesTotal] = {}
+    for row in rows:
+        total = totals.setdefault(row.currency, SalesTotal(currency=row.currency, orders=0, revenue=0))
+        total.orders += row.orders
+        total.revenue += row.revenue
+
+    return SalesReport(
+        date_from=date_from,
+        date_to=date_to,
+        watermark=await get_sales_watermark(session),
+        rows=rows,
+        totals=sorted(totals.values(), key=lambda total: total.currency),
+    )
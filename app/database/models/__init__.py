@@ -4,5 +4,9 @@ from app.database.models.product_card import ProductCard
 from app.database.models.product_files import ProductFile
 from app.database.models.order import Order
 from app.database.models.product_card_images import ProductCardImage
+from app.database.models.product_card_image_variants import ProductCardImageVariant
 from app.database.models.admin import Admin
 from app.database.models.system_metadata import SystemMetadata
+from app.database.models.sales_daily import SalesDaily
+from app.database.models.job import Job
+from app.database.models.idempotency_key import IdempotencyKey
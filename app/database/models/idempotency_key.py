@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import TIMESTAMP, Index, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """
+    Idempotency-Key запроса и сохранённый первый ответ — общие для всех процессов приложения.
+    response = NULL — первый запрос ещё выполняется.
+    """
+    __tablename__ = "idempotency_keys"
+
+    __table_args__ = (
+        # удаление истёкших ключей
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    key: str = Field(sa_column=Column(String(128), primary_key=True))
+
+    fingerprint: str = Field(
+        sa_column=Column(String(64), nullable=False),
+        description="sha256 of the request body"
+    )
+
+    response: Optional[Dict] = Field(
+        default=None,
+        sa_column=Column(JSONB, nullable=True),
+        description="First response; NULL while the first request is in flight"
+    )
+
+    created_at: datetime = Field(
+        sa_type=TIMESTAMP(timezone=True),
+        sa_column_kwargs={"server_default": func.now(), "nullable": False}
+    )
+
+    expires_at: datetime = Field(
+        sa_type=TIMESTAMP(timezone=True),
+        sa_column_kwargs={"nullable": False},
+        description="In flight: lock end (the process may have died); done: end of the stored response"
+    )
@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlmodel import Field, Column
+from sqlalchemy import TIMESTAMP, Index, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database.models.base import BaseModel
+
+
+class Job(BaseModel, table=True):
+    """
+    Фоновая задача (очередь в Postgres). Воркеры забирают задачи пачками через
+    FOR UPDATE SKIP LOCKED; выполненные задачи удаляются, исчерпавшие попытки — status = "dead".
+    """
+    __tablename__ = "jobs"
+
+    __table_args__ = (
+        # выборка готовых к запуску задач и просроченных аренд (воркер упал посреди задачи)
+        Index("ix_jobs_queued_run_at", "kind", "run_at", postgresql_where=text("status = 'queued'")),
+        Index("ix_jobs_running_locked_until", "locked_until", postgresql_where=text("status = 'running'")),
+    )
+
+    # id, created_at, updated_at — наследуются от BaseModel
+
+    kind: str = Field(
+        sa_column=Column(String(64), nullable=False),
+        description="Handler name, e.g. guide_email"
+    )
+
+    payload: Dict = Field(
+        sa_column=Column(JSONB, nullable=False, server_default=text("'{}'::jsonb")),
+        description="Handler arguments"
+    )
+
+    status: str = Field(
+        sa_column=Column(String(16), nullable=False, server_default="queued"),
+        description="queued / running / dead"
+    )
+
+    # ключ идемпотентности постановки: вторая задача с тем же ключом не создаётся
+    dedup_key: Optional[str] = Field(
+        default=None,
+        sa_column=Column(String(255), nullable=True, unique=True)
+    )
+
+    attempts: int = Field(default=0, description="Claims so far (incremented on claim)")
+    max_attempts: int = Field(default=5)
+
+    run_at: datetime = Field(
+        sa_type=TIMESTAMP(timezone=True),
+        sa_column_kwargs={"server_default": func.now(), "nullable": False},
+        description="Not before this moment (retry backoff)"
+    )
+
+    locked_by: Optional[str] = Field(
+        default=None,
+        sa_column=Column(String(128), nullable=True)
+    )
+
+    locked_until: Optional[datetime] = Field(
+        default=None,
+        sa_type=TIMESTAMP(timezone=True),
+        description="Lease end; an expired running job is claimed again"
+    )
+
+    last_error: Optional[str] = Field(
+        default=None,
+        sa_column=Column(Text, nullable=True)
+    )
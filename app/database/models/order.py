@@ -1,4 +1,7 @@
+from typing import Optional
+
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from app.database.models.base import BaseModel
 from app.core.config import Currency
 
@@ -6,6 +9,17 @@ from app.core.config import Currency
 class Order(BaseModel, table=True):
     __tablename__ = "orders"
 
+    # Списки заказов в админке — постранично по ключу (created_at, id), новые сверху
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_state_created_at_id", "state", "created_at", "id"),
+        Index("ix_orders_product_code_created_at_id", "product_code", "created_at", "id"),
+        # инкрементальный пересчёт sales_daily: заказы, изменённые после watermark
+        Index("ix_orders_updated_at", "updated_at"),
+        # страница "спасибо": заказ ищется по checkout_ref из redirect_url
+        Index("ux_orders_checkout_ref", "checkout_ref", unique=True),
+    )
+
     # внешний ID от Revolut
     id: str = Field(primary_key=True)
 
@@ -40,3 +54,7 @@ class Order(BaseModel, table=True):
 
     # язык — влияет на отображение
     lang: str = Field(default="en", min_length=2, max_length=2)
+
+    # случайная ссылка заказа для redirect_url (/thank-you/...?order=...): id провайдера
+    # при создании заказа ещё неизвестен; у заказов, созданных раньше, — None
+    checkout_ref: Optional[str] = Field(default=None, max_length=64)
@@ -32,3 +32,8 @@ class ProductCard(BaseModel, table=True):
         sa_column=Column(Text, nullable=True),
         description="Localized product description in Markdown format"
     )
+
+    description_html: str | None = Field(
+        sa_column=Column(Text, nullable=True),
+        description="Sanitized HTML rendered from description on write"
+    )
@@ -0,0 +1,42 @@
+from sqlmodel import Field, Column
+from sqlalchemy import String, Text, UniqueConstraint
+from app.database.models.base import BaseModel
+
+
+class ProductCardImageVariant(BaseModel, table=True):
+    __tablename__ = "product_card_image_variants"
+
+    __table_args__ = (
+        UniqueConstraint("image_id", "width", "format"),
+    )
+
+    # id, created_at, updated_at — наследуются от BaseModel
+
+    image_id: int = Field(
+        foreign_key="product_card_images.id",
+        nullable=False,
+        index=True,
+        description="ID of the original product card image"
+    )
+
+    width: int = Field(
+        description="Width of the variant in pixels"
+    )
+
+    height: int = Field(
+        description="Height of the variant in pixels"
+    )
+
+    format: str = Field(
+        sa_column=Column(String(8), nullable=False),
+        description="Image format: webp / jpeg"
+    )
+
+    url: str = Field(
+        sa_column=Column(Text, nullable=False),
+        description="Path to the variant file, stored next to the original"
+    )
+
+    bytes: int = Field(
+        description="File size in bytes"
+    )
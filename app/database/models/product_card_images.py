@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel, Field, Column
-from sqlalchemy import String, Text
+from sqlalchemy import Integer, String, Text
 from app.database.models.base import BaseModel
 
 
@@ -29,7 +29,38 @@ class ProductCardImage(BaseModel, table=True):
         description="Optional descriptive text accompanying the image"
     )
 
+    description_html: str | None = Field(
+        sa_column=Column(Text, nullable=True),
+        description="Sanitized HTML rendered from description on write"
+    )
+
     position: int = Field(
         default=0,
         description="Order of the image in the gallery"
     )
+
+    # Метаданные файла — заполняются при создании / смене url (app.core.images.image_metadata)
+    width: int | None = Field(
+        sa_column=Column(Integer, nullable=True),
+        description="Intrinsic width in pixels (after EXIF orientation)"
+    )
+
+    height: int | None = Field(
+        sa_column=Column(Integer, nullable=True),
+        description="Intrinsic height in pixels (after EXIF orientation)"
+    )
+
+    bytes: int | None = Field(
+        sa_column=Column(Integer, nullable=True),
+        description="Size of the original file in bytes"
+    )
+
+    dominant_color: str | None = Field(
+        sa_column=Column(String(7), nullable=True),
+        description="Dominant color as #rrggbb"
+    )
+
+    placeholder: str | None = Field(
+        sa_column=Column(Text, nullable=True),
+        description="Tiny blurred preview as a base64 data URI"
+    )
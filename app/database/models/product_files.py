@@ -32,3 +32,8 @@ class ProductFile(BaseModel, table=True):
         sa_column=Column(Text, nullable=True),
         description="Optional text used in email body when sending the file"
     )
+
+    description_html: str | None = Field(
+        sa_column=Column(Text, nullable=True),
+        description="Sanitized HTML rendered from description (with download link) on write"
+    )
@@ -0,0 +1,45 @@
+from datetime import date
+
+from sqlmodel import Field, Column
+from sqlalchemy import BigInteger, String, UniqueConstraint
+from app.database.models.base import BaseModel
+from app.core.config import Currency
+
+
+class SalesDaily(BaseModel, table=True):
+    """
+    Сводка оплаченных (completed) заказов по дням — источник для аналитики в админке.
+    Пересчитывается инкрементально из orders (см. crud.sales_analytics.refresh_sales_daily).
+    """
+    __tablename__ = "sales_daily"
+
+    __table_args__ = (
+        UniqueConstraint("day", "product_code", "lang", "currency"),
+    )
+
+    # id, created_at, updated_at — наследуются от BaseModel
+
+    day: date = Field(
+        nullable=False,
+        description="UTC day of the order (orders.created_at)"
+    )
+
+    product_code: str = Field(
+        sa_column=Column(String, nullable=False)
+    )
+
+    lang: str = Field(
+        sa_column=Column(String(2), nullable=False)
+    )
+
+    # тот же тип currency, что и orders.currency
+    currency: Currency = Field(...)
+
+    orders: int = Field(
+        description="Number of completed orders"
+    )
+
+    revenue: int = Field(
+        sa_column=Column(BigInteger, nullable=False),
+        description="Sum of orders.amount in minor units of currency"
+    )
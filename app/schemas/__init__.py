@@ -1,7 +1,10 @@
 from .product_card import ProductCardCreate, ProductCardResponse, ProductCardUpdate
 from .product import ProductCreate, ProductResponse, ProductUpdate
-from .order import OrderCreate, OrderSave, OrderUpdate, OrderRead
+from .order import OrderCreate, OrderSave, OrderUpdate, OrderRead, OrderPage
 from .product_card_image import ProductCardImageCreate,  ProductCardImageUpdate, ProductCardImageResponse
+from .product_card_image import ProductCardImageVariantResponse
 from .product_with_card_web import ProductWithCardResponse
 from .admins import AdminRead, AdminUpdateRequest, AdminRegisterRequest, AdminRegisterResponse, AdminUpdateResponse
 from .admins import StepUpResponse, StepUpRequest
+from .analytics import SalesDailyRow, SalesTotal, SalesReport
+from .job import JobRead
@@ -0,0 +1,32 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.core.config import Currency
+
+
+class SalesDailyRow(BaseModel):
+    day: date
+    product_code: str
+    lang: str
+    currency: Currency
+    orders: int
+    revenue: int = Field(..., description="Сумма в минимальных единицах валюты (центы)")
+
+
+class SalesTotal(BaseModel):
+    currency: Currency
+    orders: int
+    revenue: int
+
+
+class SalesReport(BaseModel):
+    date_from: date
+    date_to: date
+    watermark: Optional[datetime] = Field(
+        None,
+        description="До какого orders.updated_at учтены заказы",
+    )
+    rows: List[SalesDailyRow]
+    totals: List[SalesTotal]
@@ -0,0 +1,11 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class JobRead(BaseModel):
+    id: int
+    kind: str
+    payload: Dict
+    attempts: int
+    max_attempts: int
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field, EmailStr, field_validator
-from typing import Optional
+from typing import List, Optional
 from app.core.config import Languages, Currency
 import re
 
@@ -48,6 +48,7 @@ class OrderSave(OrderBase):
 
     token: str = Field(exclude=True)
     checkout_url: str = Field(exclude=True)
+    checkout_ref: Optional[str] = None
 
     created_at: datetime = Field(..., example="2026-01-25T17:59:04.221551Z")
     updated_at: datetime = Field(..., example="2026-01-25T17:59:04.221551Z")
@@ -85,6 +86,14 @@ class OrderRead(OrderBase):
     updated_at: Optional[datetime]
 
 
+class OrderPage(BaseModel):
+    items: List[OrderRead]
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Непрозрачный курсор следующей страницы; None — страниц больше нет",
+    )
+
+
 _product_code_regex = re.compile(r"^[A-Z]{1,2}\d{3,4}$")
 
 
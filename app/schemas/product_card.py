@@ -17,6 +17,7 @@ class ProductCardCreate(ProductCardBase):
 
 class ProductCardResponse(ProductCardBase):
     id: int
+    description_html: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field, field_validator, ValidationError
 
@@ -99,9 +99,26 @@ class ProductCardImageUpdate(BaseModel):
 # -------------------------
 # 4. RESPONSE
 # -------------------------
+class ProductCardImageVariantResponse(BaseModel):
+    width: int = Field(..., example=480)
+    height: int = Field(..., example=320)
+    format: str = Field(..., example="webp")
+    url: str = Field(..., example="img/azores1.w480.webp")
+
+
 class ProductCardImageResponse(ProductCardImageBase):
     id: int = Field(..., example=1)
     product_card_id: int = Field(..., example=42)
+    description_html: Optional[str] = Field(None, description="Sanitized HTML rendered from description")
+    width: Optional[int] = Field(None, example=1600, description="Intrinsic width in pixels")
+    height: Optional[int] = Field(None, example=1067, description="Intrinsic height in pixels")
+    bytes: Optional[int] = Field(None, example=348512, description="Size of the original file")
+    dominant_color: Optional[str] = Field(None, example="#5a7a8c", description="Dominant color")
+    placeholder: Optional[str] = Field(None, description="Tiny blurred preview (data URI)")
+    variants: List[ProductCardImageVariantResponse] = Field(
+        default_factory=list,
+        description="Resized WebP/JPEG variants of the image"
+    )
     created_at: datetime = Field(..., example="2026-01-25T17:59:04.221551Z")
     updated_at: datetime = Field(..., example="2026-01-25T17:59:04.221551Z")
 
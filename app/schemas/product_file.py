@@ -86,6 +86,7 @@ class ProductFileResponse(ProductFileBase):
     id: int = Field(..., example=1)
     product_id: int = Field(..., example=123)
     lang: Languages = Field(..., example="en")
+    description_html: Optional[str] = Field(None, description="Sanitized HTML rendered from description")
     created_at: datetime = Field(..., example="2026-01-25T17:59:04.221551Z")
     updated_at: datetime = Field(..., example="2026-01-25T17:59:04.221551Z")
 
@@ -18,7 +18,14 @@ class ProductWithCardResponse(BaseModel):
     lang: str = Field(..., example="en", description="Язык карточки")
     name: str = Field(..., example="Paris Guide", description="Название карточки на данном языке")
     description: str = Field(..., example="A complete guide to Paris.", description="Описание карточки в Markdown")
+    description_html: Optional[str] = Field(None, description="Описание карточки, уже отрендеренное в безопасный HTML")
 
+    # Timestamps (используются для версии контента страницы)
+    product_updated_at: Optional[datetime] = Field(None, example="2026-01-25T17:59:04.221551Z")
+    card_updated_at: Optional[datetime] = Field(None, example="2026-01-25T17:59:04.221551Z")
+
+    # Версия контента страницы, посчитанная в SQL (см. crud.product_with_cards._content_version)
+    page_version: str = Field("", description="Версия контента страницы для кэша и ETag")
 
     # Images related to this card
     images: List[ProductCardImageResponse] = Field(
@@ -28,3 +35,14 @@ class ProductWithCardResponse(BaseModel):
 
     class Config:
         arbitrary_types_allowed = True
+
+    def last_modified(self) -> Optional[datetime]:
+        """
+        Последний updated_at продукта, карточки и изображений.
+        """
+        timestamps = [ts for ts in (self.product_updated_at, self.card_updated_at) if ts is not None]
+        timestamps.extend(img.updated_at for img in self.images)
+        return max(timestamps) if timestamps else None
+
+    def content_version(self) -> str:
+        return self.page_version
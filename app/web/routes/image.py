@@ -0,0 +1,82 @@
+import asyncio
+from pathlib import Path, PurePosixPath
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from app.core.image_cache import resized_image_cache
+from app.core.images import STATIC_ROOT, source_version
+
+router = APIRouter(prefix="/img")
+
+IMAGE_ROOT = STATIC_ROOT / "img"
+MIN_WIDTH = 16
+MAX_WIDTH = 4096
+SOURCE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+# only a URL carrying the current source version (?v=, see resized_image_url; description_html
+# gets it on write) is immutable;
+# without it the source can be replaced under the same URL, so caches must recheck soon
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+UNVERSIONED_CACHE_CONTROL = "public, max-age=300"
+
+
+class PinnedFileResponse(FileResponse):
+    """FileResponse that releases the resized-image cache pin once the body is sent or the client is gone."""
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            resized_image_cache.release(Path(self.path))
+
+
+def resolve_source(path: str) -> Optional[Tuple[Path, str]]:
+    """
+    Map the URL path to a file under app/web/static/img, rejecting traversal.
+    Returns (source, version) or None. Blocking (stat) - run it in a thread.
+    """
+    relative = PurePosixPath(path)
+    if relative.is_absolute() or ".." in relative.parts or relative.suffix.lower() not in SOURCE_SUFFIXES:
+        return None
+    source = IMAGE_ROOT / relative
+    try:
+        stat = source.stat()
+    except OSError:
+        return None
+    if not source.is_file():
+        return None
+    return source, source_version(stat)
+
+
+@router.get("/{width}/{path:path}")
+async def resized_image(request: Request, width: int, path: str):
+    """
+    Serve an image from app/web/static/img scaled down to `width` pixels.
+    WebP is returned to clients that accept it, JPEG otherwise.
+    `?v=` with the current source version (resized_image_url) makes the response immutable.
+    """
+    if not MIN_WIDTH <= width <= MAX_WIDTH:
+        raise HTTPException(status_code=400, detail=f"Width must be between {MIN_WIDTH} and {MAX_WIDTH}")
+    resolved = await asyncio.to_thread(resolve_source, path)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    source, version = resolved
+    fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+
+    try:
+        resized = await resized_image_cache.get(source, width, fmt, version)
+    except OSError:
+        raise HTTPException(status_code=422, detail="Image cannot be processed")
+
+    cache_control = IMMUTABLE_CACHE_CONTROL if request.query_params.get("v") == version else UNVERSIONED_CACHE_CONTROL
+    try:
+        return PinnedFileResponse(
+            resized,
+            media_type=MEDIA_TYPES[fmt],
+            headers={"Cache-Control": cache_control, "Vary": "Accept"},
+        )
+    except BaseException:
+        resized_image_cache.release(resized)
+        raise
@@ -1,33 +1,40 @@
 
 
+from datetime import datetime
+from typing import NamedTuple, Optional
+
 from fastapi import APIRouter, Depends, Request
+from fastapi.responses import HTMLResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
-from fastapi.templating import Jinja2Templates
 import logging
 
 from app.core.utils import md_to_safe_html, ensure_dict, build_image_url
+from app.core.utils import make_etag, conditional_headers, is_not_modified, not_modified_response
 from app.apis.deps import get_session
-from app.database.crud.product_with_cards import get_product_with_card_by_code
+from app.core.cache import product_page_cache
+from app.core.images import build_srcset, VARIANT_SIZES
+from app.database.crud.product_with_cards import get_product_with_card_by_code, get_product_page_version
+from app.schemas import ProductWithCardResponse
+from app.web.templating import templates, TEMPLATE_VERSION
 
 
 router = APIRouter(prefix="/products")
-templates = Jinja2Templates(directory="app/web/templates")
 
 logger = logging.getLogger("app.web.routes.product")
 
 
+class RenderedPage(NamedTuple):
+    html: str
+    etag: str
+    last_modified: Optional[datetime]
 
 
-@router.get("/{lang}/{product_code}")
-async def product_page(request: Request, product_code: str, lang: str = "en",
-                       session: AsyncSession = Depends(get_session)):
+def render_product_page(product_data: ProductWithCardResponse, lang: str, request: Optional[Request] = None) -> str:
     """
-    Render product page. Convert Markdown fields to sanitized HTML and ensure image URLs are public.
+    Render product.html for already loaded product data.
+    Shared by product_page and the static pre-render command (request is None there).
     """
-    product_data = await get_product_with_card_by_code(session, product_code, lang)
-    if not product_data:
-        return templates.TemplateResponse("error.html", {"request": request, "lang": lang})
-
+    product_code = product_data.product_code
 
     # Normalize to plain dict
     product = ensure_dict(product_data)
@@ -35,12 +42,10 @@ async def product_page(request: Request, product_code: str, lang: str = "en",
     # Work on a copy for rendering
     render_product = dict(product)
 
-    # Convert top-level description
-    render_product["description_html"] = md_to_safe_html(render_product.get("description", "") or "")
+    # Description HTML is rendered on write; render here only for rows saved before that
+    if render_product.get("description_html") is None:
+        render_product["description_html"] = md_to_safe_html(render_product.get("description", "") or "")
     render_product["name_html"] = md_to_safe_html(render_product.get("name", "") or "")
-    # Ensure product_code exists for JS pay()
-    if not render_product.get("product_code"):
-        render_product["product_code"] = product_code
 
     images = render_product.get("images") or []
     new_images = []
@@ -48,30 +53,19 @@ async def product_page(request: Request, product_code: str, lang: str = "en",
     for img in images:
         i = ensure_dict(img)
 
-        # Markdown → safe HTML
-        i["description_html"] = md_to_safe_html(i.get("description", "") or "")
+        # Markdown → safe HTML (stored on write, fallback for old rows)
+        if i.get("description_html") is None:
+            i["description_html"] = md_to_safe_html(i.get("description", "") or "")
 
         # Build public URL
         built = build_image_url(request, i)
         i["url"] = built or i.get("url", "")
 
-        # Compose final HTML block (как на скриншоте)
-        i["html"] = f"""
-        <div class="image-text-block">
-            <div class="image-side">
-                <img src="{i['url']}" alt="">
-            </div>
-
-            <div class="divider"></div>
-
-            <div class="text-side">
-                <h2 class="image-title">{i.get('title', '')}</h2>
-                <div class="image-description">
-                    {i['description_html']}
-                </div>
-            </div>
-        </div>
-        """
+        # Responsive variants (srcset / sizes)
+        variants = i.get("variants") or []
+        i["srcset_webp"] = build_srcset(variants, "webp", lambda url: build_image_url(request, {"url": url}))
+        i["srcset_jpeg"] = build_srcset(variants, "jpeg", lambda url: build_image_url(request, {"url": url}))
+        i["sizes"] = VARIANT_SIZES
 
         new_images.append(i)
 
@@ -80,4 +74,47 @@ async def product_page(request: Request, product_code: str, lang: str = "en",
     # Debug logging (can be removed)
     logger.debug("Rendering product page for %s (lang=%s). Keys: %s", product_code, lang, list(render_product.keys()))
 
-    return templates.TemplateResponse("product.html", {"request": request, "product": render_product, "lang": lang})
+    return templates.get_template("product.html").render(
+        {"request": request, "product": render_product, "lang": lang}
+    )
+
+
+@router.get("/{lang}/{product_code}")
+async def product_page(request: Request, product_code: str, lang: str = "en",
+                       session: AsyncSession = Depends(get_session)):
+    """
+    Render product page. Convert Markdown fields to sanitized HTML and ensure image URLs are public.
+    Rendered HTML is cached per (product_code, lang, content version). The cache is per process,
+    so every request checks the current content version in the DB (one small aggregate query)
+    and a cached page is served only if it matches: a write handled by another worker
+    is picked up here on the next request.
+    ETag / Last-Modified come from the content version and the template version,
+    so revalidation requests get a 304 without rendering.
+    """
+    current_version = await get_product_page_version(session, product_code, lang)
+    if current_version is None:
+        return templates.TemplateResponse("error.html", {"request": request, "lang": lang})
+
+    cached = product_page_cache.get(product_code, lang)
+    if cached is not None and cached[0] == current_version:
+        _, page = cached
+        headers = conditional_headers(page.etag, page.last_modified)
+        if is_not_modified(request, page.etag, page.last_modified):
+            return not_modified_response(headers)
+        return HTMLResponse(page.html, headers=headers)
+
+    product_data = await get_product_with_card_by_code(session, product_code, lang)
+    if not product_data:
+        return templates.TemplateResponse("error.html", {"request": request, "lang": lang})
+
+    version = product_data.content_version()
+    last_modified = product_data.last_modified()
+    etag = make_etag(product_code, lang, version, TEMPLATE_VERSION)
+    headers = conditional_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+
+    html = render_product_page(product_data, lang, request)
+    product_page_cache.put(product_code, lang, version, RenderedPage(html, etag, last_modified))
+
+    return HTMLResponse(html, headers=headers)
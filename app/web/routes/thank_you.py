@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Depends, Request, HTTPException
+from html import escape
+
+from fastapi import APIRouter, Depends, Query, Request, HTTPException
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.utils import md_to_safe_html, ensure_dict, build_image_url
+from app.core.utils import build_download_link, file_description_to_html
+from app.core.download_links import sign_download_link
+from app.core.utils import make_etag, conditional_headers, is_not_modified, not_modified_response
 from app.apis.deps import get_session
-from app.database.crud.product_files import get_product_file
-from app.database.crud.product import get_product_by_code
+from app.core.order_reconciler import fetch_provider_state
+from app.database.crud.order import (
+    PAID_ORDER_STATES, TERMINAL_ORDER_STATES, apply_order_states, get_order_by_checkout_ref
+)
+from app.database.crud.product_files import get_indexed_file_by_product
 from app.core.config import Languages
-from fastapi.templating import Jinja2Templates
+from app.web.templating import templates, TEMPLATE_VERSION
 
 router = APIRouter(prefix="/thank-you")
-templates = Jinja2Templates(directory="app/web/templates")
+
+# payment still being confirmed: the page reloads itself after this many seconds
+PAYMENT_PENDING_REFRESH_SECONDS = 5
 
 
 @router.get("/{product_code}/{lang}")
@@ -17,25 +26,75 @@ async def thank_you_page(
     request: Request,
     product_code: str,
     lang: Languages,
+    order: str = Query(..., min_length=16, max_length=64),
     session: AsyncSession = Depends(get_session)
 ):
-    # 1. Получаем продукт
-    product = await get_product_by_code(session, product_code)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    """
+    Page the payment provider redirects to after checkout (redirect_url carries the order's checkout_ref).
+    The download link is signed only for that order, and only if it is for this product and language
+    and paid; anyone else gets 404 / 403 instead of a working link to the paid file.
+    While the payment is still being confirmed the customer gets a self-refreshing page (202).
+    """
+    # 1. Заказ из redirect_url: должен совпадать с продуктом и языком страницы
+    paid_order = await get_order_by_checkout_ref(session, order)
+    if paid_order is None or paid_order.product_code != product_code or paid_order.lang != lang:
+        raise HTTPException(status_code=404, detail="Order not found")
 
-    # 2. Получаем файл для языка
-    file = await get_product_file(session, product.id, lang)
+    # 2. Редирект провайдера может опередить webhook: неоплаченный заказ один раз сверяем с провайдером
+    state = paid_order.state
+    if state not in PAID_ORDER_STATES:
+        # соединение пула не держим во время запроса к провайдеру
+        await session.commit()
+        provider_state = await fetch_provider_state(paid_order.id)
+        if provider_state is not None and provider_state != state:
+            # тот же путь, что у webhook: при оплате ставится и письмо с путеводителем
+            await apply_order_states(session, {paid_order.id: provider_state})
+            state = provider_state
+    if state in TERMINAL_ORDER_STATES and state not in PAID_ORDER_STATES:
+        raise HTTPException(status_code=403, detail="Order is not paid")
+    if state not in PAID_ORDER_STATES:
+        # оплата ещё подтверждается (processing / authorised): ссылку не выдаём, страница обновится сама
+        return templates.TemplateResponse(
+            "payment_pending.html",
+            {"request": request, "lang": lang, "refresh_url": str(request.url)},
+            status_code=202,
+            headers={"Cache-Control": "no-store", "Refresh": str(PAYMENT_PENDING_REFRESH_SECONDS)},
+        )
 
+    # 3. Файл продукта для языка — из индекса в памяти (БД только при промахе)
+    file = await get_indexed_file_by_product(session, product_code, lang)
     if not file:
         raise HTTPException(status_code=404, detail="File for this language not found")
-    file_norm = ensure_dict(file)
 
-    # Work on a copy for rendering
-    render_file = dict(file_norm)
-    link = f"/api/v1/download/{render_file['id']}"
-    render_file['description_html'] = md_to_safe_html(render_file.get("description").replace("https://example.com>", link))
-    render_file['link'] = link
+    # 4. Подписанная ссылка для этого заказа; срок округлён до шага, поэтому страница (и ETag) стабильны в его пределах
+    link = sign_download_link(file.file_id, paid_order.id)
+
+    # 5. Валидаторы: 304 без рендеринга шаблона
+    last_modified = max(file.product_updated_at, file.updated_at)
+    etag = make_etag(
+        file.product_id, file.product_updated_at, file.file_id, file.updated_at,
+        lang.value, paid_order.id, link.expires, TEMPLATE_VERSION,
+    )
+    headers = conditional_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+
+    render_file = {
+        "id": file.file_id,
+        "product_id": file.product_id,
+        "lang": file.lang,
+        "file_link": file.file_link,
+        "description": file.description,
+        "description_html": file.description_html,
+    }
+    # description_html is rendered on write; render here only for rows saved before that
+    if render_file["description_html"] is None:
+        render_file["description_html"] = file_description_to_html(file.description, file.file_id)
+    # the stored HTML carries the plain link; swap in the signed one
+    render_file["description_html"] = render_file["description_html"].replace(
+        f'href="{build_download_link(file.file_id)}"', f'href="{escape(link.url)}"'
+    )
+    render_file["link"] = link.url
 
     return templates.TemplateResponse(
         "thank_you.html",
@@ -43,5 +102,6 @@ async def thank_you_page(
             "request": request,
             "file": render_file,
             "lang": lang,
-        }
+        },
+        headers=headers,
     )
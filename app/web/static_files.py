@@ -0,0 +1,45 @@
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.core.static_manifest import StaticManifest
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# paid files are only served through signed /api/v1/download links
+PRIVATE_PREFIXES = ("files/",)
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """
+    StaticFiles that also serves content-hashed names from the static manifest.
+    A hashed URL never changes its content, so it is cached for a year without revalidation;
+    plain paths keep the default validator-based caching, and so do hashed names this
+    process does not know, which fall back to the current file.
+    Paid files under files/ are not exposed here at all.
+    """
+
+    def __init__(self, *, manifest: StaticManifest, **kwargs):
+        super().__init__(**kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        path = path.replace("\\", "/")
+        if path.startswith(PRIVATE_PREFIXES):
+            raise HTTPException(status_code=404)
+        source = self.manifest.source_path(path)
+        if source is None:
+            try:
+                return await super().get_response(path, scope)
+            except HTTPException as exc:
+                # hashed name unknown to this process (previous deploy, sibling worker, not hashed yet):
+                # serve the current file under validator caching rather than a 404
+                fallback = self.manifest.unhashed_path(path)
+                if exc.status_code != 404 or fallback is None:
+                    raise
+                return await super().get_response(fallback, scope)
+
+        response = await super().get_response(source, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -0,0 +1,29 @@
+import hashlib
+from pathlib import Path
+
+from fastapi.templating import Jinja2Templates
+
+from app.core.config import settings
+from app.core.static_manifest import static_manifest
+
+TEMPLATES_DIR = Path("app/web/templates")
+
+templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+# {{ static_url('css/product.css') }} -> /static/css/product.<hash>.css
+templates.env.globals["static_url"] = static_manifest.url
+
+
+def _templates_version() -> str:
+    """
+    Хэш исходников шаблонов + версия приложения + версия статики (URL ассетов с хэшами).
+    Входит в ETag страниц: смена шаблона или ассета при деплое делает старые валидаторы недействительными.
+    """
+    digest = hashlib.sha256(settings.VERSION.encode("utf-8"))
+    digest.update(static_manifest.assets_version().encode("utf-8"))
+    for path in sorted(TEMPLATES_DIR.rglob("*.html")):
+        digest.update(path.as_posix().encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+TEMPLATE_VERSION = _templates_version()
@@ -0,0 +1,99 @@
+"""
+Load benchmark for the checkout path (POST /api/v1/order) of a running app.
+
+Start the provider stand-in and the app pointed at it, then drive checkouts:
+
+    python -m devtools.mock_revolut --port 9000 --latency-ms 150 --jitter-ms 100
+    REVOLUT_URL=http://localhost:9000 uvicorn main:app --port 8000
+    python -m devtools.bench_checkout --url http://localhost:8000 --concurrency 50 --requests 2000
+
+Every checkout carries its own Idempotency-Key, like the product page does.
+Reports throughput, status-code breakdown and p50/p95/p99 latency; with
+--admin-token (a bearer JWT) it also prints the payment client metrics.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from typing import List
+
+import httpx
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else float("nan")
+
+
+async def run(args) -> None:
+    payload = {
+        "product_code": args.product_code,
+        "lang": args.lang,
+        "customers_email": "loadtest@example.com",
+        "settlement_currency": args.settlement_currency,
+    }
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    remaining = args.requests
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        async def checkout() -> None:
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/api/v1/order", json=payload, headers={"Idempotency-Key": str(uuid.uuid4())}
+                )
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as exc:
+                statuses[type(exc).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+        async def worker() -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await checkout()
+
+        for _ in range(args.warmup):
+            await checkout()
+        latencies.clear()
+        statuses.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        print(f"{args.requests} checkouts, concurrency {args.concurrency}, {elapsed:.2f}s")
+        print(f"throughput: {len(latencies) / elapsed:.1f} req/s "
+              f"({statuses.get(200, 0) / elapsed:.1f} successful/s)")
+        print("statuses:  " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str)))
+        print("latency:   " + "  ".join(
+            f"{name} {percentile(latencies, q) * 1000:.0f}ms"
+            for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        ))
+
+        if args.admin_token:
+            response = await client.get(
+                "/api/v1/service/metrics/payment", headers={"Authorization": f"Bearer {args.admin_token}"}
+            )
+            print(f"payment client: {response.text}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent checkout benchmark")
+    parser.add_argument("--url", default="http://localhost:8000", help="base URL of the running app")
+    parser.add_argument("--product-code", default="G001")
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--settlement-currency", default="EUR")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0, help="client timeout per request, seconds")
+    parser.add_argument("--admin-token", default=None, help="bearer token to read payment client metrics")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+How many concurrent checkouts a default-sized connection pool survives.
+
+Simulates the order flow against the real database with a stubbed provider call
+(asyncio.sleep of --latency seconds) on an engine with SQLAlchemy's default pool
+(pool_size=5, max_overflow=10):
+
+    held      — the old create_order_api: one session for product lookup,
+                provider call and order insert (connection checked out throughout);
+    released  — place_order: short read, provider call with no session, short write.
+
+The insert is replaced by SELECT 1 so no orders are written.
+
+    python -m devtools.bench_checkout_pool [--latency 0.8] [--concurrency 10 15 30 60 120]
+"""
+import argparse
+import asyncio
+import time
+from typing import Callable, List
+
+from sqlalchemy import select, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.database.crud.product import get_product_by_code
+from app.database.models import Product
+
+
+async def checkout_held(session_maker: Callable[[], AsyncSession], product_code: str, latency: float) -> None:
+    async with session_maker() as session:
+        await get_product_by_code(session, product_code)
+        await asyncio.sleep(latency)  # provider call
+        await session.execute(text("SELECT 1"))
+        await session.commit()
+
+
+async def checkout_released(session_maker: Callable[[], AsyncSession], product_code: str, latency: float) -> None:
+    async with session_maker() as session:
+        await get_product_by_code(session, product_code)
+    await asyncio.sleep(latency)  # provider call
+    async with session_maker() as session:
+        await session.execute(text("SELECT 1"))
+        await session.commit()
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else float("nan")
+
+
+async def run_level(flow, session_maker, product_code: str, latency: float, concurrency: int):
+    latencies: List[float] = []
+    timeouts = 0
+
+    async def one():
+        nonlocal timeouts
+        started = time.perf_counter()
+        try:
+            await flow(session_maker, product_code, latency)
+        except PoolTimeoutError:
+            timeouts += 1
+            return
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return len(latencies), timeouts, elapsed, latencies
+
+
+async def main_async(args) -> None:
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        pool_size=5,
+        max_overflow=10,
+        pool_timeout=args.pool_timeout,
+    )
+    session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_maker() as session:
+        product_code = args.product_code or await session.scalar(select(Product.product_code).limit(1))
+    if product_code is None:
+        raise SystemExit("No products in the database; pass --product-code")
+
+    print(f"pool 5+10, pool_timeout={args.pool_timeout}s, provider latency={args.latency}s")
+    print(f"{'flow':<9} {'conc':>5} {'ok':>5} {'pool t/o':>8} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for flow_name, flow in (("held", checkout_held), ("released", checkout_released)):
+        for concurrency in args.concurrency:
+            ok, timeouts, elapsed, latencies = await run_level(flow, session_maker, product_code, args.latency, concurrency)
+            print(
+                f"{flow_name:<9} {concurrency:>5} {ok:>5} {timeouts:>8} {ok / elapsed:>7.1f} "
+                f"{percentile(latencies, 0.50) * 1000:>8.0f} {percentile(latencies, 0.95) * 1000:>8.0f} "
+                f"{percentile(latencies, 0.99) * 1000:>8.0f}"
+            )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Checkout concurrency vs. a default-sized DB pool")
+    parser.add_argument("--latency", type=float, default=0.8, help="simulated provider latency, seconds")
+    parser.add_argument("--pool-timeout", type=float, default=5.0, help="pool checkout timeout, seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 15, 30, 60, 120])
+    parser.add_argument("--product-code", default=None)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Micro-benchmark for Markdown -> safe HTML rendering.
+
+Compares the original per-call pipeline (new markdown.Markdown + bleach.clean
+on every call) with MarkdownRenderer: reused engines without the LRU, and the
+full memoized path as used by the product page.
+
+    python -m devtools.bench_markdown [--rounds 200]
+"""
+import argparse
+import time
+
+import bleach
+import markdown
+
+from app.core.utils import (
+    ALLOWED_ATTRIBUTES,
+    ALLOWED_PROTOCOLS,
+    ALLOWED_TAGS,
+    MARKDOWN_EXTENSIONS,
+    MarkdownRenderer,
+    preprocess_markdown,
+)
+
+# Типичные описания карточки и изображений путеводителя
+GUIDE_DESCRIPTIONS = [
+    """**Азорские острова** — девять вулканических островов посреди Атлантики.
+В путеводителе собрано всё, что нужно для самостоятельной поездки:
+- маршруты по островам Сан-Мигел, Пику и Фаял
+- лучшие смотровые площадки и термальные источники
+- где попробовать местный сыр и ананасы
+- как арендовать машину и не переплатить
+
+Путеводитель обновляется каждый сезон.""",
+    """Что внутри:
+1. Карта острова с отмеченными точками
+2. Пешие тропы разной сложности
+3. Расписание паромов между островами
+
+| Остров | Дней | Сезон |
+|---|---|---|
+| Сан-Мигел | 4 | апрель–октябрь |
+| Пику | 2 | май–сентябрь |
+
+Подробнее — в разделе <https://example.com>""",
+    """### Lagoa do Fogo
+One of the most beautiful crater lakes on São Miguel.
+The trail starts at the *Miradouro da Lagoa do Fogo* viewpoint and takes about **2 hours** round trip.
+
+Tips:
+- go early in the morning, clouds roll in by noon
+- bring a windbreaker
+- parking is limited""",
+    """Sete Cidades is famous for its twin lakes — one green, one blue.
+> Legend says they were formed by the tears of a princess and a shepherd.
+
+Don't miss the [Vista do Rei](https://maps.example.com/vista-do-rei) viewpoint.""",
+    """Przewodnik zawiera:
+* szczegółowe trasy piesze
+* listę restauracji z lokalną kuchnią
+* praktyczne porady dotyczące transportu
+
+<script>alert('xss')</script> <img src="x" onerror="alert(1)">""",
+]
+
+
+def baseline_md_to_safe_html(md_text: str) -> str:
+    """The pipeline as it was before MarkdownRenderer."""
+    if not md_text:
+        return ""
+    try:
+        md_text = preprocess_markdown(md_text)
+        html = markdown.markdown(md_text, extensions=MARKDOWN_EXTENSIONS)
+        return bleach.clean(
+            html,
+            tags=ALLOWED_TAGS,
+            attributes=ALLOWED_ATTRIBUTES,
+            protocols=list(ALLOWED_PROTOCOLS),
+            strip=True,
+        )
+    except Exception:
+        return bleach.clean(md_text, strip=True)
+
+
+def bench(name: str, func, rounds: int, baseline: float | None = None) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in GUIDE_DESCRIPTIONS:
+            func(text)
+    elapsed = time.perf_counter() - started
+    per_call_us = elapsed / (rounds * len(GUIDE_DESCRIPTIONS)) * 1e6
+    speedup = f"  x{baseline / elapsed:.1f}" if baseline else ""
+    print(f"{name:<28} {elapsed:8.3f} s  {per_call_us:9.1f} us/call{speedup}")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    renderer = MarkdownRenderer()
+    for text in GUIDE_DESCRIPTIONS:
+        if renderer.render(text) != baseline_md_to_safe_html(text):
+            raise SystemExit("MarkdownRenderer output differs from the baseline pipeline")
+    renderer.cache_clear()
+    print("output is byte-identical to the baseline pipeline\n")
+
+    baseline = bench("baseline (per-call engines)", baseline_md_to_safe_html, args.rounds)
+    bench("reused engines, no LRU", renderer._render, args.rounds, baseline)
+    bench("reused engines + LRU", renderer.render, args.rounds, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Local stand-in for the Revolut Merchant API, for load tests of the checkout path.
+
+Implements the part of the contract the app uses:
+
+    POST /api/orders        -> 201 with every field OrderSave expects (+ token, checkout_url)
+    GET  /api/orders/{id}   -> the stored order (used by the order reconciler)
+
+Fault injection (per request, independent draws):
+
+    --latency-ms / --jitter-ms   base delay + uniform jitter before answering
+    --error-rate                 share of requests answered with --error-status (default 503)
+    --timeout-rate               share of requests that hang for --hang-seconds
+                                 (longer than PAYMENT_READ_TIMEOUT -> client read timeout)
+
+The settings can be changed at runtime (PUT /_mock/config with a JSON subset of
+GET /_mock/config), counters are at GET /_mock/stats, and
+POST /_mock/orders/{id}/state moves an order to another state.
+
+    python -m devtools.mock_revolut [--port 9000] [--latency-ms 150 --jitter-ms 100 --error-rate 0.02]
+
+Point the app at it with REVOLUT_URL=http://localhost:9000.
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+config: Dict[str, float] = {
+    "latency_ms": 150.0,
+    "jitter_ms": 100.0,
+    "error_rate": 0.0,
+    "error_status": 503,
+    "timeout_rate": 0.0,
+    "hang_seconds": 30.0,
+}
+orders: Dict[str, Dict] = {}
+stats: Counter = Counter()
+
+app = FastAPI(title="Mock Revolut Merchant API")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+async def _inject_faults() -> JSONResponse | None:
+    """Delay the request and possibly turn it into an error or a hang."""
+    stats["requests"] += 1
+    if random.random() < config["timeout_rate"]:
+        stats["timeouts"] += 1
+        await asyncio.sleep(config["hang_seconds"])
+    await asyncio.sleep((config["latency_ms"] + random.uniform(0, config["jitter_ms"])) / 1000)
+    if random.random() < config["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse({"code": "internal_error", "message": "injected"}, status_code=int(config["error_status"]))
+    return None
+
+
+@app.post("/api/orders")
+async def create_order(request: Request):
+    body = await request.json()
+    failure = await _inject_faults()
+    if failure is not None:
+        return failure
+
+    order_id = str(uuid.uuid4())
+    now = _now()
+    order = {
+        "id": order_id,
+        "token": uuid.uuid4().hex,
+        "type": "payment",
+        "state": "pending",
+        "created_at": now,
+        "updated_at": now,
+        "amount": body["amount"],
+        "currency": body["currency"],
+        "settlement_currency": body.get("settlement_currency") or body["currency"],
+        "outstanding_amount": body["amount"],
+        "capture_mode": "automatic",
+        "enforce_challenge": "automatic",
+        "authorisation_type": "final",
+        "checkout_url": f"https://checkout.mock.local/payment-link/{order_id}",
+        "metadata": body.get("metadata") or {},
+    }
+    orders[order_id] = order
+    stats["created"] += 1
+    return JSONResponse(order, status_code=201)
+
+
+@app.get("/api/orders/{order_id}")
+async def get_order(order_id: str):
+    failure = await _inject_faults()
+    if failure is not None:
+        return failure
+    order = orders.get(order_id)
+    if order is None:
+        return JSONResponse({"code": "order_not_found", "message": "Order not found"}, status_code=404)
+    return order
+
+
+@app.get("/_mock/config")
+async def get_config():
+    return config
+
+
+@app.put("/_mock/config")
+async def update_config(update: Dict[str, float]):
+    unknown = set(update) - set(config)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown settings: {sorted(unknown)}")
+    config.update(update)
+    return config
+
+
+@app.get("/_mock/stats")
+async def get_stats():
+    return {**stats, "orders": len(orders)}
+
+
+@app.post("/_mock/orders/{order_id}/state")
+async def set_order_state(order_id: str, body: Dict[str, str]):
+    order = orders.get(order_id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    order["state"] = body["state"]
+    order["updated_at"] = _now()
+    return order
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock Revolut Merchant API with fault injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=config["latency_ms"])
+    parser.add_argument("--jitter-ms", type=float, default=config["jitter_ms"])
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"])
+    parser.add_argument("--error-status", type=int, default=config["error_status"])
+    parser.add_argument("--timeout-rate", type=float, default=config["timeout_rate"])
+    parser.add_argument("--hang-seconds", type=float, default=config["hang_seconds"])
+    args = parser.parse_args()
+    config.update({key: getattr(args, key) for key in config})
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
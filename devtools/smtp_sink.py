@@ -0,0 +1,144 @@
+"""
+Local SMTP stand-in for the guide email pipeline.
+
+Accepts mail on --port (default 1025, the SMTP_PORT default) and prints one
+line per message; with --maildir it also stores each message as an .eml file.
+Email is off by default; run the app with EMAIL_ENABLED=true SMTP_HOST=localhost.
+Failure injection for the retry path:
+
+    --tempfail-rate   share of RCPT TO answered with 451 (retried by the app)
+    --permfail-rate   share of RCPT TO answered with 550 (not retried)
+    --drop-after N    close the connection after N messages (exercises reconnects)
+
+    python -m devtools.smtp_sink [--port 1025] [--maildir /tmp/mail] [--tempfail-rate 0.2]
+"""
+import argparse
+import asyncio
+import random
+import time
+from email import message_from_bytes, policy
+from pathlib import Path
+from typing import Optional
+
+stats = {"connections": 0, "messages": 0, "tempfail": 0, "permfail": 0}
+
+
+class SmtpSession:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, args):
+        self.reader = reader
+        self.writer = writer
+        self.args = args
+        self.mail_from: Optional[str] = None
+        self.recipients: list = []
+        self.messages = 0
+
+    async def reply(self, line: str) -> None:
+        self.writer.write(line.encode("ascii") + b"\r\n")
+        await self.writer.drain()
+
+    def reset(self) -> None:
+        self.mail_from = None
+        self.recipients = []
+
+    async def read_data(self) -> bytes:
+        lines = []
+        while True:
+            line = await self.reader.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            if line.startswith(b".."):
+                line = line[1:]
+            lines.append(line)
+        return b"".join(lines)
+
+    def store(self, data: bytes) -> None:
+        message = message_from_bytes(data, policy=policy.default)
+        stats["messages"] += 1
+        print(f"{time.strftime('%H:%M:%S')} #{stats['messages']} to={','.join(self.recipients)} "
+              f"subject={message['Subject']!r} bytes={len(data)}", flush=True)
+        if self.args.maildir:
+            path = Path(self.args.maildir)
+            path.mkdir(parents=True, exist_ok=True)
+            (path / f"{time.time_ns()}.eml").write_bytes(data)
+
+    async def handle(self) -> None:
+        stats["connections"] += 1
+        await self.reply("220 smtp-sink ESMTP ready")
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            command, _, argument = line.decode("utf-8", "replace").strip().partition(" ")
+            command = command.upper()
+            if command in ("EHLO", "HELO"):
+                self.writer.write(b"250-smtp-sink\r\n250-8BITMIME\r\n250-SMTPUTF8\r\n")
+                await self.reply("250 SIZE 10485760")
+            elif command == "MAIL":
+                self.reset()
+                self.mail_from = argument
+                await self.reply("250 OK")
+            elif command == "RCPT":
+                draw = random.random()
+                if draw < self.args.tempfail_rate:
+                    stats["tempfail"] += 1
+                    await self.reply("451 4.3.0 Temporary failure, try again later")
+                elif draw < self.args.tempfail_rate + self.args.permfail_rate:
+                    stats["permfail"] += 1
+                    await self.reply("550 5.1.1 Mailbox unavailable")
+                else:
+                    self.recipients.append(argument.partition(":")[2].strip("<> "))
+                    await self.reply("250 OK")
+            elif command == "DATA":
+                if not self.recipients:
+                    await self.reply("554 5.5.1 No valid recipients")
+                    continue
+                await self.reply("354 End data with <CR><LF>.<CR><LF>")
+                self.store(await self.read_data())
+                self.reset()
+                await self.reply("250 OK queued")
+                self.messages += 1
+                if self.args.drop_after and self.messages >= self.args.drop_after:
+                    self.writer.close()
+                    return
+            elif command == "RSET":
+                self.reset()
+                await self.reply("250 OK")
+            elif command == "NOOP":
+                await self.reply("250 OK")
+            elif command == "QUIT":
+                await self.reply("221 Bye")
+                self.writer.close()
+                return
+            else:
+                await self.reply("502 5.5.2 Command not implemented")
+
+
+async def serve(args) -> None:
+    async def on_connect(reader, writer):
+        try:
+            await SmtpSession(reader, writer, args).handle()
+        except ConnectionError:
+            pass
+
+    server = await asyncio.start_server(on_connect, args.host, args.port)
+    print(f"smtp-sink listening on {args.host}:{args.port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local SMTP sink with failure injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--maildir", default=None, help="directory to store received messages (.eml)")
+    parser.add_argument("--tempfail-rate", type=float, default=0.0)
+    parser.add_argument("--permfail-rate", type=float, default=0.0)
+    parser.add_argument("--drop-after", type=int, default=0, help="close the connection after N messages")
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        print(f"\n{stats}")
+
+
+if __name__ == "__main__":
+    main()
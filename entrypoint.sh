@@ -5,7 +5,14 @@ echo "Waiting for Postgres..."
 echo "Postgres is up."
 
 echo "Running migrations..."
+# A database created before migrations were tracked in git fails here with
+# "Can't locate revision": run `alembic stamp --purge base` against it once
+# (see alembic/versions/3f1c2a9d7b10_add_description_html_columns.py).
 alembic upgrade head
 
+# Full pass at start; after that the app re-renders changed pages on every catalog write (PRERENDER_DIR)
+echo "Pre-rendering catalog pages..."
+python -m app.cli.prerender --out /app/prerendered || echo "Pre-render failed, nginx will fall back to the backend"
+
 echo "Starting backend..."
 exec uvicorn main:app --host 0.0.0.0 --port 8000
@@ -1,16 +1,57 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from app.apis.deps import get_session
 from app.apis.main import api_router
 from app.web import web_router
 from app.core.seed import run_initialization
+from app.core.image_cache import resized_image_cache
+from app.core.payment_client import payment_client
+from app.core.order_events import order_event_queue
+from app.core.order_reconciler import order_reconciler
+from app.core.guide_emails import guide_email_sender
+from app.core.job_queue import job_worker
+from app.core.config import settings
+from app.core.static_manifest import static_manifest
+from app.core.prerender_refresh import prerender_refresher
+from app.web.static_files import FingerprintedStaticFiles
 from app.database.db import async_session_maker
+from app.database.crud.product_files import load_product_file_index
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # startup
+    await asyncio.to_thread(static_manifest.build)
+    async with async_session_maker() as session:
+        await run_initialization(session)
+        await load_product_file_index(session)
+    resized_image_cache.load()
+    await payment_client.start()
+    if settings.JOBS_RUN_IN_PROCESS:
+        job_worker.start()
+    order_event_queue.start()
+    order_reconciler.start()
+
+    yield
+
+    # shutdown
+    await order_reconciler.stop()
+    await prerender_refresher.wait()
+    await order_event_queue.stop()
+    await job_worker.stop()
+    await guide_email_sender.close()
+    await payment_client.close()
+    resized_image_cache.shutdown()
+
 
 app = FastAPI(
     title="SnovaTour Travel Guides API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -24,15 +65,13 @@ app.add_middleware(
 # Подключаем шаблоны
 
 
-# Подключаем статику (css/js)
-app.mount("/static", StaticFiles(directory="app/web/static"), name="static")
+# Подключаем статику (css/js); пути с хэшем содержимого кэшируются как immutable
+app.mount(
+    "/static",
+    FingerprintedStaticFiles(directory="app/web/static", manifest=static_manifest),
+    name="static",
+)
 
 app.include_router(api_router, prefix="/api")
 app.include_router(web_router, tags=["Web Routes"])
 
-
-
-@app.on_event("startup")
-async def startup_event():
-    async with async_session_maker() as session:
-        await run_initialization(session)
\ No newline at end of file
@@ -0,0 +1,84 @@
+import os
+
+# Settings are read from the environment at import; route tests never touch the DB,
+# tests using the `db` fixture are skipped when this database is unreachable
+for _name, _value in {
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "test",
+    "REVOLUT_URL": "http://localhost:9000",
+    "SECRET_API_KEY": "test",
+    "DOWNLOAD_LINK_SECRET": "test-download-link-secret",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import main
+from app.apis.deps import get_session
+from app.core.config import settings
+
+
+class FakeSession:
+    """Stands in for AsyncSession where the CRUD calls are patched out."""
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+
+@pytest.fixture
+def client():
+    async def fake_session():
+        yield FakeSession()
+
+    main.app.dependency_overrides[get_session] = fake_session
+    try:
+        yield TestClient(main.app)
+    finally:
+        main.app.dependency_overrides.pop(get_session, None)
+
+
+@pytest.fixture
+def db_session_maker():
+    """
+    Session maker for the real database; NullPool so that no connection outlives
+    the event loop of the asyncio.run() that opened it.
+    """
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+
+    async def ping():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    try:
+        asyncio.run(ping())
+    except Exception as exc:
+        pytest.skip(f"database is unavailable: {exc}")
+
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def db(db_session_maker):
+    """Runs `await fn(session)` on the real database in a fresh event loop: db(fn) -> result."""
+    def run(fn):
+        async def runner():
+            async with db_session_maker() as session:
+                return await fn(session)
+
+        return asyncio.run(runner())
+
+    return run
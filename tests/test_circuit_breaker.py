@@ -0,0 +1,56 @@
+import pytest
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def make_breaker(open_seconds: float = 0) -> CircuitBreaker:
+    # open_seconds=0: сразу после открытия breaker в half_open
+    return CircuitBreaker(failure_threshold=1, window=10, timeout_rate=0.5, open_seconds=open_seconds)
+
+
+def test_probe_success_closes_the_breaker():
+    breaker = make_breaker()
+    breaker.record_failure(breaker.before_call())
+
+    probe = breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success(probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_late_success_does_not_close_the_breaker():
+    breaker = make_breaker()
+    slow_call = breaker.before_call()
+    breaker.record_failure(breaker.before_call())
+
+    probe = breaker.before_call()
+    # долгий вызов, пропущенный до открытия, завершился успешно — это не пробный вызов
+    breaker.record_success(slow_call)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_failure(probe)
+    assert breaker._state == CircuitBreaker.OPEN
+
+
+def test_late_failure_does_not_reopen_after_recovery():
+    breaker = make_breaker()
+    slow_call = breaker.before_call()
+    breaker.record_failure(breaker.before_call())
+    breaker.record_success(breaker.before_call())
+
+    breaker.record_failure(slow_call, timeout=True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.opened_count == 1
+
+
+def test_released_stale_call_keeps_the_probe_slot():
+    breaker = make_breaker()
+    slow_call = breaker.before_call()
+    breaker.record_failure(breaker.before_call())
+
+    breaker.before_call()
+    breaker.release(slow_call)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
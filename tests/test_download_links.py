@@ -0,0 +1,186 @@
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from pydantic import ValidationError
+
+from app.apis.v1 import download
+from app.core.config import DEV_SECRET_KEY, Languages, Settings
+from app.core.download_links import sign_download_link
+from app.core.file_index import build_indexed_file, product_file_index
+from app.schemas import OrderRead
+from app.web.routes import thank_you
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+CHECKOUT_REF = "Zx3b9Q0fF8pC1mRr7vT2kLw5nY4hJ6sA"
+FILE = build_indexed_file(
+    file_id=1,
+    product_id=1,
+    product_code="G001",
+    lang="en",
+    file_link="static/files/example_en.pdf",
+    description="Download: https://example.com>",
+    description_html=None,
+    updated_at=NOW,
+    product_updated_at=NOW,
+)
+
+
+def make_order(state: str = "completed", product_code: str = "G001", lang: str = "en") -> OrderRead:
+    return OrderRead(
+        id="order-1",
+        product_code=product_code,
+        lang=Languages(lang),
+        state=state,
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+@pytest.fixture
+def shop(monkeypatch):
+    """Patched order / file lookups; the test sets shop["order"] and shop["provider_state"]."""
+    state = {"order": make_order(), "provider_state": None, "applied": []}
+
+    async def get_order_by_checkout_ref(session, checkout_ref):
+        return state["order"] if checkout_ref == CHECKOUT_REF else None
+
+    async def fetch_provider_state(order_id):
+        return state["provider_state"]
+
+    async def apply_order_states(session, states):
+        state["applied"].append(states)
+        return list(states.items())
+
+    async def get_indexed_file(session, file_id):
+        return FILE if file_id == FILE.file_id else None
+
+    async def get_indexed_file_by_product(session, product_code, lang):
+        return FILE
+
+    monkeypatch.setattr(thank_you, "get_order_by_checkout_ref", get_order_by_checkout_ref)
+    monkeypatch.setattr(thank_you, "fetch_provider_state", fetch_provider_state)
+    monkeypatch.setattr(thank_you, "apply_order_states", apply_order_states)
+    monkeypatch.setattr(thank_you, "get_indexed_file_by_product", get_indexed_file_by_product)
+    monkeypatch.setattr(download, "get_indexed_file", get_indexed_file)
+    return state
+
+
+def signed_query(url: str) -> dict:
+    return {key: values[0] for key, values in parse_qs(urlsplit(url).query).items()}
+
+
+def test_thank_you_requires_order(client, shop):
+    assert client.get("/thank-you/G001/en").status_code == 422
+
+
+def test_thank_you_forged_order_is_not_found(client, shop):
+    response = client.get("/thank-you/G001/en", params={"order": "forged-reference-0000"})
+    assert response.status_code == 404
+    assert "/api/v1/download/" not in response.text
+
+
+def test_thank_you_order_for_another_product_is_not_found(client, shop):
+    shop["order"] = make_order(product_code="G002")
+    assert client.get("/thank-you/G001/en", params={"order": CHECKOUT_REF}).status_code == 404
+
+
+def test_thank_you_order_for_another_language_is_not_found(client, shop):
+    shop["order"] = make_order(lang="ru")
+    assert client.get("/thank-you/G001/en", params={"order": CHECKOUT_REF}).status_code == 404
+
+
+def test_thank_you_pending_payment_shows_refreshing_page(client, shop):
+    shop["order"] = make_order(state="processing")
+    shop["provider_state"] = "authorised"
+    response = client.get("/thank-you/G001/en", params={"order": CHECKOUT_REF})
+    assert response.status_code == 202
+    assert response.headers["content-type"].startswith("text/html")
+    assert response.headers["refresh"] == "5"
+    assert response.headers["cache-control"] == "no-store"
+    assert "/api/v1/download/" not in response.text
+    assert shop["applied"] == [{"order-1": "authorised"}]
+
+
+def test_thank_you_failed_order_is_forbidden(client, shop):
+    shop["order"] = make_order(state="pending")
+    shop["provider_state"] = "failed"
+    response = client.get("/thank-you/G001/en", params={"order": CHECKOUT_REF})
+    assert response.status_code == 403
+
+
+def test_thank_you_checks_provider_when_webhook_is_late(client, shop):
+    shop["order"] = make_order(state="pending")
+    shop["provider_state"] = "completed"
+    response = client.get("/thank-you/G001/en", params={"order": CHECKOUT_REF})
+    assert response.status_code == 200
+    assert shop["applied"] == [{"order-1": "completed"}]
+
+
+def test_thank_you_signs_link_for_the_paid_order(client, shop):
+    response = client.get("/thank-you/G001/en", params={"order": CHECKOUT_REF})
+    assert response.status_code == 200
+    assert "order=order-1" in response.text
+    assert CHECKOUT_REF not in response.text.split("/api/v1/download/", 1)[1].split('"', 1)[0]
+
+
+def test_download_with_valid_link(client, shop):
+    response = client.get(sign_download_link(FILE.file_id, "order-1").url)
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("private")
+    assert int(response.headers["content-length"]) == FILE.size
+
+
+def test_download_of_a_vanished_file_drops_the_index_entry(client, shop, tmp_path, monkeypatch):
+    # файл удалили на диске в обход API: запись индекса ещё указывает на него
+    gone = FILE._replace(path=tmp_path / "gone.pdf")
+    product_file_index.put(gone)
+
+    async def get_indexed_file(session, file_id):
+        return product_file_index.get(file_id)
+
+    monkeypatch.setattr(download, "get_indexed_file", get_indexed_file)
+    with pytest.raises(OSError):
+        client.get(sign_download_link(FILE.file_id, "order-1").url)
+    assert product_file_index.get(FILE.file_id) is None
+
+
+def test_download_expired_link(client, shop):
+    link = sign_download_link(FILE.file_id, "order-1", now=time.time() - 10 * 24 * 3600)
+    assert client.get(link.url).status_code == 410
+
+
+def test_download_tampered_signature(client, shop):
+    query = signed_query(sign_download_link(FILE.file_id, "order-1").url)
+    signature = query["signature"]
+    query["signature"] = ("A" if signature[0] != "A" else "B") + signature[1:]
+    assert client.get(f"/api/v1/download/{FILE.file_id}", params=query).status_code == 403
+
+
+def test_download_signature_of_another_order(client, shop):
+    query = signed_query(sign_download_link(FILE.file_id, "order-1").url)
+    query["order"] = "order-2"
+    assert client.get(f"/api/v1/download/{FILE.file_id}", params=query).status_code == 403
+
+
+def test_download_signature_of_another_file(client, shop):
+    query = signed_query(sign_download_link(2, "order-1").url)
+    assert client.get(f"/api/v1/download/{FILE.file_id}", params=query).status_code == 403
+
+
+def test_download_without_order(client, shop):
+    query = signed_query(sign_download_link(FILE.file_id, "order-1").url)
+    del query["order"]
+    assert client.get(f"/api/v1/download/{FILE.file_id}", params=query).status_code == 403
+
+
+def test_sign_requires_order():
+    with pytest.raises(ValueError):
+        sign_download_link(FILE.file_id, "")
+
+
+@pytest.mark.parametrize("secret", ["", "   ", DEV_SECRET_KEY])
+def test_download_link_secret_must_be_private(secret):
+    with pytest.raises(ValidationError):
+        Settings(DOWNLOAD_LINK_SECRET=secret)
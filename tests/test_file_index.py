@@ -0,0 +1,66 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete, func, update
+
+from app.core import file_index
+from app.core.file_index import product_file_index
+from app.database.crud.product_files import get_indexed_file
+from app.database.models import Product, ProductFile
+
+
+@pytest.fixture
+def product_file(db):
+    """A test product with an English file; removed (with its index entry) afterwards."""
+    code = f"T{uuid.uuid4().hex[:8]}"
+
+    async def create(session):
+        product = Product(product_code=code, price=1000, currency="EUR")
+        session.add(product)
+        await session.flush()
+        item = ProductFile(product_id=product.id, lang="en", file_link="static/files/example_en.pdf")
+        session.add(item)
+        await session.commit()
+        return product.id, item.id
+
+    product_id, file_id = db(create)
+    yield file_id
+
+    async def cleanup(session):
+        await session.execute(delete(ProductFile).where(ProductFile.id == file_id))
+        await session.execute(delete(Product).where(Product.id == product_id))
+        await session.commit()
+
+    db(cleanup)
+    product_file_index.remove(file_id)
+
+
+def test_indexed_file_is_checked_by_db_version_without_stat(db, product_file, monkeypatch):
+    assert db(lambda session: get_indexed_file(session, product_file)).file_link == "static/files/example_en.pdf"
+
+    stats = []
+    stat_file = file_index._stat_file
+
+    def counting_stat_file(file_id, file_link):
+        stats.append(file_link)
+        return stat_file(file_id, file_link)
+
+    monkeypatch.setattr(file_index, "_stat_file", counting_stat_file)
+
+    # версия в БД не менялась: запись из индекса, без stat
+    db(lambda session: get_indexed_file(session, product_file))
+    assert stats == []
+
+    async def update_in_other_process(session):
+        await session.execute(
+            update(ProductFile)
+            .where(ProductFile.id == product_file)
+            .values(file_link="static/files/example_ru.pdf", updated_at=func.clock_timestamp())
+        )
+        await session.commit()
+
+    db(update_in_other_process)
+    fresh = db(lambda session: get_indexed_file(session, product_file))
+    assert fresh.file_link == "static/files/example_ru.pdf"
+    assert fresh.path is not None
+    assert stats == ["static/files/example_ru.pdf"]
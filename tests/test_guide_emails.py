@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.core import guide_emails
+from app.core.config import settings
+from app.core.file_index import build_indexed_file
+from app.core.guide_emails import GuideEmail, GuideEmailRenderer
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+FILE = build_indexed_file(
+    file_id=1,
+    product_id=1,
+    product_code="G001",
+    lang="en",
+    file_link="static/files/example_en.pdf",
+    description="Download: https://example.com>",
+    description_html=None,
+    updated_at=NOW,
+    product_updated_at=NOW,
+)
+
+
+def render(monkeypatch, job: GuideEmail) -> str:
+    async def get_indexed_file_by_product(session, product_code, lang):
+        return FILE
+
+    monkeypatch.setattr(guide_emails, "get_indexed_file_by_product", get_indexed_file_by_product)
+    message = asyncio.run(GuideEmailRenderer(maxsize=10).message(job))
+    return message.get_body(("plain",)).get_content()
+
+
+def test_email_links_to_the_order_page(monkeypatch):
+    text = render(monkeypatch, GuideEmail("order-1", "buyer@example.com", "G001", "en", checkout_ref="ref-1"))
+
+    # страница заказа выдаёт свежую ссылку при каждом открытии — письмо не устаревает
+    assert f"{settings.MY_URL}/thank-you/G001/en?order=ref-1" in text
+    assert "/api/v1/download/" not in text
+
+
+def test_email_without_checkout_ref_gets_a_signed_link(monkeypatch):
+    text = render(monkeypatch, GuideEmail("order-1", "buyer@example.com", "G001", "en"))
+
+    assert f"{settings.MY_URL}/api/v1/download/1?" in text
+    assert "signature=" in text
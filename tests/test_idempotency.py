@@ -0,0 +1,105 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete
+
+from app.apis.v1 import order
+from app.core.idempotency import IdempotencyKeyConflict, IdempotencyStore, IdempotentRequestAborted
+from app.database.models import IdempotencyKey
+
+ORDER = {
+    "product_code": "G001",
+    "lang": "en",
+    "customers_email": "buyer@example.com",
+    "settlement_currency": "EUR",
+}
+
+
+@pytest.fixture
+def key(db):
+    """A unique Idempotency-Key; its row is removed afterwards."""
+    value = f"test-{uuid.uuid4()}"
+    yield value
+
+    async def cleanup(session):
+        await session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == value))
+        await session.commit()
+
+    db(cleanup)
+
+
+def make_store(db_session_maker) -> IdempotencyStore:
+    return IdempotencyStore(ttl=60, lock_seconds=60, poll_interval=0.01, session_maker=db_session_maker)
+
+
+def test_concurrent_requests_share_the_first_result(db_session_maker, key):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {"checkout_url": "https://pay.example/1"}
+
+    async def scenario():
+        # отдельные хранилища — как отдельные воркеры приложения
+        stores = [make_store(db_session_maker) for _ in range(3)]
+        return await asyncio.gather(*(store.run(key, "fp", call) for store in stores))
+
+    assert asyncio.run(scenario()) == [{"checkout_url": "https://pay.example/1"}] * 3
+    assert len(calls) == 1
+
+
+def test_same_key_with_other_body_conflicts(db_session_maker, key):
+    store = make_store(db_session_maker)
+
+    async def call():
+        return {"status": "ok"}
+
+    async def scenario():
+        await store.run(key, "fp", call)
+        await store.run(key, "other", call)
+
+    with pytest.raises(IdempotencyKeyConflict):
+        asyncio.run(scenario())
+
+
+def test_cancelled_first_request_fails_waiters_retryably(db_session_maker, key):
+    store = make_store(db_session_maker)
+    started = []
+
+    async def call():
+        started.append(1)
+        await asyncio.sleep(10)
+        return {"checkout_url": "first"}
+
+    async def quick():
+        return {"checkout_url": "retried"}
+
+    async def scenario():
+        first = asyncio.create_task(store.run(key, "fp", call))
+        while not started:
+            await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(store.run(key, "fp", quick))
+        await asyncio.sleep(0.1)
+        first.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        with pytest.raises(IdempotentRequestAborted):
+            await waiter
+        # запись удалена: повтор с тем же ключом выполняется заново
+        return await store.run(key, "fp", quick)
+
+    assert asyncio.run(scenario()) == {"checkout_url": "retried"}
+    assert len(started) == 1
+
+
+def test_aborted_original_request_is_service_unavailable(client, monkeypatch):
+    async def run(key, fingerprint, call):
+        raise IdempotentRequestAborted("aborted")
+
+    monkeypatch.setattr(order.idempotency_store, "run", run)
+    response = client.post("/api/v1/order", json=ORDER, headers={"Idempotency-Key": "abc"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
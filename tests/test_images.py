@@ -0,0 +1,29 @@
+from app.core.images import STATIC_ROOT, source_version, version_resized_image_urls
+
+SOURCE = STATIC_ROOT / "img" / "azores1.jpg"
+
+
+def test_description_image_urls_get_the_source_version():
+    version = source_version(SOURCE.stat())
+    html = '<p><img alt="a" src="/img/480/azores1.jpg"> <img src="/img/960/azores1.jpg?v=000000000000"></p>'
+
+    assert version_resized_image_urls(html) == (
+        f'<p><img alt="a" src="/img/480/azores1.jpg?v={version}"> '
+        f'<img src="/img/960/azores1.jpg?v={version}"></p>'
+    )
+
+
+def test_missing_source_keeps_an_unversioned_url():
+    html = '<img src="/img/480/missing.jpg?v=abc">'
+    assert version_resized_image_urls(html) == '<img src="/img/480/missing.jpg">'
+
+
+def test_versioned_url_is_immutable(client):
+    version = source_version(SOURCE.stat())
+
+    versioned = client.get(f"/img/480/azores1.jpg?v={version}", headers={"Accept": "image/webp"})
+    assert versioned.status_code == 200
+    assert "immutable" in versioned.headers["Cache-Control"]
+
+    stale = client.get("/img/480/azores1.jpg?v=000000000000", headers={"Accept": "image/webp"})
+    assert stale.headers["Cache-Control"] == "public, max-age=300"
@@ -0,0 +1,48 @@
+import asyncio
+import uuid
+
+from sqlalchemy import delete, select
+
+from app.core import job_queue
+from app.core.config import settings
+from app.core.job_queue import JobHandler, JobWorker
+from app.database.crud.jobs import claim_jobs, enqueue_job
+from app.database.models.job import Job
+
+
+def test_lease_is_extended_while_the_batch_runs(db_session_maker, monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_LEASE_SECONDS", 1)
+    monkeypatch.setattr(job_queue, "async_session_maker", db_session_maker)
+    kind = f"test-{uuid.uuid4()}"
+    stolen = []
+
+    async def slow_handler(jobs):
+        # обработчик (ожидание SMTP-пула, отправка) дольше аренды
+        await asyncio.sleep(1.6)
+        async with db_session_maker() as session:
+            stolen.extend(await claim_jobs(session, kind, "other-worker", limit=10, lease_seconds=1))
+        await asyncio.sleep(0.6)
+        return [None] * len(jobs)
+
+    worker = JobWorker(
+        concurrency=1,
+        poll_interval=0.1,
+        handlers={kind: JobHandler(kind=kind, func=slow_handler, batch_size=10, backoff_seconds=0)},
+    )
+
+    async def scenario():
+        async with db_session_maker() as session:
+            await enqueue_job(session, kind, {"n": 1})
+        processed = await worker.run_once("test-worker")
+        async with db_session_maker() as session:
+            left = (await session.execute(select(Job.id).where(Job.kind == kind))).all()
+            await session.execute(delete(Job).where(Job.kind == kind))
+            await session.commit()
+        return processed, left
+
+    processed, left = asyncio.run(scenario())
+    assert processed == 1
+    # аренда продлевалась: другой воркер задачу не забрал, выполненная задача удалена
+    assert stolen == []
+    assert left == []
+    assert worker.completed == 1
@@ -0,0 +1,195 @@
+import hashlib
+import hmac
+import json
+import time
+import uuid
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from app.apis.v1 import webhooks
+from app.core.config import settings
+from app.core.order_events import InvalidWebhookSignature, OrderEventQueue, verify_revolut_signature
+from app.database.crud.jobs import JOB_GUIDE_EMAIL
+from app.database.crud.order import apply_order_states
+from app.database.models.job import Job
+from app.database.models.order import Order
+
+SECRET = "wsk_test_secret"
+URL = "/api/v1/webhooks/revolut"
+
+
+def sign(body: bytes, timestamp: str, secret: str = SECRET) -> str:
+    payload = b"v1." + timestamp.encode("ascii") + b"." + body
+    return "v1=" + hmac.new(secret.encode("utf-8"), payload, hashlib.sha256).hexdigest()
+
+
+def now_ms() -> str:
+    return str(int(time.time() * 1000))
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """Webhook secret configured and a fresh event queue (nothing consumes it)."""
+    monkeypatch.setattr(settings, "REVOLUT_WEBHOOK_SECRET", SECRET)
+    queue = OrderEventQueue(maxsize=10, batch_size=10, batch_wait=0)
+    monkeypatch.setattr(webhooks, "order_event_queue", queue)
+    return queue
+
+
+def post_event(client, payload: dict, timestamp: str = None, signature: str = None, secret: str = SECRET):
+    body = json.dumps(payload).encode("utf-8")
+    timestamp = now_ms() if timestamp is None else timestamp
+    headers = {
+        "Content-Type": "application/json",
+        "Revolut-Request-Timestamp": timestamp,
+        "Revolut-Signature": sign(body, timestamp, secret) if signature is None else signature,
+    }
+    return client.post(URL, content=body, headers=headers)
+
+
+def test_signed_event_is_accepted_once(client, events):
+    payload = {"event": "ORDER_COMPLETED", "order_id": "order-1"}
+
+    first = post_event(client, payload)
+    assert first.status_code == 200
+    assert first.json() == {"status": "accepted"}
+
+    # повтор провайдера с новой подписью — тот же ключ события
+    assert post_event(client, payload).json() == {"status": "duplicate"}
+    assert events._queue.qsize() == 1
+
+
+def test_rotated_secret_signature_is_accepted(client, events):
+    body = json.dumps({"event": "ORDER_COMPLETED", "order_id": "order-1"}).encode("utf-8")
+    timestamp = now_ms()
+    header = f"{sign(body, timestamp, 'wsk_old_secret')}, {sign(body, timestamp)}"
+
+    response = client.post(
+        URL, content=body, headers={"Revolut-Request-Timestamp": timestamp, "Revolut-Signature": header}
+    )
+    assert response.status_code == 200
+
+
+def test_unknown_event_is_ignored(client, events):
+    response = post_event(client, {"event": "PAYMENT_CREATED", "order_id": "order-1"})
+    assert response.json() == {"status": "ignored"}
+    assert events._queue.qsize() == 0
+
+
+def test_wrong_secret_is_rejected(client, events):
+    response = post_event(client, {"event": "ORDER_COMPLETED", "order_id": "order-1"}, secret="wsk_other")
+    assert response.status_code == 401
+    assert events._queue.qsize() == 0
+
+
+def test_tampered_body_is_rejected(client, events):
+    timestamp = now_ms()
+    signature = sign(json.dumps({"event": "ORDER_FAILED", "order_id": "order-1"}).encode("utf-8"), timestamp)
+
+    response = post_event(
+        client, {"event": "ORDER_COMPLETED", "order_id": "order-1"}, timestamp=timestamp, signature=signature
+    )
+    assert response.status_code == 401
+
+
+def test_missing_signature_headers_are_rejected(client, events):
+    response = client.post(URL, json={"event": "ORDER_COMPLETED", "order_id": "order-1"})
+    assert response.status_code == 401
+
+
+def test_stale_timestamp_is_rejected(client, events):
+    stale = str(int((time.time() - settings.WEBHOOK_TIMESTAMP_TOLERANCE_SECONDS - 60) * 1000))
+    response = post_event(client, {"event": "ORDER_COMPLETED", "order_id": "order-1"}, timestamp=stale)
+    assert response.status_code == 401
+
+
+def test_unconfigured_secret_rejects_everything(monkeypatch):
+    monkeypatch.setattr(settings, "REVOLUT_WEBHOOK_SECRET", "")
+    timestamp = now_ms()
+    with pytest.raises(InvalidWebhookSignature):
+        verify_revolut_signature(b"{}", timestamp, sign(b"{}", timestamp, ""))
+
+
+def test_signed_malformed_body_is_bad_request(client, events):
+    body = b"not json"
+    timestamp = now_ms()
+    response = client.post(
+        URL, content=body, headers={"Revolut-Request-Timestamp": timestamp, "Revolut-Signature": sign(body, timestamp)}
+    )
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def orders(db, monkeypatch):
+    """Two pending test orders; removed together with their jobs afterwards."""
+    monkeypatch.setattr(settings, "EMAIL_ENABLED", True)
+    ids = [f"test-{uuid.uuid4()}" for _ in range(2)]
+
+    async def create(session):
+        for order_id in ids:
+            session.add(
+                Order(
+                    id=order_id,
+                    amount=1000,
+                    currency="EUR",
+                    settlement_currency="EUR",
+                    customers_email="buyer@example.com",
+                    product_code="G001",
+                    lang="en",
+                )
+            )
+        await session.commit()
+
+    async def cleanup(session):
+        await session.execute(delete(Job).where(Job.dedup_key.in_([f"{JOB_GUIDE_EMAIL}:{i}" for i in ids])))
+        await session.execute(delete(Order).where(Order.id.in_(ids)))
+        await session.commit()
+
+    db(create)
+    yield ids
+    db(cleanup)
+
+
+def test_apply_order_states_reports_each_change_once(db, orders):
+    first, second = orders
+
+    changed = db(lambda session: apply_order_states(session, {first: "completed", second: "authorised"}))
+    assert sorted(changed) == sorted([(first, "completed"), (second, "authorised")])
+
+    # повтор того же пакета ничего не меняет и ничего не сообщает
+    assert db(lambda session: apply_order_states(session, {first: "completed", second: "authorised"})) == []
+
+    async def guide_jobs(session):
+        query = select(func.count()).select_from(Job).where(Job.dedup_key == f"{JOB_GUIDE_EMAIL}:{first}")
+        return (await session.execute(query)).scalar_one()
+
+    assert db(guide_jobs) == 1
+
+
+def test_apply_order_states_keeps_terminal_state(db, orders):
+    first, second = orders
+    db(lambda session: apply_order_states(session, {first: "completed", second: "failed"}))
+
+    # запоздавшие события не откатывают финальное состояние
+    changed = db(lambda session: apply_order_states(session, {first: "authorised", second: "completed"}))
+    assert changed == []
+
+    async def states(session):
+        rows = await session.execute(select(Order.id, Order.state).where(Order.id.in_(orders)))
+        return dict(rows.all())
+
+    assert db(states) == {first: "completed", second: "failed"}
+
+
+def test_apply_order_states_never_moves_backwards(db, orders):
+    first, second = orders
+    db(lambda session: apply_order_states(session, {first: "authorised", second: "processing"}))
+
+    # ответ сверки / webhook из более раннего пакета приходит позже
+    changed = db(lambda session: apply_order_states(session, {first: "processing", second: "pending"}))
+    assert changed == []
+
+    # движение вперёд по-прежнему применяется
+    changed = db(lambda session: apply_order_states(session, {first: "completed", second: "authorised"}))
+    assert sorted(changed) == sorted([(first, "completed"), (second, "authorised")])
@@ -0,0 +1,76 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, func, select, update
+
+from app.core import order_reconciler as reconciler_module
+from app.core.config import settings
+from app.core.order_reconciler import OrderReconciler
+from app.database.crud.jobs import JOB_GUIDE_EMAIL
+from app.database.models import Order, SystemMetadata
+from app.database.models.job import Job
+
+
+@pytest.fixture
+def reconciler(db_session_maker, monkeypatch):
+    """Reconciler on the test database with its own cursor keys; the provider is faked per test."""
+    cursor_key = f"test-reconciler-{uuid.uuid4()}:{{state}}"
+    monkeypatch.setattr(reconciler_module, "async_session_maker", db_session_maker)
+    monkeypatch.setattr(reconciler_module, "RECONCILE_CURSOR_KEY", cursor_key)
+    monkeypatch.setattr(settings, "RECONCILE_PAGE_SIZE", 1000)
+    monkeypatch.setattr(settings, "EMAIL_ENABLED", True)
+    yield OrderReconciler()
+
+    async def cleanup():
+        async with db_session_maker() as session:
+            await session.execute(delete(SystemMetadata).where(SystemMetadata.key.like(cursor_key.format(state="%"))))
+            await session.commit()
+
+    asyncio.run(cleanup())
+
+
+def test_authorised_order_is_completed_by_the_reconciler(db_session_maker, reconciler, monkeypatch):
+    order_id = f"test-{uuid.uuid4()}"
+
+    async def fetch_provider_state(checked_id):
+        # ORDER_COMPLETED потерян: провайдер уже считает заказ оплаченным
+        return "completed" if checked_id == order_id else None
+
+    monkeypatch.setattr(reconciler_module, "fetch_provider_state", fetch_provider_state)
+
+    async def scenario():
+        async with db_session_maker() as session:
+            session.add(Order(
+                id=order_id,
+                state="authorised",
+                amount=1000,
+                currency="EUR",
+                settlement_currency="EUR",
+                customers_email="buyer@example.com",
+                product_code="G001",
+                lang="en",
+            ))
+            await session.commit()
+            stale = datetime.now(timezone.utc) - timedelta(seconds=settings.RECONCILE_STALE_AFTER_SECONDS + 60)
+            await session.execute(update(Order).where(Order.id == order_id).values(updated_at=stale))
+            await session.commit()
+        try:
+            await reconciler.run_once()
+            async with db_session_maker() as session:
+                state = await session.scalar(select(Order.state).where(Order.id == order_id))
+                jobs = await session.scalar(
+                    select(func.count()).select_from(Job).where(Job.dedup_key == f"{JOB_GUIDE_EMAIL}:{order_id}")
+                )
+            return state, jobs
+        finally:
+            async with db_session_maker() as session:
+                await session.execute(delete(Job).where(Job.dedup_key == f"{JOB_GUIDE_EMAIL}:{order_id}"))
+                await session.execute(delete(Order).where(Order.id == order_id))
+                await session.commit()
+
+    state, jobs = asyncio.run(scenario())
+    assert state == "completed"
+    assert jobs == 1
+    assert reconciler.last_result["changed"] == 1
@@ -0,0 +1,85 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.cli import prerender
+from app.core.config import settings
+from app.database.crud.product_with_cards import (
+    get_product_page_version, get_product_with_card_by_code, list_product_page_versions
+)
+from app.database.models import Product, ProductCard, ProductCardImage
+
+
+@pytest.fixture
+def warsaw_session_maker(db_session_maker):
+    """Sessions with a non-UTC TimeZone: json_agg renders timestamps in it, asyncpg returns UTC."""
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"timezone": "Europe/Warsaw"}},
+    )
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def product(db):
+    """A test product with an English card and one image; removed afterwards."""
+    code = f"T{uuid.uuid4().hex[:8]}"
+
+    async def create(session):
+        item = Product(product_code=code, price=1000, currency="EUR")
+        session.add(item)
+        await session.flush()
+        card = ProductCard(product_id=item.id, lang="en", name="Test guide", description="Test")
+        session.add(card)
+        await session.commit()
+        # изображение добавлено позже — его updated_at и есть последнее изменение страницы
+        session.add(ProductCardImage(product_card_id=card.id, url="/img/test.jpg", position=0))
+        await session.commit()
+        return item.id
+
+    product_id = db(create)
+    yield code
+
+    async def cleanup(session):
+        card_ids = ProductCard.__table__.select().with_only_columns(ProductCard.id).where(
+            ProductCard.product_id == product_id
+        )
+        await session.execute(delete(ProductCardImage).where(ProductCardImage.product_card_id.in_(card_ids)))
+        await session.execute(delete(ProductCard).where(ProductCard.product_id == product_id))
+        await session.execute(delete(Product).where(Product.id == product_id))
+        await session.commit()
+
+    db(cleanup)
+
+
+def test_page_version_matches_loaded_page_in_any_timezone(warsaw_session_maker, product):
+    async def scenario():
+        async with warsaw_session_maker() as session:
+            page = await get_product_with_card_by_code(session, product, "en")
+            return (
+                page.content_version(),
+                await get_product_page_version(session, product, "en"),
+                (await list_product_page_versions(session))[(product, "en")],
+            )
+
+    loaded, checked, listed = asyncio.run(scenario())
+    assert loaded == checked == listed
+    assert loaded.endswith("-1")
+
+
+def test_prerender_skips_unchanged_pages_in_any_timezone(warsaw_session_maker, product, tmp_path, monkeypatch):
+    monkeypatch.setattr(prerender, "async_session_maker", warsaw_session_maker)
+
+    asyncio.run(prerender.prerender_catalog(tmp_path))
+    assert (tmp_path / "products" / "en" / f"{product}.html").exists()
+
+    # сверка с манифестом: ничего не изменилось — ничего не рендерится
+    stats = asyncio.run(prerender.prerender_catalog(tmp_path))
+    assert stats["rendered"] == 0
@@ -0,0 +1,96 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import delete, func, select, update
+
+from app.database.crud.sales_analytics import SALES_ORDER_STATE, _order_day, refresh_sales_daily
+from app.database.models import Order, SalesDaily
+
+DAY = datetime(2001, 2, 3, 10, tzinfo=timezone.utc)
+NEXT_DAY = datetime(2001, 2, 4, 23, 30, tzinfo=timezone.utc)
+
+
+def new_order(order_id: str, state: str, amount: int, created_at: datetime, currency: str = "EUR") -> Order:
+    return Order(
+        id=order_id,
+        state=state,
+        amount=amount,
+        currency=currency,
+        settlement_currency=currency,
+        customers_email="buyer@example.com",
+        product_code="T999",
+        lang="en",
+        created_at=created_at,
+    )
+
+
+async def summary(session):
+    rows = await session.execute(
+        select(SalesDaily.day, SalesDaily.product_code, SalesDaily.lang, SalesDaily.currency,
+               SalesDaily.orders, SalesDaily.revenue)
+    )
+    return sorted(tuple(row) for row in rows.all())
+
+
+async def direct_group_by(session):
+    rows = await session.execute(
+        select(_order_day(), Order.product_code, Order.lang, Order.currency, func.count(), func.sum(Order.amount))
+        .where(Order.state == SALES_ORDER_STATE)
+        .group_by(_order_day(), Order.product_code, Order.lang, Order.currency)
+    )
+    return sorted(tuple(row) for row in rows.all())
+
+
+@pytest.fixture
+def order_ids(db):
+    ids = []
+    yield ids
+
+    async def cleanup(session):
+        await session.execute(delete(Order).where(Order.id.in_(ids)))
+        await session.commit()
+        await refresh_sales_daily(session, full=True)
+
+    db(cleanup)
+
+
+def test_incremental_refresh_matches_direct_group_by(db, order_ids):
+    order_ids.extend(f"test-{uuid.uuid4()}" for _ in range(5))
+    first, second, third, fourth, fifth = order_ids
+
+    async def initial(session):
+        session.add_all([
+            new_order(first, "completed", 1000, DAY),
+            new_order(second, "completed", 2500, DAY),
+            new_order(third, "pending", 700, DAY),
+        ])
+        await session.commit()
+        await refresh_sales_daily(session, full=True)
+        return await summary(session), await direct_group_by(session)
+
+    built, expected = db(initial)
+    assert built == expected
+
+    async def changes(session):
+        # оплата, отмена, новые заказы в другой день и другой валюте
+        await session.execute(update(Order).where(Order.id == third).values(state="completed", updated_at=func.now()))
+        await session.execute(update(Order).where(Order.id == second).values(state="cancelled", updated_at=func.now()))
+        session.add_all([
+            new_order(fourth, "completed", 400, NEXT_DAY),
+            new_order(fifth, "completed", 900, DAY, currency="GBP"),
+        ])
+        await session.commit()
+        assert await refresh_sales_daily(session) is not None
+        # повторный пересчёт того же окна ничего не меняет
+        await refresh_sales_daily(session)
+        return await summary(session), await direct_group_by(session)
+
+    refreshed, expected = db(changes)
+    assert refreshed == expected
+    test_rows = [row for row in refreshed if row[1] == "T999"]
+    assert [(row[0].isoformat(), row[3], row[4], row[5]) for row in test_rows] == [
+        ("2001-02-03", "EUR", 2, 1700),
+        ("2001-02-03", "GBP", 1, 900),
+        ("2001-02-04", "EUR", 1, 400),
+    ]